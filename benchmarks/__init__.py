@@ -0,0 +1 @@
+"""Benchmarks for SALIDtranslit. Run from the repository root, e.g. `python -m benchmarks.import_time`."""
@@ -0,0 +1,63 @@
+"""Helpers for loading the evaluation corpus in benchmarks."""
+from __future__ import annotations
+
+import csv
+import os
+from typing import Dict, List
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+default_corpus_path = f"{repo_root}/data/evaluation_set.csv"
+
+def load_columns(path: str = default_corpus_path) -> Dict[str, List[str]]:
+    """
+    Loads the text columns of the evaluation corpus.
+
+    Args:
+        path (str): CSV with bengali, partial_trans and correct_trans columns.
+
+    Returns:
+        Dict[str, List[str]]: Column name to list of cells.
+    """
+    columns: Dict[str, List[str]] = {"bengali": [], "partial_trans": [], "correct_trans": []}
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            for name, cells in columns.items():
+                cells.append(row[name])
+    return columns
+
+def bva_accuracy(bengali: List[str], outputs: List[str], corrects: List[str]) -> Dict[str, float]:
+    """
+    Scores ba/va decisions against the corrected transliterations.
+
+    A word counts if its correct spelling contains ब or व and it aligns with the
+    output. Sentence accuracy is exact match over the rows compared.
+
+    Args:
+        bengali (List[str]): Input sentences in Bengali script.
+        outputs (List[str]): Transliterations to score.
+        corrects (List[str]): Reference transliterations.
+
+    Returns:
+        Dict[str, float]: Word-level ba/va accuracy, sentence accuracy and counts.
+    """
+    from salidtranslit.cache import align_words
+
+    words = correct_words = sentences = correct_sentences = 0
+    for ben, output, correct in zip(bengali, outputs, corrects):
+        sentences += 1
+        correct_sentences += output == correct
+        output_words = align_words(ben, output)
+        reference_words = align_words(ben, correct)
+        if output_words is None or reference_words is None:
+            continue
+        for (_, o_start, o_end), (_, r_start, r_end) in zip(output_words, reference_words):
+            reference = correct[r_start:r_end]
+            if "ब" in reference or "व" in reference:
+                words += 1
+                correct_words += output[o_start:o_end] == reference
+    return {
+        "bva_words": words,
+        "bva_accuracy": correct_words / words if words else 0.0,
+        "sentences": sentences,
+        "sentence_accuracy": correct_sentences / sentences if sentences else 0.0,
+    }
@@ -0,0 +1,281 @@
+"""
+The original character-by-character scanners of every direction, kept as the
+specification the optimized engine in `core` must match exactly.
+
+They run over uncompiled tries built directly from the ScriptMap JSON files,
+so they share no tables, fast paths or transducers with `core`. They are slow
+and only used by the tests, `benchmarks.fuzz` and `benchmarks.fastpath`. The code is that of
+the original scanners, except that the trie is searched at an offset instead
+of on a slice, and `ben_dev_partial` stops before the model correction.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Tuple
+
+from salidtranslit import trie
+from salidtranslit.reference import (
+    load_mappings,
+    dev_cons, ben_b_cons, ben_cons,
+    end_of_term, iast_vows, iast_cons,
+    itrans_vows, itrans_cons
+)
+
+_tries: Dict[str, trie.Trie] = {}
+
+def _trie(script: str) -> trie.Trie:
+    if not _tries:
+        for name, mappings in load_mappings().items():
+            source = trie.Trie()
+            for term, mapping in mappings.items():
+                source.insert(term, mapping)
+            _tries[name] = source
+    return _tries[script]
+
+def dev_ben(input_str: str) -> str:
+    """
+    Transliterates Devanagari script to Bengali script using the dev_trie.
+
+    Args:
+        input_str (str): Input string in Devanagari script.
+
+    Returns:
+        str: Transliterated string in Bengali script.
+    """
+    dev_trie = _trie("devanagari")
+    output = ""
+    i = 0
+    while i < len(input_str):
+        char = re.sub(r"়|़", "", input_str[i])
+        longest_match, match_len = dev_trie.searchLongestMatch(input_str, i)
+        outchar = char
+        if longest_match != None:
+            outchar = longest_match.rep[0]
+            i += match_len
+        else:
+            i += 1
+        output += outchar
+    return output
+
+def dev_rom(input_str: str, mode: int) -> str:
+    """
+    Helper function to transliterate Devanagari to Roman scripts (IAST or ITRANS).
+
+    Args:
+        input_str (str): Input string in Devanagari script.
+        mode (int): 0 for IAST, 1 for ITRANS.
+
+    Returns:
+        str: Transliterated string in Roman script.
+    """
+    dev_trie = _trie("devanagari")
+    output = ""
+    i = 0
+    prev, state = "", "s"
+    while i < len(input_str):
+        char = re.sub(r"‌|়|़", "", input_str[i])
+        prev = state
+        if char in dev_cons:
+            state = "c"
+        else:
+            state = "s"
+
+        longest_match, match_len = dev_trie.searchLongestMatch(input_str, i)
+        outchar = char
+        if longest_match != None:
+            outchar = longest_match.rep[1 + mode]
+            i += match_len
+        else:
+            i += 1
+        if prev == "c" and (state == "c" or char in end_of_term):
+            outchar = "a" + outchar
+        output += outchar
+    if state == "c":
+        output += "a"
+    return output
+
+def ben_dev_partial(input_str: str) -> Tuple[str, bool]:
+    """
+    The trie pass of Bengali to Devanagari transliteration, before the model
+    correction.
+
+    Args:
+        input_str (str): Input string in Bengali script.
+
+    Returns:
+        Tuple[str, bool]: The partial transliteration, and whether it contains
+        an ambiguous ब.
+    """
+    ben_trie = _trie("bengali")
+    output = ""
+    i = 0
+    state = "s"
+    ambiguous = False
+    while i < len(input_str):
+        char = input_str[i]
+        if char in ben_b_cons:
+            state = "bc"
+        elif state == "bc" and char == "্":
+            state = "v"
+        elif state == "v" and char == "ব":
+            char = "व"
+            state = "s"
+        else:
+            state = "s"
+
+        longest_match, match_len = ben_trie.searchLongestMatch(input_str, i)
+        outchar = char
+        if outchar != "व" and longest_match != None:
+            outchar = longest_match.rep[0]
+            i += match_len
+        else:
+            i += 1
+        output += outchar
+        if outchar == "ब":
+            ambiguous = True
+    return output, ambiguous
+
+def ben_rom(input_str: str, mode: int) -> str:
+    """
+    Helper function to transliterate Bengali script to Roman scripts (IAST or ITRANS).
+
+    Args:
+        input_str (str): Input string in Bengali script.
+        mode (int): 0 for IAST, 1 for ITRANS.
+
+    Returns:
+        str: Transliterated string in Roman script.
+    """
+    ben_trie = _trie("bengali")
+    output = ""
+    i = 0
+    prev, state = "", "s"
+    while i < len(input_str):
+        char = re.sub(r"‌|়|़", "", input_str[i])
+        prev = state
+        if state != "v" and char in ben_b_cons:
+            state = "bc"
+        elif state != "v" and char in ben_cons:
+            state = "c"
+        elif state == "bc" and char == "্":
+            state = "v"
+        elif state == "v":
+            if char == "ব":
+                char = "v"
+            if char in ben_b_cons:
+                state = "bc"
+            elif char == "v" or char in ben_cons:
+                state = "c"
+            else:
+                state = "s"
+        else:
+            state = "s"
+
+        longest_match, match_len = ben_trie.searchLongestMatch(input_str, i)
+        outchar = char
+        if outchar != "v" and longest_match != None:
+            outchar = longest_match.rep[1 + mode]
+            i += match_len
+        else:
+            i += 1
+        if prev in ("c", "bc") and (state in ("c", "bc") or char in end_of_term):
+            outchar = "a" + outchar
+        output += outchar
+    if state in ("c", "bc"):
+        output += "a"
+    return output
+
+def iast_ind(input_str: str, mode: int) -> str:
+    """
+    Helper function to transliterate IAST to Indian scripts (Devanagari or Bengali).
+
+    Args:
+        input_str (str): Input string in IAST.
+        mode (int): 0 for Devanagari, 1 for Bengali.
+
+    Returns:
+        str: Transliterated string in target script.
+    """
+    iast_trie = _trie("iast")
+    output = ""
+    i = 0
+    prev, state = "", "s"
+    while i < len(input_str):
+        prev = state
+        if input_str[i] in iast_vows:
+            if state == "s":
+                state = "vow"
+            else:
+                state = "vs"
+        elif input_str[i] in iast_cons:
+            state = "c"
+        else:
+            state = "s"
+
+        longest_match, match_len = iast_trie.searchLongestMatch(input_str, i)
+        if longest_match != None:
+            if prev == "c" and state == "c":
+                if mode == 0:
+                    output += "्" + longest_match.rep[mode][0]
+                else:
+                    output += "্" + longest_match.rep[mode][0]
+            else:
+                output += longest_match.rep[mode][0] if state == "vow" else longest_match.rep[mode][-1]
+            i += match_len
+        else:
+            output += input_str[i]
+            i += 1
+    if state == "c":
+        if mode == 0:
+            output += "्"
+        else:
+            output += "্"
+    return output
+
+def itrans_ind(input_str: str, mode: int) -> str:
+    """
+    Helper function to transliterate ITRANS to Indian scripts (Devanagari or Bengali).
+
+    Args:
+        input_str (str): Input string in ITRANS.
+        mode (int): 0 for Devanagari, 1 for Bengali.
+
+    Returns:
+        str: Transliterated string in target script.
+    """
+    itrans_trie = _trie("itrans")
+    output = ""
+    i = 0
+    prev, state = "", "s"
+    while i < len(input_str):
+        prev = state
+        if input_str[i] in itrans_vows or input_str[i:i+2] in itrans_vows:
+            if state == "s":
+                state = "vow"
+            else:
+                state = "vs"
+        elif input_str[i] in itrans_cons or input_str[i:i+2] in itrans_cons:
+            state = "c"
+        else:
+            state = "s"
+
+        longest_match, match_len = itrans_trie.searchLongestMatch(input_str, i)
+        if longest_match != None:
+            if prev == "c" and state == "c":
+                if mode == 0:
+                    output += "्" + longest_match.rep[mode][0]
+                else:
+                    output += "্" + longest_match.rep[mode][0]
+            else:
+                output += longest_match.rep[mode][0] if state == "vow" else longest_match.rep[mode][-1]
+            i += match_len
+        else:
+            output += input_str[i]
+            i += 1
+
+    if state == "c":
+        if mode == 0:
+            output += "्"
+        else:
+            output += "্"
+    return output
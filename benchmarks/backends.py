@@ -0,0 +1,80 @@
+"""
+Accuracy-vs-latency report for the mT5 corrector backends.
+
+Each backend corrects the ambiguous sentences of the evaluation corpus with the
+lexicon and word cache disabled, so every sentence reaches the model. The report
+gives per-sentence latency percentiles, load time and ba/va accuracy against
+`correct_trans` for each backend and decoding mode.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from salidtranslit import model
+from salidtranslit.backends import available_backends
+from salidtranslit.core import ben_dev_partial
+
+from ._corpus import bva_accuracy, default_corpus_path, load_columns
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def run(backends: List[str], decodings: List[str], limit: int, corpus_path: str = default_corpus_path) -> Dict[str, Dict[str, float]]:
+    """
+    Measures each backend and decoding mode on the ambiguous corpus sentences.
+
+    Args:
+        backends (List[str]): Backend names to compare.
+        decodings (List[str]): Decoding modes to compare.
+        limit (int): Maximum number of sentences to correct.
+        corpus_path (str): Evaluation corpus CSV.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per "backend/decoding", latency and accuracy figures.
+    """
+    columns = load_columns(corpus_path)
+    rows = []
+    for ben, correct in zip(columns["bengali"], columns["correct_trans"]):
+        partial, ambiguous = ben_dev_partial(ben)
+        if ambiguous:
+            rows.append((ben, partial, correct))
+    rows = rows[:limit]
+
+    results = {}
+    for backend in backends:
+        start = time.perf_counter()
+        mt5, tokenizer = model.load_finetuned_mt5(backend=backend)
+        load_seconds = time.perf_counter() - start
+        for decoding in decodings:
+            latencies, outputs = [], []
+            for ben, partial, _ in rows:
+                start = time.perf_counter()
+                outputs.append(model.correct_transliteration(ben, partial, mt5, tokenizer, decoding))
+                latencies.append(time.perf_counter() - start)
+            report = bva_accuracy([r[0] for r in rows], outputs, [r[2] for r in rows])
+            report.update({
+                "load_s": load_seconds,
+                "mean_s": statistics.mean(latencies),
+                "p50_s": _percentile(latencies, 0.50),
+                "p95_s": _percentile(latencies, 0.95),
+            })
+            results[f"{backend}/{decoding}"] = report
+        del mt5, tokenizer
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    parser.add_argument("--backends", nargs="+", default=list(available_backends()))
+    parser.add_argument("--decodings", nargs="+", default=list(model.decoding_modes))
+    parser.add_argument("--limit", type=int, default=200, help="Number of ambiguous sentences to correct.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.backends, args.decodings, args.limit, args.corpus), indent=2))
+
+if __name__ == "__main__":
+    main()
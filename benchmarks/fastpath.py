@@ -0,0 +1,66 @@
+"""
+Compares the whole-text fast path of `dev_ben` and `dev_rom` with the scanners.
+
+The Devanagari column of the evaluation corpus is repeated up to the requested
+size, transliterated by both implementations, and the outputs are checked to
+be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, Tuple
+
+from salidtranslit import core
+
+from . import _scanners as scanners
+from ._corpus import default_corpus_path, load_columns
+
+_directions: Dict[str, Tuple[Callable[[str], str], Callable[[str], str]]] = {
+    "dev_ben": (core.dev_ben, scanners.dev_ben),
+    "dev_iast": (core.dev_iast, lambda text: core._dev_rom_scan(text, 0)),
+    "dev_itrans": (core.dev_itrans, lambda text: core._dev_rom_scan(text, 1)),
+}
+
+def _timed(func: Callable[[str], str], text: str) -> Tuple[float, str]:
+    start = time.perf_counter()
+    output = func(text)
+    return time.perf_counter() - start, output
+
+def run(size: int = 10_000_000, corpus_path: str = default_corpus_path) -> Dict[str, Dict[str, float]]:
+    """
+    Times the fast path and the scanner of each Devanagari direction.
+
+    Args:
+        size (int): Input size in characters.
+        corpus_path (str): Evaluation corpus CSV.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per direction, the seconds taken by each implementation and the speedup.
+    """
+    text = "\n".join(load_columns(corpus_path)["correct_trans"])
+    text = (text * (size // len(text) + 1))[:size]
+    results = {}
+    for name, (fast, scan) in _directions.items():
+        fast_seconds, fast_output = _timed(fast, text)
+        scan_seconds, scan_output = _timed(scan, text)
+        if fast_output != scan_output:
+            raise AssertionError(f"{name}: fast path disagrees with the scanner")
+        results[name] = {
+            "chars": len(text),
+            "scanner_s": scan_seconds,
+            "fast_s": fast_seconds,
+            "speedup": scan_seconds / fast_seconds,
+        }
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    parser.add_argument("--size", type=int, default=10_000_000, help="Input size in characters.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.size, args.corpus), indent=2))
+
+if __name__ == "__main__":
+    main()
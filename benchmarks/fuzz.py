@@ -0,0 +1,284 @@
+"""
+Differential and round-trip fuzzing of the transliteration engines.
+
+Random strings are built from the ScriptMap keys and the character sets in
+`reference.py`. The reference engine is the original character-by-character
+scanners in `benchmarks._scanners`, run over tries built directly from the
+JSON files. Every direction
+of the engine in `core` (fast paths, transducers, composed transducers and the
+shipped `scriptmap.bin`) must give exactly the same output as the reference on
+any input. Syllable-structured words must also survive round trips such as
+Devanagari to IAST to Devanagari. Both engines are timed on the same input.
+
+A failing input is shrunk to a minimal example before it is reported.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from salidtranslit import core, reference
+
+from . import _scanners as scanners
+
+# Reference engine: the original scanners
+
+ref_dev_ben = scanners.dev_ben
+ref_dev_rom = scanners.dev_rom
+ref_ben_rom = scanners.ben_rom
+ref_iast_ind = scanners.iast_ind
+ref_itrans_ind = scanners.itrans_ind
+
+def ref_ben_dev_partial(input_str: str) -> str:
+    return scanners.ben_dev_partial(input_str)[0]
+
+# Direction name to (optimized, reference), and the source script of its input.
+directions: Dict[str, Tuple[Callable[[str], str], Callable[[str], str], str]] = {
+    "dev_ben": (core.dev_ben, ref_dev_ben, "devanagari"),
+    "dev_iast": (core.dev_iast, lambda text: ref_dev_rom(text, 0), "devanagari"),
+    "dev_itrans": (core.dev_itrans, lambda text: ref_dev_rom(text, 1), "devanagari"),
+    "ben_dev_partial": (lambda text: core.ben_dev_partial(text)[0], ref_ben_dev_partial, "bengali"),
+    "ben_iast": (core.ben_iast, lambda text: ref_ben_rom(text, 0), "bengali"),
+    "ben_itrans": (core.ben_itrans, lambda text: ref_ben_rom(text, 1), "bengali"),
+    "iast_dev": (core.iast_dev, lambda text: ref_iast_ind(text, 0), "iast"),
+    "iast_ben": (core.iast_ben, lambda text: ref_iast_ind(text, 1), "iast"),
+    "itrans_dev": (core.itrans_dev, lambda text: ref_itrans_ind(text, 0), "itrans"),
+    "itrans_ben": (core.itrans_ben, lambda text: ref_itrans_ind(text, 1), "itrans"),
+    "iast_itrans": (core.iast_itrans, lambda text: ref_dev_rom(ref_iast_ind(text, 0), 1), "iast"),
+    "itrans_iast": (core.itrans_iast, lambda text: ref_dev_rom(ref_itrans_ind(text, 0), 0), "itrans"),
+}
+
+# Round trips through the optimized engine: (there, back, source script).
+# Bengali to Devanagari is the trie pass, since ব to ब or व needs the model.
+round_trips: Dict[str, Tuple[Callable[[str], str], Callable[[str], str], str]] = {
+    "dev_iast_dev": (core.dev_iast, core.iast_dev, "devanagari"),
+    "dev_itrans_dev": (core.dev_itrans, core.itrans_dev, "devanagari"),
+    "ben_iast_ben": (core.ben_iast, core.iast_ben, "bengali"),
+    "ben_itrans_ben": (core.ben_itrans, core.itrans_ben, "bengali"),
+    "ben_dev_ben": (lambda text: core.ben_dev_partial(text)[0], core.dev_ben, "bengali"),
+    "iast_itrans_iast": (core.iast_itrans, core.itrans_iast, "iast"),
+    "itrans_iast_itrans": (core.itrans_iast, core.iast_itrans, "itrans"),
+}
+
+# Generators
+
+_noise = {
+    "devanagari": ["‌", "़", "x", "a", "1"],
+    "bengali": ["‌", "়", "x", "a", "1"],
+    "iast": ["^", "~", "̤", "͟", "A", "क"],
+    "itrans": ["^", "~", "ā", "x", "क"],
+}
+
+def _alphabet(script: str) -> List[str]:
+    keys = sorted(reference.load_mappings()[script])
+    pieces = sorted({char for key in keys for char in key})
+    return keys + pieces + sorted(reference.end_of_term) + _noise[script]
+
+_alphabets: Dict[str, List[str]] = {}
+
+def random_text(rng: random.Random, script: str, max_tokens: int = 16) -> str:
+    """
+    Returns an arbitrary string of `script`'s keys, their characters, term
+    boundaries and unmapped characters. The engines must agree on any such
+    string, valid or not.
+    """
+    if script not in _alphabets:
+        _alphabets[script] = _alphabet(script)
+    alphabet = _alphabets[script]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_tokens)))
+
+def _round_trips(piece: str, index: int) -> bool:
+    # Whether a Devanagari (index 0) or Bengali (index 1) piece survives both
+    # romanizations. Some spellings cannot: ব্হ is written "bh", which reads
+    # back as ভ, and ऱॆ is written "R^e", which starts like the vowel "R^i".
+    if index == 0:
+        return ref_iast_ind(ref_dev_rom(piece, 0), 0) == piece and ref_itrans_ind(ref_dev_rom(piece, 1), 0) == piece
+    return ref_iast_ind(ref_ben_rom(piece, 0), 1) == piece and ref_itrans_ind(ref_ben_rom(piece, 1), 1) == piece
+
+def _word_parts(index: int) -> Tuple[List[str], List[Tuple[str, str]], Dict[str, List[str]], str]:
+    # The IAST mapping lists every vowel with its independent form and sign,
+    # and every consonant, in Devanagari (index 0) and Bengali (index 1).
+    vowels, signs, consonants = [], [""], []
+    for key, rep in reference.load_mappings()["iast"].items():
+        forms = rep[index]
+        if key in reference.iast_vows and len(forms) == 2:
+            vowels.append(forms[0])
+            signs.append(forms[1])
+        elif key in reference.iast_cons:
+            consonants.append(forms[0])
+    virama = ("्", "্")[index]
+    consonants = sorted(set(consonants))
+    vowels = [vowel for vowel in vowels if _round_trips(vowel, index)]
+    units = [(cons, sign) for cons in consonants for sign in signs + [virama] if _round_trips(cons + sign, index)]
+    firsts: Dict[str, List[str]] = {}
+    for second in consonants:
+        firsts[second] = [first for first in consonants if _round_trips(first + virama + second, index)]
+    return vowels, units, firsts, virama
+
+_parts: Dict[int, Tuple[List[str], List[Tuple[str, str]], Dict[str, List[str]], str]] = {}
+_valid: Dict[str, bool] = {}
+
+def random_words(rng: random.Random, script: str, max_words: int = 6) -> str:
+    """
+    Returns well-formed words in `script`, which every round trip must preserve:
+    an optional independent vowel, then syllables of a consonant or
+    two-consonant conjunct with a vowel sign or the inherent vowel, and
+    possibly a virama at the very end. Spellings that a romanization cannot
+    carry are left out. Roman words are romanized Devanagari words.
+    """
+    if script in ("iast", "itrans"):
+        return ref_dev_rom(random_words(rng, "devanagari", max_words), 0 if script == "iast" else 1)
+    index = 0 if script == "devanagari" else 1
+    if index not in _parts:
+        _parts[index] = _word_parts(index)
+    vowels, units, firsts, virama = _parts[index]
+    words = []
+    n_words = rng.randint(1, max_words)
+    for word_index in range(n_words):
+        word = [rng.choice(vowels)] if rng.random() < 0.2 else []
+        syllables = rng.randint(1, 4)
+        for position in range(syllables):
+            cons, sign = rng.choice(units)
+            # The romanizations only restore a virama at the end of the text.
+            while sign == virama and (position < syllables - 1 or word_index < n_words - 1):
+                cons, sign = rng.choice(units)
+            syllable = cons + sign
+            if rng.random() < 0.25 and firsts[cons]:
+                conjunct = rng.choice(firsts[cons]) + virama + syllable
+                if conjunct not in _valid:
+                    _valid[conjunct] = _round_trips(conjunct, index)
+                if _valid[conjunct]:
+                    syllable = conjunct
+            word.append(syllable)
+        words.append("".join(word))
+    text = words[0]
+    for word in words[1:]:
+        text += rng.choice((" ", " ", ", ", "\n")) + word
+    return text
+
+# Checks
+
+def shrink(pieces: List[str], fails: Callable[[str], bool], sep: str = "") -> str:
+    """
+    Removes pieces (characters or words) of a failing input while it keeps failing.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(pieces)):
+            candidate = pieces[:i] + pieces[i + 1:]
+            if fails(sep.join(candidate)):
+                pieces, changed = candidate, True
+                break
+    return sep.join(pieces)
+
+def differential(cases: int = 1000, seed: int = 0, valid: bool = False) -> List[Dict[str, str]]:
+    """
+    Compares the optimized and reference engines on random inputs.
+
+    Args:
+        cases (int): Inputs per direction.
+        seed (int): Random seed.
+        valid (bool): Use well-formed words instead of arbitrary strings.
+
+    Returns:
+        List[Dict[str, str]]: One shrunk counterexample per failing direction.
+    """
+    failures = []
+    for name, (optimized, ref, script) in directions.items():
+        rng = random.Random(f"{seed}:{name}")
+        for _ in range(cases):
+            text = random_words(rng, script) if valid else random_text(rng, script)
+            if optimized(text) != ref(text):
+                text = shrink(list(text), lambda t: optimized(t) != ref(t))
+                failures.append({"direction": name, "input": text, "optimized": optimized(text), "reference": ref(text)})
+                break
+    return failures
+
+def round_trip(cases: int = 1000, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Runs well-formed words through each round trip.
+
+    Returns:
+        List[Dict[str, str]]: One shrunk counterexample per failing round trip.
+    """
+    failures = []
+    for name, (there, back, script) in round_trips.items():
+        rng = random.Random(f"{seed}:{name}")
+        for _ in range(cases):
+            text = random_words(rng, script)
+            if back(there(text)) != text:
+                # Removing characters would leave well-formed words, so remove words.
+                text = shrink(text.split(), lambda t: back(there(t)) != t, " ")
+                failures.append({"direction": name, "input": text, "via": there(text), "output": back(there(text))})
+                break
+    return failures
+
+def throughput(size: int = 1_000_000, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Times both engines in every direction on `size` characters of well-formed words.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per direction, chars/sec of each engine and the speedup.
+    """
+    results = {}
+    texts: Dict[str, str] = {}
+    for name, (optimized, ref, script) in directions.items():
+        if script not in texts:
+            rng = random.Random(f"{seed}:{script}")
+            pieces, length = [], 0
+            while length < size:
+                pieces.append(random_words(rng, script, 50))
+                length += len(pieces[-1]) + 1
+            texts[script] = "\n".join(pieces)[:size]
+        text = texts[script]
+        start = time.perf_counter()
+        expected = ref(text)
+        ref_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        output = optimized(text)
+        seconds = time.perf_counter() - start
+        results[name] = {
+            "chars": len(text),
+            "reference_chars_per_s": len(text) / ref_seconds,
+            "optimized_chars_per_s": len(text) / seconds,
+            "speedup": ref_seconds / seconds,
+            "identical": output == expected,
+        }
+    return results
+
+def run(cases: int = 1000, seed: int = 0, size: int = 1_000_000) -> Dict[str, object]:
+    """
+    Runs the differential checks on arbitrary and well-formed inputs, the round
+    trips and the throughput comparison.
+    """
+    return {
+        "cases": cases,
+        "seed": seed,
+        "differential": differential(cases, seed) + differential(cases, seed, valid=True),
+        "round_trip": round_trip(cases, seed),
+        "throughput": throughput(size, seed),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=1000, help="Random inputs per direction.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=1_000_000, help="Throughput input size in characters.")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+    results = run(args.cases, args.seed, args.size)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    failed = results["differential"] or results["round_trip"] or not all(r["identical"] for r in results["throughput"].values())
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
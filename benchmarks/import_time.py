@@ -0,0 +1,64 @@
+"""
+Measures the wall-clock cost of `import salidtranslit` in a fresh interpreter.
+
+Each run spawns a new process so nothing is cached in `sys.modules`. The run
+fails if importing the package pulls in torch or transformers.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_probe = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import salidtranslit\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [m for m in ('torch', 'transformers') if m in sys.modules]\n"
+    "print(elapsed, ','.join(heavy))\n"
+)
+
+def measure_import(runs: int = 10) -> List[float]:
+    """
+    Imports the package `runs` times in fresh interpreters.
+
+    Args:
+        runs (int): Number of interpreter launches.
+
+    Returns:
+        List[float]: Import times in seconds.
+
+    Raises:
+        RuntimeError: If the import loaded torch or transformers.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [f"{_repo_root}/src", env.get("PYTHONPATH")]))
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", _probe], env=env, capture_output=True, text=True, check=True)
+        elapsed, heavy = result.stdout.strip().partition(" ")[::2]
+        if heavy:
+            raise RuntimeError(f"import salidtranslit loaded {heavy}")
+        times.append(float(elapsed))
+    return times
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if the median exceeds this budget.")
+    args = parser.parse_args()
+
+    times = measure_import(args.runs)
+    median = statistics.median(times)
+    print(json.dumps({"runs": args.runs, "median_s": median, "min_s": min(times), "max_s": max(times)}))
+    if args.max_seconds is not None and median > args.max_seconds:
+        sys.exit(f"import median {median:.3f}s exceeds budget {args.max_seconds:.3f}s")
+
+if __name__ == "__main__":
+    main()
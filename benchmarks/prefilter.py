@@ -0,0 +1,64 @@
+"""
+Precision report for the ba/va pre-filter in `salidtranslit.ambiguity`.
+
+For every ब of the partial transliterations whose word aligns with a ba/va
+variant in `correct_trans`, the report counts how many the pre-filter treats as
+certain and how many of those really are ब, on the training split the rules
+were derived on and on the held-out split. It also gives the fraction of
+ambiguous sentences the pre-filter takes off the model path.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict
+
+from salidtranslit.ambiguity import has_uncertain, is_uncertain
+from salidtranslit.cache import align_words, is_bva_variant
+from salidtranslit.lexicon import read_rows
+
+from ._corpus import default_corpus_path
+
+def run(split: str, corpus_path: str = default_corpus_path) -> Dict[str, float]:
+    """
+    Measures the pre-filter on one split of the corpus.
+
+    Returns:
+        Dict[str, float]: Counts of ब, of certain ब and of those resolved to ब,
+        the precision of the certain decisions and the sentence skip rate.
+    """
+    positions = certain = certain_ba = ambiguous = skipped = 0
+    for bengali, partial, correct in read_rows(corpus_path, split):
+        if "ब" in partial:
+            ambiguous += 1
+            skipped += not has_uncertain(partial)
+        partial_words, correct_words = align_words(bengali, partial), align_words(bengali, correct)
+        if partial_words is None or correct_words is None:
+            continue
+        for (_, p_start, p_end), (_, c_start, c_end) in zip(partial_words, correct_words):
+            if not is_bva_variant(partial[p_start:p_end], correct[c_start:c_end]):
+                continue
+            index = partial.find("ब", p_start, p_end)
+            while index >= 0:
+                positions += 1
+                if not is_uncertain(partial, index):
+                    certain += 1
+                    certain_ba += correct[c_start + index - p_start] == "ब"
+                index = partial.find("ब", index + 1, p_end)
+    return {
+        "positions": positions,
+        "certain": certain,
+        "certain_ba": certain_ba,
+        "precision": certain_ba / certain if certain else 0.0,
+        "ambiguous_sentences": ambiguous,
+        "skip_rate": skipped / ambiguous if ambiguous else 0.0,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    args = parser.parse_args()
+    print(json.dumps({split: run(split, args.corpus) for split in ("train", "held_out")}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures how scanner time grows with input length.
+
+Inputs from 1 KB up to 10 MB are built by repeating the evaluation corpus, and
+each direction reports seconds and nanoseconds per character for every size.
+Linear scanners keep ns/char roughly flat as the input grows. Bengali to
+Devanagari runs in trie-only mode so only the scanner is measured.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import salidtranslit
+from salidtranslit import core
+
+from ._corpus import default_corpus_path, load_columns
+
+_directions = {
+    "dev_ben": ("correct_trans", core.dev_ben),
+    "dev_iast": ("correct_trans", core.dev_iast),
+    "ben_dev": ("bengali", core.ben_dev),
+    "ben_iast": ("bengali", core.ben_iast),
+    "iast_dev": ("iast", core.iast_dev),
+    "itrans_ben": ("itrans", core.itrans_ben),
+}
+
+def _sized(text: str, size: int) -> str:
+    return (text * (size // len(text) + 1))[:size]
+
+def run(sizes: List[int], corpus_path: str = default_corpus_path) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Times each direction on inputs of the given sizes.
+
+    Args:
+        sizes (List[int]): Input sizes in characters.
+        corpus_path (str): Evaluation corpus CSV.
+
+    Returns:
+        Dict[str, List[Dict[str, float]]]: Per direction, one record per size.
+    """
+    columns = load_columns(corpus_path)
+    texts = {name: "\n".join(cells) for name, cells in columns.items()}
+    texts["iast"] = core.dev_iast(texts["correct_trans"])
+    texts["itrans"] = core.dev_itrans(texts["correct_trans"])
+
+    salidtranslit.set_trie_only(True)
+    results: Dict[str, List[Dict[str, float]]] = {}
+    for name, (column, func) in _directions.items():
+        records = []
+        for size in sizes:
+            text = _sized(texts[column], size)
+            start = time.perf_counter()
+            func(text)
+            seconds = time.perf_counter() - start
+            records.append({"chars": size, "seconds": seconds, "ns_per_char": seconds / size * 1e9})
+        results[name] = records
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+    results = run(args.sizes, args.corpus)
+    print(json.dumps(results, indent=2))
+    for name, records in results.items():
+        growth = records[-1]["ns_per_char"] / records[0]["ns_per_char"]
+        print(f"{name}: ns/char grows {growth:.2f}x from {records[0]['chars']} to {records[-1]['chars']} chars")
+
+if __name__ == "__main__":
+    main()
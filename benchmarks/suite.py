@@ -0,0 +1,205 @@
+"""
+Throughput, latency, memory and accuracy suite over the evaluation corpus.
+
+Every supported direction transliterates the corpus sentence by sentence in its
+own process and reports chars/sec, sentences/sec, p50/p95/p99 latency, peak RSS
+and the fraction of sentences that reach the mT5 corrector. Bengali to
+Devanagari also reports ba/va accuracy against `correct_trans` on the held-out
+split of the corpus (see `salidtranslit.lexicon.is_held_out`), with the default
+settings and with the lexicon disabled. The import time of the package is
+measured in fresh interpreters.
+
+Results are written as JSON. Passing an earlier result file with --compare
+prints the ratio of every metric to the earlier run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+from ._corpus import bva_accuracy, default_corpus_path, load_columns
+from .import_time import measure_import
+
+directions = [
+    ("bengali", "devanagari"), ("bengali", "iast"), ("bengali", "itrans"),
+    ("devanagari", "bengali"), ("devanagari", "iast"), ("devanagari", "itrans"),
+    ("iast", "devanagari"), ("iast", "bengali"),
+    ("itrans", "devanagari"), ("itrans", "bengali"),
+]
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def _inputs(source: str, corpus_path: str, limit: Optional[int]) -> Dict[str, List[str]]:
+    from salidtranslit import core
+
+    columns = load_columns(corpus_path)
+    if limit is not None:
+        columns = {name: cells[:limit] for name, cells in columns.items()}
+    if source == "iast":
+        columns["input"] = [core.dev_iast(text) for text in columns["correct_trans"]]
+    elif source == "itrans":
+        columns["input"] = [core.dev_itrans(text) for text in columns["correct_trans"]]
+    else:
+        columns["input"] = columns["bengali" if source == "bengali" else "correct_trans"]
+    return columns
+
+def run_direction(source: str, target: str, corpus_path: str = default_corpus_path, limit: Optional[int] = None, use_model: bool = False) -> Dict[str, float]:
+    """
+    Transliterates the corpus in one direction and measures it.
+
+    The corrector is wrapped to count the sentences that reach it. Without
+    `use_model`, it returns the partial transliteration, so the fraction of
+    sentences reaching the model is still counted without loading it.
+
+    Args:
+        source (str): The source script name.
+        target (str): The target script name.
+        corpus_path (str): Evaluation corpus CSV.
+        limit (Optional[int]): Only use the first `limit` rows.
+        use_model (bool): Run the real mT5 corrector.
+
+    Returns:
+        Dict[str, float]: The measurements for this direction.
+    """
+    import salidtranslit
+    from salidtranslit import core, lexicon, model
+
+    columns = _inputs(source, corpus_path, limit)
+    texts = columns["input"]
+
+    batch_size = 8
+    # A sentence counts once however many of its pieces reach the corrector.
+    reached = False
+    def counting_corrector(bengali: List[str], partial_trans: List[str]) -> List[str]:
+        nonlocal reached
+        reached = True
+        if not use_model:
+            return list(partial_trans)
+        return model.correct_transliterations(bengali, partial_trans, *core.get_model(), batch_size)
+    transliterator = salidtranslit.Transliterator(source, target, trie_only=False, batch_size=batch_size, corrector=counting_corrector)
+
+    model_sentences = 0
+    latencies, outputs = [], []
+    start = time.perf_counter()
+    for text in texts:
+        reached = False
+        sentence_start = time.perf_counter()
+        outputs.append(transliterator(text))
+        latencies.append(time.perf_counter() - sentence_start)
+        model_sentences += reached
+    seconds = time.perf_counter() - start
+
+    chars = sum(map(len, texts))
+    result = {
+        "sentences": len(texts),
+        "chars": chars,
+        "seconds": seconds,
+        "chars_per_s": chars / seconds,
+        "sentences_per_s": len(texts) / seconds,
+        "p50_ms": _percentile(latencies, 0.50) * 1e3,
+        "p95_ms": _percentile(latencies, 0.95) * 1e3,
+        "p99_ms": _percentile(latencies, 0.99) * 1e3,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "model_fraction": model_sentences / len(texts),
+    }
+    if (source, target) == ("bengali", "devanagari"):
+        # Accuracy is only scored on the held-out split: the lexicon and the
+        # pre-filter rules were derived from the training split.
+        held_out = [i for i, ben in enumerate(columns["bengali"]) if lexicon.is_held_out(ben)]
+        bengali = [columns["bengali"][i] for i in held_out]
+        corrects = [columns["correct_trans"][i] for i in held_out]
+        accuracy = bva_accuracy(bengali, [outputs[i] for i in held_out], corrects)
+        result["held_out_sentences"] = len(held_out)
+        result["bva_accuracy"] = accuracy["bva_accuracy"]
+        result["sentence_accuracy"] = accuracy["sentence_accuracy"]
+
+        # The same rows again without the lexicon or a word cache.
+        default_lexicon = lexicon.lexicon
+        lexicon.set_lexicon(None)
+        try:
+            bare = salidtranslit.Transliterator(source, target, trie_only=False, batch_size=batch_size, word_cache_size=0, corrector=counting_corrector)
+            accuracy = bva_accuracy(bengali, [bare(text) for text in bengali], corrects)
+        finally:
+            lexicon.set_lexicon(default_lexicon)
+        result["bva_accuracy_no_lexicon"] = accuracy["bva_accuracy"]
+        result["sentence_accuracy_no_lexicon"] = accuracy["sentence_accuracy"]
+    return result
+
+def run(corpus_path: str = default_corpus_path, limit: Optional[int] = None, use_model: bool = False, import_runs: int = 5) -> Dict[str, object]:
+    """
+    Runs every direction in a fresh process and measures import time.
+
+    Returns:
+        Dict[str, object]: Environment details, import time and per-direction results.
+    """
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        package_version = version("SALIDtranslit")
+    except PackageNotFoundError:
+        package_version = "unknown"
+
+    import_times = measure_import(import_runs)
+    results: Dict[str, object] = {
+        "package_version": package_version,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "use_model": use_model,
+        "limit": limit,
+        "import_s": sorted(import_times)[len(import_times) // 2],
+        "directions": {},
+    }
+    context = multiprocessing.get_context("spawn")
+    for source, target in directions:
+        with context.Pool(1) as pool:
+            measurement = pool.apply(run_direction, (source, target, corpus_path, limit, use_model))
+        results["directions"][f"{source}->{target}"] = measurement
+    return results
+
+def compare(current: Dict[str, object], previous: Dict[str, object]) -> Dict[str, Dict[str, float]]:
+    """
+    Divides every per-direction metric by its value in an earlier run.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per direction, metric ratios current / previous.
+    """
+    ratios = {"import_s": current["import_s"] / previous["import_s"]}
+    for name, metrics in current["directions"].items():
+        old = previous["directions"].get(name)
+        if old is None:
+            continue
+        ratios[name] = {key: value / old[key] for key, value in metrics.items() if old.get(key)}
+    return ratios
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N corpus rows.")
+    parser.add_argument("--with-model", action="store_true", help="Run the real mT5 corrector.")
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON results to this file.")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against.")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.limit, args.with_model, args.import_runs)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(json.dumps(compare(results, previous), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares `Trie.searchLongestMatch` with `CompiledTrie.searchLongestMatch`.
+
+Every position of the Bengali and Devanagari columns of the evaluation corpus
+is searched with both tries, and the matches are checked to be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from salidtranslit import reference, trie
+
+from ._corpus import default_corpus_path, load_columns
+
+def _time_search(search: Callable[[str], Tuple[Optional[trie.TrieNode], int]], text: str, window: int) -> Tuple[float, List[int]]:
+    lengths = []
+    start = time.perf_counter()
+    for i in range(len(text)):
+        lengths.append(search(text[i:i + window])[1])
+    return time.perf_counter() - start, lengths
+
+def run(corpus_path: str = default_corpus_path) -> Dict[str, Dict[str, float]]:
+    """
+    Times both trie implementations over the corpus.
+
+    Args:
+        corpus_path (str): Evaluation corpus CSV.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per script, the seconds taken by each trie and the speedup.
+    """
+    columns = load_columns(corpus_path)
+    mappings = reference.load_mappings()
+    cases = {
+        "bengali": (mappings["bengali"], "\n".join(columns["bengali"])),
+        "devanagari": (mappings["devanagari"], "\n".join(columns["correct_trans"])),
+    }
+    results = {}
+    for script, (mappings, text) in cases.items():
+        source = trie.Trie()
+        for term, mapping in mappings.items():
+            source.insert(term, mapping)
+        compiled = trie.CompiledTrie(source)
+        # Windows are bounded so both sides measure the search, not the slicing.
+        window = max(map(len, mappings)) + 1
+        dict_seconds, dict_lengths = _time_search(source.searchLongestMatch, text, window)
+        compiled_seconds, compiled_lengths = _time_search(compiled.searchLongestMatch, text, window)
+        if dict_lengths != compiled_lengths:
+            raise AssertionError(f"{script}: compiled trie disagrees with Trie")
+        results[script] = {
+            "chars": len(text),
+            "trie_s": dict_seconds,
+            "compiled_s": compiled_seconds,
+            "speedup": dict_seconds / compiled_seconds,
+        }
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    args = parser.parse_args()
+    print(json.dumps(run(args.corpus), indent=2))
+
+if __name__ == "__main__":
+    main()
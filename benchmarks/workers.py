@@ -0,0 +1,71 @@
+"""
+Reports lines/sec of `transliterate_corpus` from 1 to N worker processes.
+
+Every line of the evaluation corpus is transliterated in each direction, with
+Bengali to Devanagari in trie-only mode unless --with-model is given. Outputs
+are checked to be identical to the single-process run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+import salidtranslit
+from salidtranslit.corpus import transliterate_corpus
+
+from ._corpus import default_corpus_path, load_columns
+
+_directions = [
+    ("bengali", "devanagari", "bengali"),
+    ("bengali", "iast", "bengali"),
+    ("devanagari", "bengali", "correct_trans"),
+    ("devanagari", "itrans", "correct_trans"),
+]
+
+def run(max_workers: int, repeat: int = 4, corpus_path: str = default_corpus_path) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Times `transliterate_corpus` for 1..max_workers workers.
+
+    Args:
+        max_workers (int): Largest pool size to measure.
+        repeat (int): How many copies of the corpus to transliterate per run.
+        corpus_path (str): Evaluation corpus CSV.
+
+    Returns:
+        Dict[str, List[Dict[str, float]]]: Per direction, one record per worker count.
+    """
+    columns = load_columns(corpus_path)
+    results: Dict[str, List[Dict[str, float]]] = {}
+    for source, target, column in _directions:
+        lines = [cell.replace("\n", " ") + "\n" for cell in columns[column]] * repeat
+        records = []
+        baseline = None
+        for workers in range(1, max_workers + 1):
+            start = time.perf_counter()
+            outputs = list(transliterate_corpus(source, target, lines, workers))
+            seconds = time.perf_counter() - start
+            if baseline is None:
+                baseline = outputs
+            elif outputs != baseline:
+                raise AssertionError(f"{source}->{target}: {workers} workers changed the output")
+            records.append({"workers": workers, "lines_per_s": len(lines) / seconds, "seconds": seconds})
+        for record in records:
+            record["scaling"] = record["lines_per_s"] / records[0]["lines_per_s"]
+        results[f"{source}->{target}"] = records
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=default_corpus_path)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=4)
+    parser.add_argument("--with-model", action="store_true", help="Run the mT5 corrector for Bengali to Devanagari.")
+    args = parser.parse_args()
+    salidtranslit.set_trie_only(not args.with_model)
+    print(json.dumps(run(args.max_workers, args.repeat, args.corpus), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,20 @@
-from .transliterate import transliterate
+from .transliterate import transliterate, transliterate_batch, Transliterator
+from .model import preload_model, unload_model, set_trie_only, set_decoding, set_backend
+from .stream import transliterate_stream, transliterate_file, transliterate_buffer
+from .corpus import transliterate_corpus
+from .cache import WordCache, set_word_cache
+from .lexicon import Lexicon, set_lexicon
+from .result_cache import ResultCache, set_result_cache
+from .store import PrecomputedStore, set_precomputed_store
+from .segment import set_max_segment_chars
+from .pool import CorrectorPool, set_corrector_pool
 
-__all__ = ["transliterate"]
\ No newline at end of file
+__all__ = ["transliterate", "transliterate_batch", "Transliterator", "transliterate_stream", "transliterate_file", "transliterate_buffer", "transliterate_corpus", "preload_model", "unload_model", "set_trie_only", "set_decoding", "set_backend", "WordCache", "set_word_cache", "Lexicon", "set_lexicon", "ResultCache", "set_result_cache", "PrecomputedStore", "set_precomputed_store", "set_max_segment_chars", "CorrectorPool", "set_corrector_pool", "AsyncTransliterator"]
+
+def __getattr__(name: str):
+    # AsyncTransliterator needs asyncio, which costs more to import than the
+    # rest of the package, so it is only imported on first access.
+    if name == "AsyncTransliterator":
+        from .service import AsyncTransliterator
+        return AsyncTransliterator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
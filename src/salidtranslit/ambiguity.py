@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Contexts in which ब in a partial transliteration is ब in the corrected text.
+# The rules were derived on the training split of data/evaluation_set.csv (see
+# `lexicon.is_held_out`): each context is seen at least 10 times there and
+# resolves to ब in over 99% of aligned occurrences. On the held-out split every
+# ब they cover resolves to ब; `python -m benchmarks.prefilter` reports both.
+
+# बु, बो, बइ, बट, बड, बड़, बय़ (ड़ and य़ are single code points in the trie output)
+_certain_before = {"ु", "ो", "इ", "ट", "ड", "ड़", "य़"}
+# Word-initial बल, बछ, बद (mostly native Bengali words)
+_certain_initial_before = {"ल", "छ", "द"}
+# म्ब
+_certain_cluster_after = {"म"}
+
+_dev_letter = re.compile("[\\u0900-\\u0963\\u0966-\\u097F]")
+# Devanagari words: runs of letters and joiners. The danda and double danda are
+# punctuation, so they are excluded. Shared with the word alignment in cache.
+_dev_word = re.compile("[\u0900-\u0963\u0966-\u097F\u200C\u200D]+")
+
+def is_uncertain(partial_trans: str, index: int) -> bool:
+    """
+    Returns whether the ब at `index` could be व and needs the model.
+
+    Args:
+        partial_trans (str): A partial transliteration in Devanagari script.
+        index (int): Position of a ब in `partial_trans`.
+
+    Returns:
+        bool: False if the context shows the ब is correct as is.
+    """
+    following = partial_trans[index + 1:index + 2]
+    if following in _certain_before:
+        return False
+    if index >= 2 and partial_trans[index - 1] == "्" and partial_trans[index - 2] in _certain_cluster_after:
+        return False
+    if following in _certain_initial_before and (index == 0 or not _dev_letter.match(partial_trans[index - 1])):
+        return False
+    return True
+
+def uncertain_positions(partial_trans: str, start: int = 0, end: Optional[int] = None) -> List[int]:
+    """
+    Lists the positions of ब that need the model.
+
+    Args:
+        partial_trans (str): A partial transliteration in Devanagari script.
+        start (int): Start of the span to check.
+        end (Optional[int]): End of the span to check. Defaults to the end of the string.
+
+    Returns:
+        List[int]: Positions of uncertain ब in partial_trans[start:end].
+    """
+    end = len(partial_trans) if end is None else end
+    positions = []
+    index = partial_trans.find("ब", start, end)
+    while index >= 0:
+        if is_uncertain(partial_trans, index):
+            positions.append(index)
+        index = partial_trans.find("ब", index + 1, end)
+    return positions
+
+def has_uncertain(partial_trans: str, start: int = 0, end: Optional[int] = None) -> bool:
+    """
+    Returns whether any ब in partial_trans[start:end] needs the model.
+    """
+    end = len(partial_trans) if end is None else end
+    index = partial_trans.find("ब", start, end)
+    while index >= 0:
+        if is_uncertain(partial_trans, index):
+            return True
+        index = partial_trans.find("ब", index + 1, end)
+    return False
+
+def uncertain_words(partial_trans: str) -> List[Tuple[int, int, List[int]]]:
+    """
+    Groups the uncertain ब positions of a partial transliteration by word.
+
+    Args:
+        partial_trans (str): A partial transliteration in Devanagari script.
+
+    Returns:
+        List[Tuple[int, int, List[int]]]: (start, end, positions) for every word
+        with at least one uncertain ब.
+    """
+    words = []
+    for match in _dev_word.finditer(partial_trans):
+        positions = uncertain_positions(partial_trans, match.start(), match.end())
+        if positions:
+            words.append((match.start(), match.end(), positions))
+    return words
+
+class PrefilterStats:
+    """
+    Counts how often the pre-filter takes a sentence off the model path.
+
+    Attributes:
+        ambiguous (int): Sentences whose partial transliteration contains ब.
+        skipped (int): Of those, sentences in which no ब was uncertain.
+    """
+    def __init__(self) -> None:
+        self.ambiguous: int = 0
+        self.skipped: int = 0
+
+    def record(self, uncertain: bool) -> None:
+        self.ambiguous += 1
+        if not uncertain:
+            self.skipped += 1
+
+    def reset(self) -> None:
+        self.ambiguous = self.skipped = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Returns the counters and the fraction of ambiguous sentences skipped.
+        """
+        return {
+            "ambiguous": self.ambiguous,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.ambiguous if self.ambiguous else 0.0,
+        }
+
+prefilter_stats: PrefilterStats = PrefilterStats()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, Tuple
+
+if TYPE_CHECKING:
+    from transformers import MT5Tokenizer
+
+# A corrector backend loads a checkpoint directory and returns a model and its
+# tokenizer. The model must provide `generate` and `device` like a transformers
+# seq2seq model; constrained decoding also needs `get_encoder` and a forward
+# pass that accepts `encoder_outputs` and `labels`.
+BackendLoader = Callable[[str], Tuple[Any, "MT5Tokenizer"]]
+
+_backends: Dict[str, BackendLoader] = {}
+
+def register_backend(name: str, loader: BackendLoader) -> None:
+    """
+    Registers a corrector backend under `name`.
+
+    Args:
+        name (str): Name used to select the backend.
+        loader (BackendLoader): Function from a checkpoint directory to (model, tokenizer).
+    """
+    _backends[name] = loader
+
+def available_backends() -> Tuple[str, ...]:
+    """
+    Returns the names of the registered backends.
+    """
+    return tuple(_backends)
+
+def load_backend(name: str, model_path: str) -> Tuple[Any, MT5Tokenizer]:
+    """
+    Loads a checkpoint with the named backend.
+
+    Raises:
+        ValueError: If no backend is registered under `name`.
+    """
+    if name not in _backends:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {available_backends()}")
+    return _backends[name](model_path)
+
+def _device() -> str:
+    """
+    Returns the device inference should run on.
+    """
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def _load_torch(model_path: str) -> Tuple[Any, MT5Tokenizer]:
+    """
+    Full-precision PyTorch eager model, on GPU when one is available.
+    """
+    from transformers import MT5ForConditionalGeneration, MT5Tokenizer
+
+    model = MT5ForConditionalGeneration.from_pretrained(model_path)
+    tokenizer = MT5Tokenizer.from_pretrained(model_path)
+    model.to(_device())
+    model.eval()
+    return model, tokenizer
+
+def _load_int8(model_path: str) -> Tuple[Any, MT5Tokenizer]:
+    """
+    PyTorch model with its Linear layers dynamically quantized to int8, on CPU.
+    """
+    import torch
+    from transformers import MT5ForConditionalGeneration, MT5Tokenizer
+
+    model = MT5ForConditionalGeneration.from_pretrained(model_path)
+    tokenizer = MT5Tokenizer.from_pretrained(model_path)
+    model.eval()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, tokenizer
+
+def user_cache_dir(name: str) -> str:
+    """
+    Returns the directory `salidtranslit/<name>` in the user cache directory
+    ($XDG_CACHE_HOME, or ~/.cache). The directory is not created.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "salidtranslit", name)
+
+def onnx_export_path(model_path: str) -> str:
+    """
+    Returns the directory the ONNX export of a checkpoint is kept in.
+
+    Exports go under SALIDTRANSLIT_ONNX_DIR if set, and otherwise under
+    `salidtranslit/onnx` in the user cache directory ($XDG_CACHE_HOME, or
+    ~/.cache), never next to the checkpoint, which may be read-only inside
+    site-packages. Each checkpoint gets its own subdirectory, named after
+    its path and the names, sizes and modification times of its files.
+
+    Args:
+        model_path (str): Directory containing the checkpoint.
+    """
+    import hashlib
+
+    root = os.environ.get("SALIDTRANSLIT_ONNX_DIR") or user_cache_dir("onnx")
+    model_path = os.path.realpath(model_path)
+    digest = hashlib.sha256(model_path.encode())
+    for name in sorted(os.listdir(model_path)):
+        stat = os.stat(os.path.join(model_path, name))
+        digest.update(f"\0{name}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return os.path.join(root, digest.hexdigest()[:16])
+
+def _load_onnx(model_path: str) -> Tuple[Any, MT5Tokenizer]:
+    """
+    ONNX Runtime model exported with optimum, reusing the decoder KV cache.
+
+    The export is written to `onnx_export_path(model_path)` on first use and
+    reused after; an export already in `<model_path>/onnx` is used as is.
+    Requires the optional `optimum[onnxruntime]` dependency.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import MT5Tokenizer
+
+    onnx_path = os.path.join(model_path, "onnx")
+    if not os.path.isdir(onnx_path):
+        onnx_path = onnx_export_path(model_path)
+    if os.path.isdir(onnx_path):
+        model = ORTModelForSeq2SeqLM.from_pretrained(onnx_path, use_cache=True)
+    else:
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, use_cache=True)
+        model.save_pretrained(onnx_path)
+    tokenizer = MT5Tokenizer.from_pretrained(model_path)
+    return model, tokenizer
+
+register_backend("torch", _load_torch)
+register_backend("int8", _load_int8)
+register_backend("onnx", _load_onnx)
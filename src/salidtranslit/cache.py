@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+from .ambiguity import _dev_word, has_uncertain
+
+# Words are runs of script letters, as `_dev_word` is for Devanagari.
+_ben_word = re.compile("[\u0980-\u09FF\u200C\u200D]+")
+
+def align_words(bengali: str, devanagari: str) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    Pairs each Bengali word with the span of its transliteration.
+
+    Args:
+        bengali (str): Input string in Bengali script.
+        devanagari (str): Its transliteration in Devanagari script.
+
+    Returns:
+        Optional[List[Tuple[str, int, int]]]: (Bengali word, start, end) for every
+        word, where start and end index into `devanagari`, or None if the two
+        strings do not split into the same number of words.
+    """
+    ben_words = _ben_word.findall(bengali)
+    dev_spans = [m.span() for m in _dev_word.finditer(devanagari)]
+    if len(ben_words) != len(dev_spans):
+        return None
+    return [(word, start, end) for word, (start, end) in zip(ben_words, dev_spans)]
+
+def is_bva_variant(partial: str, corrected: str) -> bool:
+    """
+    Returns whether `corrected` differs from `partial` only by ब→व substitutions.
+    """
+    if len(partial) != len(corrected):
+        return False
+    return all(p == c or (p == "ब" and c == "व") for p, c in zip(partial, corrected))
+
+class WordSource(Protocol):
+    """
+    Anything that maps a Bengali word to its resolved Devanagari spelling.
+    """
+    def get(self, word: str) -> Optional[str]: ...
+
+def resolve_words(bengali: str, partial_trans: str, sources: Sequence[WordSource]) -> Optional[str]:
+    """
+    Resolves every ambiguous word of a sentence from word-level sources.
+
+    Each word with an uncertain ब is looked up in `sources` in order, and the
+    first spelling found replaces the word in the partial transliteration.
+
+    Args:
+        bengali (str): Input sentence in Bengali script.
+        partial_trans (str): Its partial transliteration.
+        sources (Sequence[WordSource]): Word lookups to consult, in order.
+
+    Returns:
+        Optional[str]: The resolved transliteration, or None if any ambiguous
+        word is unresolved and the model is still needed.
+    """
+    words = align_words(bengali, partial_trans)
+    if words is None:
+        return None
+
+    pieces: List[str] = []
+    last = 0
+    for word, start, end in words:
+        if not has_uncertain(partial_trans, start, end):
+            continue
+        for source in sources:
+            resolved = source.get(word)
+            if resolved is not None:
+                break
+        else:
+            return None
+        pieces.append(partial_trans[last:start])
+        pieces.append(resolved)
+        last = end
+    pieces.append(partial_trans[last:])
+    return "".join(pieces)
+
+class WordCache:
+    """
+    A bounded LRU cache of ba/va resolutions for ambiguous Bengali words.
+
+    The cache learns from every sentence the model corrects. Later sentences whose
+    ambiguous words are all cached are resolved without calling the model.
+
+    Attributes:
+        maxsize (int): Maximum number of words kept. 0 disables the cache.
+        path (Optional[str]): JSON file the cache is loaded from and saved to.
+        hits (int): Ambiguous word lookups answered by the cache.
+        misses (int): Ambiguous word lookups not in the cache.
+        evictions (int): Words dropped to stay within `maxsize`.
+    """
+    def __init__(self, maxsize: int = 100_000, path: Optional[str] = None) -> None:
+        self.maxsize: int = maxsize
+        self.path: Optional[str] = path
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, word: str) -> Optional[str]:
+        """
+        Looks up the resolved Devanagari spelling of a Bengali word.
+
+        Args:
+            word (str): A Bengali word.
+
+        Returns:
+            Optional[str]: The cached spelling, or None on a miss.
+        """
+        with self._lock:
+            resolved = self._entries.get(word)
+            if resolved is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(word)
+            self.hits += 1
+            return resolved
+
+    def put(self, word: str, resolved: str) -> None:
+        """
+        Records the resolved Devanagari spelling of a Bengali word.
+
+        Args:
+            word (str): A Bengali word.
+            resolved (str): Its ba/va-resolved Devanagari spelling.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[word] = resolved
+            self._entries.move_to_end(word)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def resolve(self, bengali: str, partial_trans: str) -> Optional[str]:
+        """
+        Resolves every ambiguous word of a sentence from the cache.
+
+        Args:
+            bengali (str): Input sentence in Bengali script.
+            partial_trans (str): Its partial transliteration.
+
+        Returns:
+            Optional[str]: The resolved transliteration, or None if any ambiguous
+            word is not cached and the model is still needed.
+        """
+        if self.maxsize <= 0:
+            return None
+        return resolve_words(bengali, partial_trans, (self,))
+
+    def learn(self, bengali: str, partial_trans: str, corrected_trans: str) -> None:
+        """
+        Stores the word-level resolutions from a sentence the model corrected.
+
+        Words are only stored if the correction changed nothing but ब→व.
+
+        Args:
+            bengali (str): Input sentence in Bengali script.
+            partial_trans (str): Its partial transliteration.
+            corrected_trans (str): The model-corrected transliteration.
+        """
+        if self.maxsize <= 0:
+            return
+        partial_words = align_words(bengali, partial_trans)
+        corrected_words = align_words(bengali, corrected_trans)
+        if partial_words is None or corrected_words is None:
+            return
+        for (word, p_start, p_end), (_, c_start, c_end) in zip(partial_words, corrected_words):
+            partial, corrected = partial_trans[p_start:p_end], corrected_trans[c_start:c_end]
+            if "ब" in partial and is_bva_variant(partial, corrected):
+                self.put(word, corrected)
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache statistics.
+
+        Returns:
+            Dict[str, float]: size, maxsize, hits, misses, evictions and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Writes the cache to a JSON file, oldest entry first.
+
+        Args:
+            path (Optional[str]): Destination file. Defaults to `self.path`.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save the word cache to")
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None) -> None:
+        """
+        Adds the entries of a JSON file written by `save`.
+
+        Args:
+            path (Optional[str]): Source file. Defaults to `self.path`.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to load the word cache from")
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        for word, resolved in entries:
+            self.put(word, resolved)
+
+word_cache: WordCache = WordCache(
+    maxsize=int(os.environ.get("SALIDTRANSLIT_WORD_CACHE_SIZE", "100000")),
+    path=os.environ.get("SALIDTRANSLIT_WORD_CACHE_PATH"),
+)
+
+def set_word_cache(cache: WordCache) -> None:
+    """
+    Replaces the word cache used by Bengali to Devanagari transliteration.
+
+    Args:
+        cache (WordCache): The new cache. Use `WordCache(maxsize=0)` to disable caching.
+    """
+    global word_cache
+    word_cache = cache
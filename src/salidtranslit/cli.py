@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import io
+import sys
+from typing import List, Optional
+
+from .corpus import transliterate_corpus
+from .model import set_trie_only
+from .stream import default_chunk_size, transliterate_file
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser for the `salidtranslit` command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="salidtranslit",
+        description="Transliterate text between Bengali, Devanagari, IAST and ITRANS.",
+    )
+    parser.add_argument("source", help="Source script: bengali, devanagari, iast or itrans.")
+    parser.add_argument("target", help="Target script: bengali, devanagari, iast or itrans.")
+    parser.add_argument("-i", "--input", default="-", help="Input file, or - for stdin (default).")
+    parser.add_argument("-o", "--output", default="-", help="Output file, or - for stdout (default).")
+    parser.add_argument("--chunk-size", type=int, default=default_chunk_size, help="Characters read per chunk.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Sentences per mT5 call for Bengali to Devanagari.")
+    parser.add_argument("--trie-only", action="store_true", help="Skip the mT5 corrector.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes. Above 1, input is sharded by line.")
+    parser.add_argument("--shard-size", type=int, default=256, help="Lines per worker task when --workers is above 1.")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `salidtranslit` command.
+
+    Args:
+        argv (Optional[List[str]]): Command-line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.trie_only:
+        set_trie_only(True)
+
+    infile = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if args.input == "-" \
+        else open(args.input, encoding="utf-8", newline="")
+    outfile = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="") if args.output == "-" \
+        else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if args.workers > 1:
+            outputs = transliterate_corpus(args.source, args.target, infile, args.workers, args.shard_size, args.batch_size)
+            outfile.writelines(outputs)
+        else:
+            transliterate_file(args.source, args.target, infile, outfile, args.chunk_size, args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        outfile.flush()
+        if args.input != "-":
+            infile.close()
+        if args.output != "-":
+            outfile.close()
+    return 0
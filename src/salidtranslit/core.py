@@ -6,12 +6,30 @@ from .reference import (
     end_of_term, iast_vows, iast_cons,
     itrans_vows, itrans_cons
 )
-from .model import load_finetuned_mt5, correct_transliteration
-import re
-
-model: MT5ForConditionalGeneration
-tokenizer: MT5Tokenizer
-model, tokenizer = load_finetuned_mt5()
+from . import cache as _cache
+from .fastpath import FastMap, implicit_vowel_pattern
+from .transducer import Composed, Step, Transducer
+from .ambiguity import has_uncertain, prefilter_stats
+from . import instrument as _instrument
+from . import lexicon as _lexicon
+from . import result_cache as _result_cache
+from . import store as _store
+from . import pool as _pool
+from .segment import segment_spans
+from .model import Corrector, get_model, get_backend, get_decoding, is_trie_only, correct_transliteration, correct_transliterations
+from time import perf_counter
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Characters the scanners drop when they are not part of a trie match
+_nuktas = {"\u093c", "\u09bc"}
+_rom_skipped = {"\u200c", "\u093c", "\u09bc"}
+
+# Devanagari to Bengali, IAST and ITRANS only depend on longest matches and, for
+# the romanizations, on whether neighbouring characters are consonants, so they
+# run as whole-text translate and regex passes instead of the scanners below.
+_dev_ben_map = FastMap(dev_trie, 0, _nuktas)
+_dev_rom_maps = (FastMap(dev_trie, 1, _rom_skipped), FastMap(dev_trie, 2, _rom_skipped))
+_dev_inherent_a, _dev_cons_single = implicit_vowel_pattern(dev_cons, end_of_term)
 
 def dev_ben(input_str: str) -> str:
     """
@@ -23,19 +41,9 @@ def dev_ben(input_str: str) -> str:
     Returns:
         str: Transliterated string in Bengali script.
     """
-    output = ""
-    i = 0
-    while i < len(input_str):
-        char = re.sub(r"়|़", "", input_str[i])
-        longest_match, match_len = dev_trie.searchLongestMatch(input_str[i:])
-        outchar = char
-        if longest_match != None:
-            outchar = longest_match.rep[0]
-            i += match_len
-        else:
-            i += 1
-        output += outchar
-    return output
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _dev_ben_map, input_str)
+    return _dev_ben_map(input_str)
 
 def dev_rom(input_str: str, mode: int) -> str:
     """
@@ -48,31 +56,37 @@ def dev_rom(input_str: str, mode: int) -> str:
     Returns:
         str: Transliterated string in Roman script.
     """
-    output = ""
-    i = 0
-    prev, state = "", "s"
-    while i < len(input_str):
-        char = re.sub(r"‌|়|़", "", input_str[i])
-        prev = state
-        if char in dev_cons:
-            state = "c"
-        else:
-            state = "s"
-
-        longest_match, match_len = dev_trie.searchLongestMatch(input_str[i:])
-        outchar = char
-        if longest_match != None:
-            outchar = longest_match.rep[1 + mode]
-            i += match_len
-        else:
-            i += 1
-        if prev == "c" and (state == "c" or char in end_of_term):
-            outchar = "a" + outchar
-        output += outchar
-    if state == "c":
-        output += "a"
+    start = perf_counter() if _instrument.enabled else None
+    rom_map = _dev_rom_maps[mode]
+    if not (rom_map.single_char and _dev_cons_single):
+        output = _dev_rom_scan(input_str, mode)
+    else:
+        # The inserted "a" is not a Devanagari key, so the translation keeps it.
+        output = rom_map(_dev_inherent_a.sub("a", input_str))
+    if start is not None:
+        _instrument.record_time("trie_scan", perf_counter() - start)
     return output
 
+def _dev_rom_rule(state: str, cls: str) -> Step:
+    # An inherent "a" follows a consonant that precedes a consonant or a term boundary.
+    return Step(
+        next="c" if cls == "cons" else "s",
+        before="a" if state == "c" and cls in ("cons", "end") else "",
+        drop=cls == "skip",
+    )
+
+_dev_rom_classes = [("skip", _rom_skipped), ("cons", dev_cons), ("end", end_of_term)]
+_dev_rom_transducers = tuple(
+    Transducer(dev_trie, 1 + mode, _dev_rom_classes, ("s", "c"), _dev_rom_rule, {"c": "a"})
+    for mode in (0, 1)
+)
+
+def _dev_rom_scan(input_str: str, mode: int) -> str:
+    """
+    Transducer form of `dev_rom`, which the fast path must match.
+    """
+    return _dev_rom_transducers[mode](input_str)
+
 def dev_iast(input_str: str) -> str:
     """
     Transliterates Devanagari script to IAST.
@@ -96,25 +110,23 @@ def dev_itrans(input_str: str) -> str:
     """
     return dev_rom(input_str, 1)
 
-def ben_dev(input_str: str) -> str:
+def ben_dev_partial(input_str: str) -> Tuple[str, bool]:
     """
-    Transliterates Bengali script to Devanagari script.
-
-    Applies heuristic disambiguation and optionally uses a fine-tuned mT5 model
-    to correct ambiguous outputs.
+    Runs the trie pass of Bengali to Devanagari transliteration.
 
     Args:
         input_str (str): Input string in Bengali script.
 
     Returns:
-        str: Transliterated string in Devanagari script.
+        Tuple[str, bool]: The partial transliteration and whether it contains an
+        ambiguous ब that the model should resolve.
     """
-    output = ""
+    start = perf_counter() if _instrument.enabled else None
+    output: List[str] = []
     i = 0
     state = "s"
     ambiguous = False
     while i < len(input_str):
-        char = re.sub(r"়|़", "", input_str[i])
         char = input_str[i]
         if char in ben_b_cons:
             state = "bc"
@@ -126,21 +138,245 @@ def ben_dev(input_str: str) -> str:
         else:
             state = "s"
 
-        longest_match, match_len = ben_trie.searchLongestMatch(input_str[i:])
+        longest_match, match_len = ben_trie.searchLongestMatch(input_str, i)
         outchar = char
         if outchar != "व" and longest_match != None:
             outchar = longest_match.rep[0]
             i += match_len
         else:
             i += 1
-        output += outchar
+        output.append(outchar)
         if outchar == "ब":
             ambiguous = True
 
-    if ambiguous:
-        output = correct_transliteration(input_str, output, model, tokenizer)
+    if start is not None:
+        _instrument.record_time("trie_scan", perf_counter() - start)
+    return "".join(output), ambiguous
 
-    return output
+def _resolve_from_words(input_str: str, partial: str, word_cache: _cache.WordCache) -> Optional[str]:
+    """
+    Resolves the ambiguous words of a partial transliteration from the lexicon,
+    the precomputed store, then the word cache. Returns None if the model is
+    still needed.
+    """
+    sources: List[_cache.WordSource] = []
+    if _lexicon.lexicon is not None:
+        sources.append(_lexicon.lexicon)
+    store = _store.get_precomputed_store()
+    if store is not None:
+        sources.append(store)
+    if word_cache.maxsize > 0:
+        sources.append(word_cache)
+    if not sources:
+        return None
+    return _cache.resolve_words(input_str, partial, sources)
+
+def ben_dev_prepare(input_str: str, trie_only: Optional[bool] = None, word_cache: Optional[_cache.WordCache] = None, mode: Optional[str] = None, use_result_cache: bool = True) -> Tuple[str, bool]:
+    """
+    Runs every step of Bengali to Devanagari transliteration that comes before
+    the model: the trie pass, the ambiguity pre-filter, the precomputed store,
+    the lexicon, the word cache and the persistent result cache.
+
+    Args:
+        input_str (str): Input string in Bengali script.
+        trie_only (Optional[bool]): Whether trie-only mode is enabled. Defaults to `is_trie_only()`.
+        word_cache (Optional[WordCache]): Word cache to consult. Defaults to the shared one.
+        mode (Optional[str]): Corrector configuration to look results up under.
+            Defaults to that of the shared model, `_correction_mode()`.
+        use_result_cache (bool): Whether to consult the persistent result cache.
+
+    Returns:
+        Tuple[str, bool]: The transliteration so far and whether it still needs
+        to be corrected by the model.
+    """
+    output, ambiguous = ben_dev_partial(input_str)
+    if not ambiguous or (is_trie_only() if trie_only is None else trie_only):
+        return output, False
+
+    uncertain = has_uncertain(output)
+    prefilter_stats.record(uncertain)
+    if _instrument.enabled:
+        _instrument.count("ambiguous_sentences")
+        _instrument.count("prefilter_skips", not uncertain)
+    if not uncertain:
+        return output, False
+    store = _store.get_precomputed_store()
+    if store is not None:
+        stored = store.sentence(input_str)
+        if stored is not None:
+            _instrument.count("precomputed_hits")
+            return stored, False
+    if word_cache is None:
+        word_cache = _cache.word_cache
+    if _instrument.enabled:
+        resolved = _instrument.call("word_resolution", _resolve_from_words, input_str, output, word_cache)
+    else:
+        resolved = _resolve_from_words(input_str, output, word_cache)
+    if resolved is not None:
+        _instrument.count("word_resolved")
+        return resolved, False
+    results = _result_cache.get_result_cache()
+    if results is not None and use_result_cache:
+        cached = results.get("bengali", "devanagari", mode or _correction_mode(), input_str)
+        if cached is not None:
+            return cached, False
+    return output, True
+
+def _correction_mode() -> str:
+    """
+    Names the corrector configuration results are cached under.
+    """
+    return f"{get_decoding()}:{get_backend()}"
+
+def record_corrections(inputs: Sequence[str], partials: Sequence[str], corrected: Sequence[str], word_cache: Optional[_cache.WordCache] = None, mode: Optional[str] = None, use_result_cache: bool = True) -> None:
+    """
+    Stores model corrections in the word cache and the persistent result cache.
+
+    Args:
+        inputs (Sequence[str]): Input strings in Bengali script.
+        partials (Sequence[str]): Their partial transliterations.
+        corrected (Sequence[str]): The model's corrections of the partial transliterations.
+        word_cache (Optional[WordCache]): Word cache to teach. Defaults to the shared one.
+        mode (Optional[str]): Corrector configuration to store results under.
+            Defaults to that of the shared model, `_correction_mode()`.
+        use_result_cache (bool): Whether to store them in the persistent result cache.
+    """
+    if word_cache is None:
+        word_cache = _cache.word_cache
+    for input_str, partial, output in zip(inputs, partials, corrected):
+        word_cache.learn(input_str, partial, output)
+    results = _result_cache.get_result_cache()
+    if results is not None and use_result_cache:
+        results.put_many("bengali", "devanagari", mode or _correction_mode(), zip(inputs, corrected))
+
+def ben_dev_segments(input_str: str, trie_only: Optional[bool] = None, word_cache: Optional[_cache.WordCache] = None, mode: Optional[str] = None, use_result_cache: bool = True) -> List[Tuple[str, str, bool]]:
+    """
+    Splits a Bengali string into sentences with `segment_spans` and runs
+    `ben_dev_prepare` on each, so only the ambiguous sentences of a long text
+    reach the model, each in a prompt of bounded length.
+
+    Args:
+        input_str (str): Input string in Bengali script.
+        trie_only (Optional[bool]): Whether trie-only mode is enabled. Defaults to `is_trie_only()`.
+        word_cache (Optional[WordCache]): Word cache to consult. Defaults to the shared one.
+        mode (Optional[str]): Corrector configuration to look results up under.
+        use_result_cache (bool): Whether to consult the persistent result cache.
+
+    Returns:
+        List[Tuple[str, str, bool]]: Every piece of the input in order, sentences
+        and the whitespace between them, as (Bengali piece, transliteration so
+        far, whether it still needs the model). The transliterations joined
+        together are the output.
+    """
+    if trie_only is None:
+        trie_only = is_trie_only()
+    pieces: List[Tuple[str, str, bool]] = []
+    last = 0
+    for start, end in segment_spans(input_str):
+        if start > last:
+            pieces.append((input_str[last:start], input_str[last:start], False))
+        output, needs_model = ben_dev_prepare(input_str[start:end], trie_only, word_cache, mode, use_result_cache)
+        pieces.append((input_str[start:end], output, needs_model))
+        last = end
+    if last < len(input_str):
+        pieces.append((input_str[last:], input_str[last:], False))
+    return pieces
+
+def ben_dev(input_str: str) -> str:
+    """
+    Transliterates Bengali script to Devanagari script.
+
+    Applies heuristic disambiguation and optionally uses a fine-tuned mT5 model
+    to correct ambiguous outputs. The input is split into sentences; sentences
+    in which every ब is certain from context, whose ambiguous words are all in
+    the lexicon or the word cache, or that are in the persistent result cache
+    are resolved without the model, and the rest are corrected in batches. The
+    model is loaded on first use and skipped entirely in trie-only mode.
+
+    Args:
+        input_str (str): Input string in Bengali script.
+
+    Returns:
+        str: Transliterated string in Devanagari script.
+    """
+    return _correct_pieces([ben_dev_segments(input_str)], 8)[0]
+
+def ben_dev_batch(inputs: Sequence[str], batch_size: int = 8) -> List[str]:
+    """
+    Transliterates many Bengali strings to Devanagari script.
+
+    Every sentence of every input goes through the trie pass, the ambiguity
+    pre-filter, the lexicon, the word cache and the result cache, and only the
+    sentences left unresolved are sent to the model in batches of `batch_size`.
+    The output for each input is the same as `ben_dev` would return for it.
+
+    Args:
+        inputs (Sequence[str]): Input strings in Bengali script.
+        batch_size (int): Maximum number of sentences per model call.
+
+    Returns:
+        List[str]: Transliterated strings in Devanagari script, in input order.
+    """
+    trie_only = is_trie_only()
+    return _correct_pieces([ben_dev_segments(input_str, trie_only) for input_str in inputs], batch_size)
+
+def _correct_pieces(documents: List[List[Tuple[str, str, bool]]], batch_size: int, corrector: Optional[Corrector] = None, word_cache: Optional[_cache.WordCache] = None, mode: Optional[str] = None, use_result_cache: bool = True) -> List[str]:
+    """
+    Corrects the pieces of `ben_dev_segments` results that need the model, with
+    `corrector` if given, the corrector pool if one is set and the shared model
+    otherwise, and joins each document back together. The corrections are
+    recorded under `mode` like `record_corrections`.
+    """
+    outputs = [[output for _, output, _ in pieces] for pieces in documents]
+    pending = [
+        (doc, index) for doc, pieces in enumerate(documents)
+        for index, (_, _, needs_model) in enumerate(pieces) if needs_model
+    ]
+    if pending:
+        bengali = [documents[doc][index][0] for doc, index in pending]
+        partial = [documents[doc][index][1] for doc, index in pending]
+        if corrector is None:
+            corrector = _pool.corrector_pool
+        if corrector is not None:
+            corrected = corrector(bengali, partial)
+        else:
+            model, tokenizer = get_model()
+            if len(pending) == 1:
+                corrected = [correct_transliteration(bengali[0], partial[0], model, tokenizer)]
+            else:
+                corrected = correct_transliterations(bengali, partial, model, tokenizer, batch_size)
+        record_corrections(bengali, partial, corrected, word_cache, mode, use_result_cache)
+        for (doc, index), output in zip(pending, corrected):
+            outputs[doc][index] = output
+    return ["".join(pieces) for pieces in outputs]
+
+def _ben_rom_rule(state: str, cls: str) -> Step:
+    # ব after a consonant and hasanta (state "v") is the va-phala, romanized as "v".
+    if state == "v" and cls == "ba":
+        return Step(next="c", literal="v")
+    if cls == "bcons":
+        next = "bc"
+    elif cls in ("ba", "cons"):
+        next = "c"
+    elif cls == "virama" and state == "bc":
+        next = "v"
+    else:
+        next = "s"
+    cons_states = ("c", "bc")
+    return Step(
+        next=next,
+        before="a" if state in cons_states and (next in cons_states or cls == "end") else "",
+        drop=cls == "skip",
+    )
+
+_ben_rom_classes = [
+    ("skip", _rom_skipped), ("bcons", ben_b_cons), ("ba", {"ব"}),
+    ("cons", ben_cons), ("virama", {"্"}), ("end", end_of_term),
+]
+_ben_rom_transducers = tuple(
+    Transducer(ben_trie, 1 + mode, _ben_rom_classes, ("s", "c", "bc", "v"), _ben_rom_rule, {"c": "a", "bc": "a"})
+    for mode in (0, 1)
+)
 
 def ben_rom(input_str: str, mode: int) -> str:
     """
@@ -153,43 +389,9 @@ def ben_rom(input_str: str, mode: int) -> str:
     Returns:
         str: Transliterated string in Roman script.
     """
-    output = ""
-    i = 0
-    prev, state = "", "s"
-    while i < len(input_str):
-        char = re.sub(r"‌|়|़", "", input_str[i])
-        prev = state
-        if state != "v" and char in ben_b_cons:
-            state = "bc"
-        elif state != "v" and char in ben_cons:
-            state = "c"
-        elif state == "bc" and char == "্":
-            state = "v"
-        elif state == "v":
-            if char == "ব":
-                char = "v"
-            if char in ben_b_cons:
-                state = "bc"
-            elif char == "v" or char in ben_cons:
-                state = "c"
-            else:
-                state = "s"
-        else:
-            state = "s"
-
-        longest_match, match_len = ben_trie.searchLongestMatch(input_str[i:])
-        outchar = char
-        if outchar != "v" and longest_match != None:
-            outchar = longest_match.rep[1 + mode]
-            i += match_len
-        else:
-            i += 1            
-        if prev in ("c", "bc") and (state in ("c", "bc") or char in end_of_term):
-            outchar = "a" + outchar
-        output += outchar
-    if state in ("c", "bc"):
-        output += "a"
-    return output
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _ben_rom_transducers[mode], input_str)
+    return _ben_rom_transducers[mode](input_str)
 
 def ben_iast(input_str: str) -> str:
     """
@@ -215,6 +417,42 @@ def ben_itrans(input_str: str) -> str:
     """
     return ben_rom(input_str, 1)
 
+_viramas = ("्", "্")
+
+def _rom_ind_rule(mode: int) -> Callable[[str, str], Step]:
+    """
+    Rule shared by IAST and ITRANS to Devanagari (mode 0) or Bengali (mode 1).
+    Vowels take their independent form at the start of a syllable and their sign
+    after a consonant, and consecutive consonants are joined with a virama.
+    """
+    def rule(state: str, cls: str) -> Step:
+        if cls == "vowel":
+            next = "vow" if state == "s" else "vs"
+        elif cls == "cons":
+            next = "c"
+        else:
+            next = "s"
+        conjunct = state == "c" and next == "c"
+        return Step(
+            next=next,
+            joiner=_viramas[mode] if conjunct else "",
+            part=0 if conjunct or next == "vow" else -1,
+        )
+    return rule
+
+_rom_ind_states = ("s", "vow", "vs", "c")
+# IAST characters are classified by their own code point only, as in the
+# original scanner, so a two-code-point key such as "m̐" or "l̤" is classified
+# by its first letter. ITRANS also classifies two-character keys (e.g. "R^", "~n").
+_iast_transducers = tuple(
+    Transducer(iast_trie, mode, [("vowel", iast_vows), ("cons", iast_cons)], _rom_ind_states, _rom_ind_rule(mode), {"c": _viramas[mode]})
+    for mode in (0, 1)
+)
+_itrans_transducers = tuple(
+    Transducer(itrans_trie, mode, [("vowel", itrans_vows), ("cons", itrans_cons)], _rom_ind_states, _rom_ind_rule(mode), {"c": _viramas[mode]}, pairs=True)
+    for mode in (0, 1)
+)
+
 def iast_ind(input_str: str, mode: int) -> str:
     """
     Helper function to transliterate IAST to Indian scripts (Devanagari or Bengali).
@@ -226,40 +464,9 @@ def iast_ind(input_str: str, mode: int) -> str:
     Returns:
         str: Transliterated string in target script.
     """
-    output = ""
-    i = 0
-    prev, state = "", "s"
-    while i < len(input_str):
-        prev = state
-        if input_str[i] in iast_vows:
-            if state == "s":
-                state = "vow"
-            else:
-                state = "vs"
-        elif input_str[i] in iast_cons:
-            state = "c"
-        else:
-            state = "s"
-
-        longest_match, match_len = iast_trie.searchLongestMatch(input_str[i:])
-        if longest_match != None:
-            if prev == "c" and state == "c":
-                if mode == 0:
-                    output += "्" + longest_match.rep[mode][0]
-                else:
-                    output += "্" + longest_match.rep[mode][0]
-            else:
-                output += longest_match.rep[mode][0] if state == "vow" else longest_match.rep[mode][-1]
-            i += match_len
-        else:
-            output += input_str[i]
-            i += 1
-    if state == "c":
-        if mode == 0:
-            output += "्"
-        else:
-            output += "্"
-    return output
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _iast_transducers[mode], input_str)
+    return _iast_transducers[mode](input_str)
 
 def iast_dev(input_str: str) -> str:
     """
@@ -296,41 +503,9 @@ def itrans_ind(input_str: str, mode: int) -> str:
     Returns:
         str: Transliterated string in target script.
     """
-    output = ""
-    i = 0
-    prev, state = "", "s"
-    while i < len(input_str):
-        prev = state
-        if input_str[i] in itrans_vows or input_str[i:i+2] in itrans_vows:
-            if state == "s":
-                state = "vow"
-            else:
-                state = "vs"
-        elif input_str[i] in itrans_cons or input_str[i:i+2] in itrans_cons:
-            state = "c"
-        else:
-            state = "s"
-
-        longest_match, match_len = itrans_trie.searchLongestMatch(input_str[i:])
-        if longest_match != None:
-            if prev == "c" and state == "c":
-                if mode == 0:
-                    output += "्" + longest_match.rep[mode][0]
-                else:
-                    output += "্" + longest_match.rep[mode][0]
-            else:
-                output += longest_match.rep[mode][0] if state == "vow" else longest_match.rep[mode][-1]
-            i += match_len
-        else:
-            output += input_str[i]
-            i += 1
-
-    if state == "c":
-        if mode == 0:
-            output += "्"
-        else:
-            output += "্"
-    return output
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _itrans_transducers[mode], input_str)
+    return _itrans_transducers[mode](input_str)
 
 def itrans_dev(input_str: str) -> str:
     """
@@ -354,4 +529,42 @@ def itrans_ben(input_str: str) -> str:
     Returns:
         str: Transliterated string in Bengali script.
     """
-    return itrans_ind(input_str, 1)
\ No newline at end of file
+    return itrans_ind(input_str, 1)
+
+# Roman to roman goes through Devanagari in a single composed pass.
+_iast_itrans = Composed(_iast_transducers[0], _dev_rom_transducers[1])
+_itrans_iast = Composed(_itrans_transducers[0], _dev_rom_transducers[0])
+
+def iast_itrans(input_str: str) -> str:
+    """
+    Transliterates IAST to ITRANS.
+
+    The output is the same as `dev_itrans(iast_dev(input_str))`, computed in one
+    pass without the intermediate Devanagari string.
+
+    Args:
+        input_str (str): Input string in IAST.
+
+    Returns:
+        str: Transliterated string in ITRANS.
+    """
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _iast_itrans, input_str)
+    return _iast_itrans(input_str)
+
+def itrans_iast(input_str: str) -> str:
+    """
+    Transliterates ITRANS to IAST.
+
+    The output is the same as `dev_iast(itrans_dev(input_str))`, computed in one
+    pass without the intermediate Devanagari string.
+
+    Args:
+        input_str (str): Input string in ITRANS.
+
+    Returns:
+        str: Transliterated string in IAST.
+    """
+    if _instrument.enabled:
+        return _instrument.call("trie_scan", _itrans_iast, input_str)
+    return _itrans_iast(input_str)
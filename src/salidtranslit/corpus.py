@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import gc
+import sys
+import threading
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Deque, Iterable, Iterator, List, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from multiprocessing.context import BaseContext
+    from multiprocessing.pool import AsyncResult
+
+from . import model
+from .backends import available_backends
+from .core import ben_dev
+from .transliterate import _resolve, transliterate_batch
+
+T = TypeVar("T")
+
+# Serializes pool creation, so concurrent calls do not unfreeze the collector
+# while another is forking.
+_pool_start_lock = threading.Lock()
+
+def _init_worker(trie_only: bool, backend: str, decoding: str, load_model: bool) -> None:
+    """
+    Configures a worker process like the parent and, with `load_model`, loads
+    the model before the worker takes its first task. Workers that are not
+    forked start from a fresh import, so the parent's settings are passed in.
+    """
+    model.set_trie_only(trie_only)
+    if backend in available_backends():
+        # A backend registered at run time in the parent is only known to forked workers.
+        model.set_backend(backend)
+    model.set_decoding(decoding)
+    if load_model and not trie_only:
+        model.get_model()
+    if "torch" in sys.modules:
+        # One intra-op thread per process so N workers do not oversubscribe the cores.
+        sys.modules["torch"].set_num_threads(1)
+
+def _transliterate_lines(source: str, target: str, lines: List[str], batch_size: int) -> List[str]:
+    """
+    Transliterates one shard of lines, keeping each line's terminator.
+    """
+    bodies, endings = [], []
+    for line in lines:
+        body = line.rstrip("\r\n")
+        bodies.append(body)
+        endings.append(line[len(body):])
+    outputs = transliterate_batch(source, target, bodies, batch_size)
+    return [output + ending for output, ending in zip(outputs, endings)]
+
+def _context() -> BaseContext:
+    """
+    Returns the multiprocessing context worker pools are started with.
+
+    Fork is used while torch is not imported, so workers inherit the tries
+    without rebuilding them. Forking a process whose torch thread pools may
+    already be running can deadlock the children, so once torch is imported
+    workers are started from a clean server process (forkserver), or spawned
+    where that is not available.
+    """
+    # multiprocessing is only imported here, so single-process use does not pay for it.
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and "torch" not in sys.modules:
+        return multiprocessing.get_context("fork")
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        # The server imports the package once and forks each worker from it.
+        context.set_forkserver_preload([__package__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+def _shards(lines: Iterable[str], shard_size: int) -> Iterator[List[str]]:
+    iterator = iter(lines)
+    while True:
+        shard = list(islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+def transliterate_corpus(source: str, target: str, lines: Iterable[str], workers: int = 1, shard_size: int = 256, batch_size: int = 8, preload: bool = True) -> Iterator[str]:
+    """
+    Transliterates a corpus line by line over a pool of worker processes.
+
+    Lines are grouped into shards of `shard_size` and each shard is transliterated
+    with `transliterate_batch` in a worker. Where the fork start method is
+    available and torch has not been imported, workers are forked and inherit the
+    tries built at import time copy-on-write. Otherwise (under spawn, e.g. on
+    Windows and macOS, or under forkserver once torch is imported) every worker
+    imports the package again and rebuilds its tries, and the model is never
+    shared: each worker that needs it loads its own copy, so memory grows with
+    `workers`. The number of shards in flight is bounded, so memory stays
+    constant on long inputs.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        lines (Iterable[str]): Input lines, with or without line terminators.
+        workers (int): Number of worker processes. 1 runs in the calling process.
+        shard_size (int): Number of lines sent to a worker at a time.
+        batch_size (int): Maximum number of sentences per model call.
+        preload (bool): Load the model in each worker as it starts, for
+            Bengali to Devanagari, rather than on its first ambiguous sentence.
+
+    Yields:
+        str: Transliterated lines, in input order.
+
+    Raises:
+        ValueError: If the source or target script is not supported.
+    """
+    func = _resolve(source, target)
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    return _run(source, target, lines, workers, shard_size, batch_size, preload and func is ben_dev)
+
+def _run(source: str, target: str, lines: Iterable[str], workers: int, shard_size: int, batch_size: int, preload: bool) -> Iterator[str]:
+    shards = _shards(lines, shard_size)
+    if workers == 1:
+        for shard in shards:
+            yield from _transliterate_lines(source, target, shard, batch_size)
+        return
+
+    tasks = ((source, target, shard, batch_size) for shard in shards)
+    for outputs in map_ordered(_transliterate_lines, tasks, workers, preload):
+        yield from outputs
+
+def map_ordered(func: Callable[..., T], tasks: Iterable[Tuple[Any, ...]], workers: int, load_model: bool = False) -> Iterator[T]:
+    """
+    Calls `func` on each argument tuple of `tasks` over a pool of worker
+    processes and yields the results in task order.
+
+    At most 2 * `workers` tasks are in flight, so memory stays constant on long
+    inputs. Workers are forked, and inherit the parent's tries and module state
+    copy-on-write, only while torch is not imported in the parent; otherwise
+    they start from a fresh import (see `_context`). The model is never
+    inherited: with `load_model` each worker loads its own copy as it starts.
+
+    Args:
+        func (Callable[..., T]): A module-level function.
+        tasks (Iterable[Tuple[Any, ...]]): Arguments of each call.
+        workers (int): Number of worker processes.
+        load_model (bool): Load the model in each worker as it starts.
+
+    Yields:
+        T: The result of each call, in order.
+    """
+    context = _context()
+    initargs = (model.is_trie_only(), model.get_backend(), model.get_decoding(), load_model)
+    with _pool_start_lock:
+        # Workers are forked when the pool is created. Freezing everything
+        # built so far moves it out of the collector's reach in the children,
+        # so their garbage collection does not touch, and so copy, the shared
+        # pages. The parent is unfrozen as soon as the workers exist.
+        gc.freeze()
+        try:
+            pool = context.Pool(workers, initializer=_init_worker, initargs=initargs)
+        finally:
+            gc.unfreeze()
+    with pool:
+        pending: Deque[AsyncResult] = deque()
+        for args in tasks:
+            pending.append(pool.apply_async(func, args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
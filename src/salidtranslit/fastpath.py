@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .trie import CompiledTrie
+
+# Keys starting with a nukta are never matched by the trie scanners.
+_nuktas = ("़", "়")
+
+class FastMap:
+    """
+    Longest-match replacement of trie keys without a per-character Python loop.
+
+    Single-character keys are replaced with one `str.translate` call. Keys of
+    two or more characters are found with a regex alternation ordered
+    longest-first, and only the text between their matches is translated.
+    Characters that are neither keys nor in `drop` are kept, so the output is
+    the same as a trie scanner that emits `rep[index]` for every match.
+
+    Attributes:
+        single_char (bool): Whether every key is a single character, i.e. every
+            match consumes exactly one input character.
+    """
+    def __init__(self, source: CompiledTrie, index: int, drop: Iterable[str] = ()) -> None:
+        single: Dict[str, str] = {}
+        multi: Dict[str, str] = {}
+        for key, rep in source.items():
+            if key.startswith(_nuktas):
+                continue
+            (single if len(key) == 1 else multi)[key] = rep[index]
+        table: Dict[str, Optional[str]] = dict(single)
+        for char in drop:
+            table.setdefault(char, None)
+        self._table = str.maketrans(table)
+        self._multi = multi
+        self._pattern: Optional[re.Pattern[str]] = None
+        if multi:
+            keys = sorted(multi, key=len, reverse=True)
+            self._pattern = re.compile("|".join(map(re.escape, keys)))
+        self.single_char: bool = not multi
+
+    def __call__(self, text: str) -> str:
+        if self._pattern is None:
+            return text.translate(self._table)
+        pieces: List[str] = []
+        last = 0
+        for match in self._pattern.finditer(text):
+            pieces.append(text[last:match.start()].translate(self._table))
+            pieces.append(self._multi[match.group()])
+            last = match.end()
+        pieces.append(text[last:].translate(self._table))
+        return "".join(pieces)
+
+def char_class(chars: Iterable[str]) -> str:
+    """
+    Returns a regex character class matching any of `chars`.
+    """
+    return "[" + "".join(re.escape(char) for char in sorted(chars)) + "]"
+
+def implicit_vowel_pattern(consonants: Iterable[str], end_of_term: Iterable[str]) -> Tuple[re.Pattern[str], bool]:
+    """
+    Compiles the positions where romanization inserts an inherent "a": after a
+    consonant that is followed by another consonant, a term boundary or the end
+    of the text.
+
+    Returns:
+        Tuple[re.Pattern[str], bool]: The zero-width pattern, and whether every
+        character of `consonants` is a single code point (required for the
+        lookbehind to be equivalent to the scanner's state).
+    """
+    consonants = list(consonants)
+    follow = char_class(set(consonants) | set(end_of_term))
+    return re.compile(f"(?<={char_class(consonants)})(?={follow}|\\Z)"), all(len(c) == 1 for c in consonants)
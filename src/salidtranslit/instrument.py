@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+# Opt-in instrumentation of the transliteration hot paths.
+#
+# Everything is off by default (set SALIDTRANSLIT_INSTRUMENT to turn it on at
+# import). Instrumented code checks the module-level
+# `enabled` flag before doing any work, so the disabled cost is one global
+# lookup per call.
+#
+# Timers (seconds):
+#   trie_scan         scanner pass of any direction
+#   word_resolution   lexicon, precomputed word and word cache lookups
+#   model.tokenize    prompt tokenization
+#   model.generate    beam search or constrained scoring forward passes
+#   model.postprocess decoding, normalization and the edit-distance check
+# Counters:
+#   ambiguous_sentences  ben_dev outputs containing ब
+#   prefilter_skips      of those, sentences with no uncertain ब
+#   precomputed_hits     sentences found in the precomputed store
+#   word_resolved        sentences resolved by the lexicon, precomputed words or word cache
+#   model_calls          generate / scoring calls
+#   model_sentences      sentences sent to the model
+#   tokens_generated     output tokens produced by generate
+#   fallback_to_partial  model outputs rejected by the edit-distance check
+#   deadline_fallbacks   AsyncTransliterator corrections that missed their timeout
+
+Hook = Callable[[str, float], None]
+T = TypeVar("T")
+
+enabled: bool = os.environ.get("SALIDTRANSLIT_INSTRUMENT", "").lower() in ("1", "true", "yes")
+_hooks: List[Hook] = []
+_counters: Dict[str, float] = {}
+_timers: Dict[str, List[float]] = {}
+_lock = threading.Lock()
+
+def enable() -> None:
+    """
+    Turns instrumentation on.
+    """
+    global enabled
+    enabled = True
+
+def disable() -> None:
+    """
+    Turns instrumentation off. Collected values are kept until `reset`.
+    """
+    global enabled
+    enabled = False
+
+def add_hook(hook: Hook) -> None:
+    """
+    Registers a callback for every recorded value.
+
+    The hook is called as `hook(name, value)` with a timer's duration in seconds
+    or a counter's increment, on the thread that recorded it. Use it to forward
+    values to a metrics system.
+
+    Args:
+        hook (Hook): The callback.
+    """
+    with _lock:
+        _hooks.append(hook)
+
+def remove_hook(hook: Hook) -> None:
+    """
+    Unregisters a callback added with `add_hook`.
+    """
+    with _lock:
+        _hooks.remove(hook)
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Adds `value` to a counter. Does nothing while instrumentation is disabled.
+    """
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+        hooks = list(_hooks)
+    for hook in hooks:
+        hook(name, value)
+
+def record_time(name: str, seconds: float) -> None:
+    """
+    Adds one measurement to a timer. Does nothing while instrumentation is disabled.
+    """
+    if not enabled:
+        return
+    with _lock:
+        timer = _timers.setdefault(name, [0, 0.0])
+        timer[0] += 1
+        timer[1] += seconds
+        hooks = list(_hooks)
+    for hook in hooks:
+        hook(name, seconds)
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block into the timer `name` while instrumentation is enabled.
+    """
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+def call(name: str, func: Callable[..., T], *args: Any) -> T:
+    """
+    Calls `func(*args)` and times it into the timer `name`.
+
+    Instrumented functions only call this after checking `enabled`, and call
+    `func` directly otherwise, so the disabled path has no extra frame.
+    """
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the collected counters and timers.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: {"counters": {name: value}, "timers": {name:
+        {"count": calls, "total_s": seconds}}}.
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timers": {name: {"count": n, "total_s": total} for name, (n, total) in _timers.items()},
+        }
+
+def reset() -> None:
+    """
+    Clears all collected counters and timers.
+    """
+    with _lock:
+        _counters.clear()
+        _timers.clear()
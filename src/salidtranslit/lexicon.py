@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import align_words, is_bva_variant
+
+# Binary layout, all integers little-endian uint32:
+#   magic "SALX", version, n
+#   key offsets (n + 1), value offsets (n + 1), counts (n), totals (n)
+#   key blob, value blob (UTF-8)
+# Keys are sorted by their UTF-8 bytes so lookups can binary search the mapped file.
+_MAGIC = b"SALX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+
+_script_dir = os.path.dirname(__file__)
+default_lexicon_path = f"{_script_dir}/lexicon.bin"
+
+# The rows of a corrected transliteration CSV such as data/evaluation_set.csv
+# are split by the CRC-32 of their Bengali sentence, so a repeated sentence
+# always falls on the same side. Accuracy is measured on the held-out split,
+# about a fifth of the rows; the lexicon is built from the training split.
+splits = ("train", "held_out", "all")
+_held_out_buckets = 5
+
+def is_held_out(bengali: str) -> bool:
+    """
+    Returns whether a corpus row belongs to the held-out split.
+
+    Args:
+        bengali (str): The Bengali sentence of the row.
+    """
+    return zlib.crc32(bengali.encode("utf-8")) % _held_out_buckets == 0
+
+def read_rows(csv_path: str, split: str = "all") -> List[Tuple[str, str, str]]:
+    """
+    Reads the rows of one split of a CSV with `bengali`, `partial_trans` and
+    `correct_trans` columns.
+
+    Args:
+        csv_path (str): Source CSV.
+        split (str): "train", "held_out" or "all".
+
+    Returns:
+        List[Tuple[str, str, str]]: (bengali, partial_trans, correct_trans) triples.
+
+    Raises:
+        ValueError: If the split is unknown.
+    """
+    if split not in splits:
+        raise ValueError(f"Unknown split {split!r}, expected one of {splits}")
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        rows = [(row["bengali"], row["partial_trans"], row["correct_trans"]) for row in csv.DictReader(f)]
+    if split == "all":
+        return rows
+    return [row for row in rows if is_held_out(row[0]) == (split == "held_out")]
+
+def count_resolutions(rows: Iterable[Tuple[str, str, str]]) -> Dict[str, Counter]:
+    """
+    Counts how each ambiguous Bengali word is spelled in corrected transliterations.
+
+    Args:
+        rows (Iterable[Tuple[str, str, str]]): (bengali, partial_trans, correct_trans) triples.
+
+    Returns:
+        Dict[str, Counter]: For each Bengali word, a count of its resolved Devanagari spellings.
+    """
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    for bengali, partial_trans, correct_trans in rows:
+        partial_words = align_words(bengali, partial_trans)
+        correct_words = align_words(bengali, correct_trans)
+        if partial_words is None or correct_words is None:
+            continue
+        for (word, p_start, p_end), (_, c_start, c_end) in zip(partial_words, correct_words):
+            partial, correct = partial_trans[p_start:p_end], correct_trans[c_start:c_end]
+            if "ब" in partial and is_bva_variant(partial, correct):
+                counts[word][correct] += 1
+    return counts
+
+def write_lexicon(counts: Dict[str, Counter], path: str) -> int:
+    """
+    Writes the most frequent spelling of each word to a binary lexicon file.
+
+    Args:
+        counts (Dict[str, Counter]): Output of `count_resolutions`.
+        path (str): Destination file.
+
+    Returns:
+        int: Number of words written.
+    """
+    entries = []
+    for word, spellings in counts.items():
+        resolved, count = spellings.most_common(1)[0]
+        entries.append((word.encode("utf-8"), resolved.encode("utf-8"), count, sum(spellings.values())))
+    entries.sort()
+
+    key_offsets, value_offsets = array("I", [0]), array("I", [0])
+    counts_arr, totals_arr = array("I"), array("I")
+    for key, value, count, total in entries:
+        key_offsets.append(key_offsets[-1] + len(key))
+        value_offsets.append(value_offsets[-1] + len(value))
+        counts_arr.append(count)
+        totals_arr.append(total)
+    if sys.byteorder == "big":
+        for arr in (key_offsets, value_offsets, counts_arr, totals_arr):
+            arr.byteswap()
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(entries)))
+        for arr in (key_offsets, value_offsets, counts_arr, totals_arr):
+            arr.tofile(f)
+        f.write(b"".join(key for key, _, _, _ in entries))
+        f.write(b"".join(value for _, value, _, _ in entries))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+def build_lexicon(csv_path: str, path: str = default_lexicon_path, split: str = "train") -> int:
+    """
+    Builds a lexicon from a CSV with `bengali`, `partial_trans` and `correct_trans` columns.
+
+    Only the training split is used by default, so accuracy measured on the
+    held-out split is not measured on the lexicon's own labels.
+
+    Args:
+        csv_path (str): Source CSV, e.g. data/evaluation_set.csv.
+        path (str): Destination lexicon file.
+        split (str): The rows to count: "train", "held_out" or "all".
+
+    Returns:
+        int: Number of words written.
+    """
+    return write_lexicon(count_resolutions(read_rows(csv_path, split)), path)
+
+class Lexicon:
+    """
+    A read-only, memory-mapped ba/va lexicon of Bengali words.
+
+    Attributes:
+        path (str): The lexicon file.
+        min_count (int): Minimum number of observations for an entry to be used.
+        min_confidence (float): Minimum share of observations the winning spelling needs.
+    """
+    def __init__(self, path: str = default_lexicon_path, min_count: int = 1, min_confidence: float = 0.9) -> None:
+        self.path: str = path
+        self.min_count: int = min_count
+        self.min_confidence: float = min_confidence
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} SALIDtranslit lexicon")
+        self._n: int = n
+
+        tables = []
+        offset = _HEADER.size
+        for length in (n + 1, n + 1, n, n):
+            if sys.byteorder == "big":
+                table = array("I", self._buffer[offset:offset + 4 * length])
+                table.byteswap()
+            else:
+                table = memoryview(self._buffer)[offset:offset + 4 * length].cast("I")
+            tables.append(table)
+            offset += 4 * length
+        self._key_offsets, self._value_offsets, self._counts, self._totals = tables
+        self._keys_start = offset
+        self._values_start = offset + self._key_offsets[n]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _key(self, index: int) -> bytes:
+        start = self._keys_start
+        return self._buffer[start + self._key_offsets[index]:start + self._key_offsets[index + 1]]
+
+    def lookup(self, word: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Finds a Bengali word in the lexicon.
+
+        Args:
+            word (str): A Bengali word.
+
+        Returns:
+            Optional[Tuple[str, int, int]]: The resolved Devanagari spelling, how often
+            it was observed and how often the word was observed in total, or None.
+        """
+        key = word.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._n or self._key(lo) != key:
+            return None
+        start = self._values_start
+        value = self._buffer[start + self._value_offsets[lo]:start + self._value_offsets[lo + 1]]
+        return value.decode("utf-8"), self._counts[lo], self._totals[lo]
+
+    def get(self, word: str) -> Optional[str]:
+        """
+        Returns the resolved spelling of a word if it is confident enough.
+
+        Args:
+            word (str): A Bengali word.
+
+        Returns:
+            Optional[str]: The resolved Devanagari spelling, or None.
+        """
+        entry = self.lookup(word)
+        if entry is None:
+            return None
+        resolved, count, total = entry
+        if count < self.min_count or count < self.min_confidence * total:
+            return None
+        return resolved
+
+def _load_default() -> Optional[Lexicon]:
+    path = os.environ.get("SALIDTRANSLIT_LEXICON", default_lexicon_path)
+    if not path or not os.path.exists(path):
+        return None
+    return Lexicon(path)
+
+lexicon: Optional[Lexicon] = _load_default()
+
+def set_lexicon(new_lexicon: Optional[Lexicon]) -> None:
+    """
+    Replaces the lexicon used by Bengali to Devanagari transliteration.
+
+    Args:
+        new_lexicon (Optional[Lexicon]): The new lexicon, or None to disable lookups.
+    """
+    global lexicon
+    lexicon = new_lexicon
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the ba/va lexicon from a corrected transliteration CSV.")
+    parser.add_argument("csv_path", help="CSV with bengali, partial_trans and correct_trans columns.")
+    parser.add_argument("-o", "--output", default=default_lexicon_path, help="Destination lexicon file.")
+    parser.add_argument("--split", choices=splits, default="train", help="Rows to build from (default: the training split).")
+    args = parser.parse_args()
+    n = build_lexicon(args.csv_path, args.output, args.split)
+    print(f"Wrote {n} words to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,227 @@
 from __future__ import annotations
 
-from transformers import MT5ForConditionalGeneration, MT5Tokenizer
-import torch
 import os
+import threading
 import unicodedata
-from nltk.metrics.distance import edit_distance
-from typing import Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import instrument as _instrument
+from .ambiguity import uncertain_words
+from .backends import available_backends, load_backend
+
+if TYPE_CHECKING:
+    from transformers import MT5ForConditionalGeneration, MT5Tokenizer
 
 _script_dir = os.path.dirname(__file__)
-def load_finetuned_mt5(model_path: str = f"{_script_dir}/mt5_finetuned") -> Tuple[MT5ForConditionalGeneration, MT5Tokenizer]:
+_default_model_path = f"{_script_dir}/mt5_finetuned"
+
+# Lazily loaded model state. torch and transformers are only imported the first
+# time the model is actually needed, so trie-only directions never pay for them.
+_model: Optional[MT5ForConditionalGeneration] = None
+_tokenizer: Optional[MT5Tokenizer] = None
+_model_lock = threading.Lock()
+# Models loaded with a backend other than the selected one, by backend name.
+_backend_models: Dict[str, Tuple[MT5ForConditionalGeneration, MT5Tokenizer]] = {}
+_trie_only: bool = os.environ.get("SALIDTRANSLIT_TRIE_ONLY", "").lower() in ("1", "true", "yes")
+
+def _env_choice(name: str, default: str, choices: Sequence[str]) -> str:
+    """
+    Reads an environment variable that must hold one of `choices`.
+
+    Raises:
+        ValueError: If the variable is set to anything else.
+    """
+    value = os.environ.get(name, default)
+    if value not in choices:
+        raise ValueError(f"{name}={value!r} is not supported, expected one of {tuple(choices)}")
+    return value
+
+decoding_modes = ("beam", "constrained")
+_decoding: str = _env_choice("SALIDTRANSLIT_DECODING", "beam", decoding_modes)
+
+# Backends registered after import can only be selected with `set_backend`.
+_backend: str = _env_choice("SALIDTRANSLIT_BACKEND", "torch", available_backends())
+
+# A corrector takes Bengali sentences and their partial transliterations and
+# returns the corrected transliterations, one per sentence.
+Corrector = Callable[[Sequence[str], Sequence[str]], List[str]]
+
+def load_finetuned_mt5(model_path: str = _default_model_path, backend: Optional[str] = None) -> Tuple[MT5ForConditionalGeneration, MT5Tokenizer]:
     """
     Loads the fine-tuned mT5 model and tokenizer for inference.
+
+    The model is placed on the inference device once here rather than on every call.
+
+    Args:
+        model_path (str): Directory containing the fine-tuned checkpoint.
+        backend (Optional[str]): "torch" (full precision), "int8" (dynamically
+            quantized, CPU) or "onnx" (ONNX Runtime), or any name added with
+            `backends.register_backend`. Defaults to the backend chosen with
+            `set_backend`.
+
+    Raises:
+        ValueError: If the backend is not registered.
+    """
+    return load_backend(backend or _backend, model_path)
+
+def set_backend(name: str) -> None:
+    """
+    Selects the backend the shared model is loaded with. The backend can also be
+    chosen with the SALIDTRANSLIT_BACKEND environment variable. Takes effect the
+    next time the model is loaded.
+
+    Args:
+        name (str): A registered backend name.
+
+    Raises:
+        ValueError: If the backend is not registered.
+    """
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"Unknown backend {name!r}, expected one of {available_backends()}")
+    _backend = name
+
+def get_backend() -> str:
+    """
+    Returns the name of the backend the shared model is loaded with.
+    """
+    return _backend
+
+def get_model(backend: Optional[str] = None) -> Tuple[MT5ForConditionalGeneration, MT5Tokenizer]:
+    """
+    Returns the shared model and tokenizer, loading them on first use.
+
+    Args:
+        backend (Optional[str]): Backend to use instead of the one chosen with
+            `set_backend`. Each backend's model is loaded once and shared.
+
+    Raises:
+        RuntimeError: If trie-only mode is enabled.
+        ValueError: If the backend is not registered.
+    """
+    global _model, _tokenizer
+    if _trie_only:
+        raise RuntimeError("The mT5 model is disabled in trie-only mode")
+    if backend is not None and backend != _backend:
+        loaded = _backend_models.get(backend)
+        if loaded is None:
+            with _model_lock:
+                loaded = _backend_models.get(backend)
+                if loaded is None:
+                    loaded = _backend_models[backend] = load_finetuned_mt5(backend=backend)
+        return loaded
+    if _model is None or _tokenizer is None:
+        with _model_lock:
+            if _model is None or _tokenizer is None:
+                _model, _tokenizer = load_finetuned_mt5()
+    return _model, _tokenizer
+
+def preload_model(model_path: str = _default_model_path, backend: Optional[str] = None) -> None:
+    """
+    Loads the model and tokenizer ahead of the first Bengali to Devanagari call.
+
+    Args:
+        model_path (str): Directory containing the fine-tuned checkpoint.
+        backend (Optional[str]): Backend to load with. Defaults to the one chosen with `set_backend`.
+    """
+    global _model, _tokenizer
+    with _model_lock:
+        _model, _tokenizer = load_finetuned_mt5(model_path, backend)
+
+def unload_model() -> None:
+    """
+    Drops the shared models and tokenizers so their memory can be reclaimed.
+    """
+    global _model, _tokenizer
+    with _model_lock:
+        _model, _tokenizer = None, None
+        _backend_models.clear()
+    import sys
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+def is_model_loaded() -> bool:
+    """
+    Returns whether the model and tokenizer are currently in memory.
+    """
+    return _model is not None and _tokenizer is not None
+
+def set_trie_only(enabled: bool = True) -> None:
+    """
+    Enables or disables trie-only mode.
+
+    In trie-only mode Bengali to Devanagari output is the partial transliteration
+    and torch/transformers are never imported. The mode can also be enabled by
+    setting the SALIDTRANSLIT_TRIE_ONLY environment variable.
+
+    Args:
+        enabled (bool): Whether to skip the mT5 correction step.
+    """
+    global _trie_only
+    _trie_only = enabled
+
+def is_trie_only() -> bool:
+    """
+    Returns whether trie-only mode is enabled.
+    """
+    return _trie_only
+
+def set_decoding(mode: str) -> None:
+    """
+    Selects how the corrector decodes.
+
+    "beam" regenerates the whole sentence with 5-beam search and falls back to
+    the partial transliteration if the edit distance is too large. "constrained"
+    only scores the ब/व choices at uncertain positions, so the output matches the
+    partial transliteration everywhere else. The mode can also be set with the
+    SALIDTRANSLIT_DECODING environment variable.
+
+    Args:
+        mode (str): "beam" or "constrained".
+
+    Raises:
+        ValueError: If the mode is not supported.
     """
-    model = MT5ForConditionalGeneration.from_pretrained(model_path)
-    tokenizer = MT5Tokenizer.from_pretrained(model_path)
-    return model, tokenizer
+    global _decoding
+    if mode not in decoding_modes:
+        raise ValueError(f"Unknown decoding mode {mode!r}, expected one of {decoding_modes}")
+    _decoding = mode
+
+def get_decoding() -> str:
+    """
+    Returns the current decoding mode.
+    """
+    return _decoding
 
 _nukta_map = {
-    'क': 'क़',
-    'ख': 'ख़',
-    'ग': 'ग़',
-    'ज': 'ज़',
-    'ड': 'ड़',
-    'ढ': 'ढ़',
-    'फ': 'फ़',
-    'य': 'य़',
+    'क': 'क़',
+    'ख': 'ख़',
+    'ग': 'ग़',
+    'ज': 'ज़',
+    'ड': 'ड़',
+    'ढ': 'ढ़',
+    'फ': 'फ़',
+    'य': 'य़',
 }
-def correct_transliteration(bengali: str, partial_trans: str, model: MT5ForConditionalGeneration, tokenizer: MT5Tokenizer) -> str:
+
+def _build_prompt(bengali: str, partial_trans: str) -> str:
     """
-    Generates corrected transliteration from the input Bengali and partial transliteration.
+    Builds the correction prompt the model was fine-tuned on.
     """
-    prompt = f"""Task: Correct the transliteration of the following Bengali sentence. The partial transliteration may contain misspellings.
+    return f"""Task: Correct the transliteration of the following Bengali sentence. The partial transliteration may contain misspellings.
 Bengali: {bengali}
 Partial transliteration: {partial_trans}
 Correct transliteration:
 """
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-
-    model.to(device)
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=256,
-        num_beams=5,
-        early_stopping=True,
-    )
 
-    corrected_trans = tokenizer.decode(outputs[0], skip_special_tokens=True)
+def _postprocess(corrected_trans: str, partial_trans: str) -> str:
+    """
+    Normalizes decoded model output and falls back to the partial transliteration
+    if the model changed more than the ambiguous characters.
+    """
+    from nltk.metrics.distance import edit_distance
 
     if "Correct transliteration:" in corrected_trans:
         index = corrected_trans.index("Correct transliteration:") + len("Correct transliteration:") + 1
@@ -66,6 +240,205 @@ Correct transliteration:
     edit = edit_distance(corrected_trans, partial_trans)
     rep_count = partial_trans.count("ब")
     if edit > rep_count:
+        _instrument.count("fallback_to_partial")
         corrected_trans = partial_trans
 
-    return corrected_trans
\ No newline at end of file
+    return corrected_trans
+
+def _count_generation(outputs: Any, sentences: int, tokenizer: MT5Tokenizer) -> None:
+    """
+    Records one `generate` call and the number of tokens it produced, not
+    counting padding and the decoder start token.
+    """
+    _instrument.count("model_calls")
+    _instrument.count("model_sentences", sentences)
+    _instrument.count("tokens_generated", int((outputs != tokenizer.pad_token_id).sum()))
+
+def correct_transliteration(bengali: str, partial_trans: str, model: MT5ForConditionalGeneration, tokenizer: MT5Tokenizer, decoding: Optional[str] = None) -> str:
+    """
+    Generates corrected transliteration from the input Bengali and partial transliteration.
+
+    `decoding` overrides the mode chosen with `set_decoding`.
+    """
+    if (decoding or _decoding) == "constrained":
+        return correct_transliterations_constrained([bengali], [partial_trans], model, tokenizer)[0]
+
+    prompt = _build_prompt(bengali, partial_trans)
+    with _instrument.timer("model.tokenize"):
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+
+    with _instrument.timer("model.generate"):
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=256,
+            num_beams=5,
+            early_stopping=True,
+        )
+    if _instrument.enabled:
+        _count_generation(outputs, 1, tokenizer)
+
+    with _instrument.timer("model.postprocess"):
+        corrected_trans = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return _postprocess(corrected_trans, partial_trans)
+
+def correct_transliterations(bengali: Sequence[str], partial_trans: Sequence[str], model: MT5ForConditionalGeneration, tokenizer: MT5Tokenizer, batch_size: int = 8, decoding: Optional[str] = None) -> List[str]:
+    """
+    Batched form of `correct_transliteration`.
+
+    Prompts are sorted by length and generated in padded batches of `batch_size`
+    to keep padding waste low. Results are returned in input order.
+
+    Args:
+        bengali (Sequence[str]): Input sentences in Bengali script.
+        partial_trans (Sequence[str]): Partial transliterations of the same sentences.
+        model (MT5ForConditionalGeneration): The fine-tuned model.
+        tokenizer (MT5Tokenizer): The matching tokenizer.
+        batch_size (int): Maximum number of prompts per `generate` call.
+        decoding (Optional[str]): Overrides the mode chosen with `set_decoding`.
+
+    Returns:
+        List[str]: Corrected transliterations, one per input sentence.
+    """
+    if len(bengali) != len(partial_trans):
+        raise ValueError("bengali and partial_trans must have the same length")
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    if (decoding or _decoding) == "constrained":
+        return correct_transliterations_constrained(bengali, partial_trans, model, tokenizer, batch_size)
+
+    prompts = [_build_prompt(b, p) for b, p in zip(bengali, partial_trans)]
+    order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+    results: List[str] = [""] * len(prompts)
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        with _instrument.timer("model.tokenize"):
+            inputs = tokenizer([prompts[i] for i in batch], return_tensors="pt", padding=True).to(model.device)
+        with _instrument.timer("model.generate"):
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=256,
+                num_beams=5,
+                early_stopping=True,
+            )
+        if _instrument.enabled:
+            _count_generation(outputs, len(batch), tokenizer)
+        with _instrument.timer("model.postprocess"):
+            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for i, corrected_trans in zip(batch, decoded):
+                results[i] = _postprocess(corrected_trans, partial_trans[i])
+
+    return results
+
+# Longest run of uncertain ब in one word whose combinations are all scored.
+# Positions past it keep the partial transliteration.
+_max_word_positions = 3
+
+def word_variants(partial_trans: str) -> List[Tuple[int, int, List[str]]]:
+    """
+    Lists the ब/व alternatives for each word with an uncertain ब.
+
+    Args:
+        partial_trans (str): A partial transliteration in Devanagari script.
+
+    Returns:
+        List[Tuple[int, int, List[str]]]: (start, end, variants) for every word that
+        needs a decision, where variants are the word with some uncertain ब
+        replaced by व. The unchanged word is not included.
+    """
+    groups = []
+    for start, end, positions in uncertain_words(partial_trans):
+        positions = positions[:_max_word_positions]
+        word = partial_trans[start:end]
+        variants = []
+        for mask in range(1, 1 << len(positions)):
+            chars = list(word)
+            for bit, position in enumerate(positions):
+                if mask >> bit & 1:
+                    chars[position - start] = "व"
+            variants.append("".join(chars))
+        groups.append((start, end, variants))
+    return groups
+
+def _score_targets(model: MT5ForConditionalGeneration, tokenizer: MT5Tokenizer, prompts: List[str], targets: List[List[str]]) -> List[List[float]]:
+    """
+    Scores candidate outputs by their log-likelihood under the model.
+
+    Each prompt is encoded once, and all of its candidates are scored with a
+    single teacher-forced decoder pass instead of autoregressive generation.
+    """
+    import torch
+
+    with _instrument.timer("model.tokenize"):
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+        flat_targets = [target for candidates in targets for target in candidates]
+        owners = torch.tensor([i for i, candidates in enumerate(targets) for _ in candidates], device=model.device)
+        labels = tokenizer(text_target=flat_targets, return_tensors="pt", padding=True).input_ids.to(model.device)
+        mask = labels != tokenizer.pad_token_id
+
+    _instrument.count("model_calls")
+    _instrument.count("model_sentences", len(prompts))
+    with _instrument.timer("model.generate"), torch.no_grad():
+        hidden = model.get_encoder()(**inputs).last_hidden_state
+        logits = model(
+            encoder_outputs=(hidden.index_select(0, owners),),
+            attention_mask=inputs.attention_mask.index_select(0, owners),
+            labels=labels.masked_fill(~mask, -100),
+        ).logits
+    token_scores = logits.log_softmax(-1).gather(-1, labels.unsqueeze(-1)).squeeze(-1)
+    flat_scores = (token_scores * mask).sum(-1).tolist()
+
+    scores, index = [], 0
+    for candidates in targets:
+        scores.append(flat_scores[index:index + len(candidates)])
+        index += len(candidates)
+    return scores
+
+def correct_transliterations_constrained(bengali: Sequence[str], partial_trans: Sequence[str], model: MT5ForConditionalGeneration, tokenizer: MT5Tokenizer, batch_size: int = 8) -> List[str]:
+    """
+    Corrects transliterations by choosing only between ब and व.
+
+    For each word with an uncertain ब, the sentence is scored with each ब/व
+    variant of that word (all other words as in the partial transliteration) and
+    the most likely variant is kept. This needs one encoder pass and one decoder
+    pass per batch instead of up to 256 beam-search steps, and the output is
+    identical to the partial transliteration except at uncertain ब positions.
+
+    Args:
+        bengali (Sequence[str]): Input sentences in Bengali script.
+        partial_trans (Sequence[str]): Partial transliterations of the same sentences.
+        model (MT5ForConditionalGeneration): The fine-tuned model.
+        tokenizer (MT5Tokenizer): The matching tokenizer.
+        batch_size (int): Maximum number of sentences scored per forward pass.
+
+    Returns:
+        List[str]: Corrected transliterations, one per input sentence.
+    """
+    results = list(partial_trans)
+    pending = []
+    for i, partial in enumerate(partial_trans):
+        groups = word_variants(partial)
+        if groups:
+            candidates = [partial]
+            for start, end, variants in groups:
+                candidates.extend(partial[:start] + variant + partial[end:] for variant in variants)
+            pending.append((i, groups, candidates))
+
+    for offset in range(0, len(pending), batch_size):
+        batch = pending[offset:offset + batch_size]
+        prompts = [_build_prompt(bengali[i], partial_trans[i]) for i, _, _ in batch]
+        scores = _score_targets(model, tokenizer, prompts, [candidates for _, _, candidates in batch])
+        for (i, groups, _), candidate_scores in zip(batch, scores):
+            partial = partial_trans[i]
+            pieces, last, index = [], 0, 1
+            for start, end, variants in groups:
+                options = [partial[start:end]] + variants
+                option_scores = [candidate_scores[0]] + candidate_scores[index:index + len(variants)]
+                index += len(variants)
+                pieces.append(partial[last:start])
+                pieces.append(options[option_scores.index(max(option_scores))])
+                last = end
+            pieces.append(partial[last:])
+            results[i] = "".join(pieces)
+
+    return results
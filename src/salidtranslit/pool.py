@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import model as _model
+from .backends import available_backends
+
+if TYPE_CHECKING:
+    from transformers import MT5Tokenizer
+
+# Loads a model and tokenizer for one worker. Called once per replica, on the
+# worker's own thread.
+Loader = Callable[[], Tuple[Any, "MT5Tokenizer"]]
+
+_Request = Tuple[str, str, "Future[str]"]
+
+class CorrectorPool:
+    """
+    Serves model corrections to many threads from a fixed set of workers.
+
+    Sentences from all callers go into one request queue. Each worker thread
+    takes a sentence, waits up to `max_wait` seconds for more to fill a batch
+    of `max_batch_size`, and corrects the batch. Concurrent requests are
+    therefore batched together, and at most `workers` batches run at a time.
+
+    Each worker sets its torch intra-op thread count once when it starts, so
+    `workers * threads_per_worker` should not exceed the number of cores. By
+    default workers share one model; with `replicate` each loads its own copy,
+    placed on its entry of `devices` if given. Models are loaded and placed on
+    their device once, when the worker starts.
+
+    Fewer workers with more threads each favour latency; more workers with
+    fewer threads each, and a longer `max_wait`, favour throughput.
+
+    Args:
+        workers (int): Number of worker threads.
+        threads_per_worker (Optional[int]): torch intra-op threads per worker.
+            Defaults to the number of cores divided by `workers`.
+        interop_threads (Optional[int]): torch inter-op threads of the process.
+            Only takes effect before torch runs its first inter-op task.
+        max_batch_size (int): Maximum number of sentences per `generate` batch.
+        max_wait (float): Seconds a worker waits to fill a batch.
+        replicate (bool): Give each worker its own copy of the model.
+        devices (Optional[Sequence[str]]): Device of each worker's replica, e.g.
+            ["cuda:0", "cuda:1"]. Implies `replicate` and one worker per device.
+        backend (Optional[str]): Backend the model is loaded with. Defaults to
+            the one chosen with `set_backend`.
+        loader (Optional[Loader]): Loads a model and tokenizer instead of the
+            backend, e.g. a stub for tests.
+
+    Raises:
+        ValueError: If a size is not positive, `max_wait` is negative or the
+            backend is not registered.
+
+    Example:
+        >>> with CorrectorPool(workers=2, threads_per_worker=4) as pool:
+        ...     set_corrector_pool(pool)
+        ...     transliterate("bengali", "devanagari", "বিশ্ব")
+    """
+    def __init__(self, workers: int = 1, threads_per_worker: Optional[int] = None, interop_threads: Optional[int] = None, max_batch_size: int = 8, max_wait: float = 0.005, replicate: bool = False, devices: Optional[Sequence[str]] = None, backend: Optional[str] = None, loader: Optional[Loader] = None) -> None:
+        if devices is not None:
+            workers = len(devices)
+            replicate = True
+        if workers < 1 or max_batch_size < 1:
+            raise ValueError("workers and max_batch_size must be positive")
+        if threads_per_worker is not None and threads_per_worker < 1:
+            raise ValueError("threads_per_worker must be positive")
+        if max_wait < 0:
+            raise ValueError("max_wait must not be negative")
+        if backend is not None and backend not in available_backends():
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {available_backends()}")
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.interop_threads = interop_threads
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.replicate = replicate
+        self.devices = list(devices) if devices is not None else None
+        self.backend = backend
+        self._loader = loader
+        self._queue: queue.Queue[Optional[_Request]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._shared: Optional[Tuple[Any, MT5Tokenizer]] = None
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self.batches: int = 0
+        self.sentences: int = 0
+
+    def __call__(self, bengali: Sequence[str], partial_trans: Sequence[str]) -> List[str]:
+        """
+        Corrects a batch of sentences, blocking until all are done. Makes the
+        pool usable as the `corrector` of a Transliterator or AsyncTransliterator.
+        """
+        futures = [self.submit(b, p) for b, p in zip(bengali, partial_trans)]
+        return [future.result() for future in futures]
+
+    def submit(self, bengali: str, partial_trans: str) -> Future[str]:
+        """
+        Queues one sentence for correction.
+
+        Returns:
+            Future[str]: The corrected transliteration, or the worker's error.
+
+        Raises:
+            RuntimeError: If the pool is closed.
+        """
+        future: Future[str] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("CorrectorPool is closed")
+            if not self._threads:
+                self._start()
+            self._queue.put((bengali, partial_trans, future))
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the number of batches and sentences corrected, the mean batch
+        size and the number of sentences waiting.
+        """
+        return {
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "mean_batch_size": self.sentences / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """
+        Stops the workers after the sentences already queued are corrected.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self) -> CorrectorPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        if self.interop_threads is not None and self._loader is None:
+            import torch
+
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError:
+                # Already set, or inter-op work already started.
+                pass
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(index,), name=f"salidtranslit-corrector-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _load(self, index: int) -> Tuple[Any, MT5Tokenizer]:
+        """
+        Returns the model of worker `index`, loading it if needed, and sets the
+        worker's torch thread count.
+        """
+        if not self.replicate:
+            with self._load_lock:
+                if self._shared is None:
+                    self._shared = self._loader() if self._loader is not None else _model.get_model(self.backend)
+                loaded = self._shared
+        elif self._loader is not None:
+            loaded = self._loader()
+        else:
+            loaded = _model.load_finetuned_mt5(backend=self.backend)
+            if self.devices is not None:
+                loaded[0].to(self.devices[index])
+        if "torch" in sys.modules:
+            # Under OpenMP the intra-op thread count applies to the calling thread.
+            sys.modules["torch"].set_num_threads(self.threads_per_worker)
+        return loaded
+
+    def _run(self, index: int) -> None:
+        loaded: Optional[Tuple[Any, MT5Tokenizer]] = None
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            stop = False
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=self.max_wait) if self.max_wait else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            if batch:
+                try:
+                    if loaded is None:
+                        loaded = self._load(index)
+                    corrected = _model.correct_transliterations(
+                        [request[0] for request in batch], [request[1] for request in batch],
+                        loaded[0], loaded[1], self.max_batch_size,
+                    )
+                except Exception as error:
+                    for _, _, future in batch:
+                        future.set_exception(error)
+                else:
+                    with self._lock:
+                        self.batches += 1
+                        self.sentences += len(batch)
+                    for (_, _, future), output in zip(batch, corrected):
+                        future.set_result(output)
+            if stop:
+                return
+
+corrector_pool: Optional[CorrectorPool] = None
+
+def set_corrector_pool(pool: Optional[CorrectorPool]) -> None:
+    """
+    Routes the model corrections of Bengali to Devanagari transliteration
+    through a CorrectorPool, so concurrent callers share its workers.
+
+    Args:
+        pool (Optional[CorrectorPool]): The pool, or None to call the shared
+            model directly on the calling thread.
+    """
+    global corrector_pool
+    corrector_pool = pool
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+from . import model
+from .model import Corrector
+from .ambiguity import has_uncertain
+from .cache import resolve_words
+from .core import ben_dev_partial
+from .corpus import map_ordered
+from .lexicon import count_resolutions
+from .result_cache import default_fingerprint
+from .segment import segment_spans
+from .store import PrecomputedStore, format_version, schema
+
+# Offline precomputation of Bengali to Devanagari model corrections.
+#
+# Every document of a corpus is split into sentences, the trie pass and the
+# ambiguity pre-filter run in this process, and the sentences that would reach
+# the model online (and are not stored yet) are corrected in batches, in
+# worker processes if asked. Sentence results and word spelling counts are
+# written to a PrecomputedStore file together with the number of documents
+# done, one transaction per shard, so an interrupted run resumes after the
+# last shard written.
+
+# The corrector used by workers. Set before the pool starts, so custom
+# correctors reach the workers only when they are forked (see corpus._context).
+_corrector: Optional[Corrector] = None
+
+def _model_corrections(bengali: Sequence[str], partial_trans: Sequence[str], batch_size: int) -> List[str]:
+    if _corrector is not None:
+        return _corrector(bengali, partial_trans)
+    model_, tokenizer = model.get_model()
+    return model.correct_transliterations(bengali, partial_trans, model_, tokenizer, batch_size)
+
+def read_documents(path: str, column: str = "bengali") -> Iterator[str]:
+    """
+    Reads a corpus: the `column` cells of a CSV file, or the lines of any other file.
+
+    Args:
+        path (str): Corpus file.
+        column (str): CSV column holding the Bengali text.
+
+    Yields:
+        str: One document per row or line.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield row[column]
+        else:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+def input_id(path: str) -> str:
+    """
+    Identifies a corpus file by its absolute path, size and modification time,
+    so progress is only resumed on the same file.
+    """
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def _ambiguous_sentences(documents: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (sentence, partial transliteration) for every sentence of
+    `documents` with an uncertain ब, i.e. every sentence that online
+    transliteration would send past the pre-filter.
+    """
+    for document in documents:
+        for start, end in segment_spans(document):
+            sentence = document[start:end]
+            partial, ambiguous = ben_dev_partial(sentence)
+            if ambiguous and has_uncertain(partial):
+                yield sentence, partial
+
+class _Writer:
+    """
+    The read-write connection of a precompute job.
+    """
+    def __init__(self, path: str, fingerprint: str, mode: str, restart: bool) -> None:
+        import sqlite3
+
+        self.connection: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in schema:
+                self.connection.execute(statement)
+            meta = dict(self.connection.execute("SELECT key, value FROM meta").fetchall())
+            if restart or not meta:
+                for table in ("sentences", "words", "progress"):
+                    self.connection.execute(f"DELETE FROM {table}")
+            elif meta.get("version") != str(format_version) or meta.get("fingerprint") != fingerprint or meta.get("mode") != mode:
+                raise ValueError(f"{path} was built with a different format, ScriptMap files, model checkpoint or correction mode; pass restart=True to rebuild it")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("version", str(format_version)), ("fingerprint", fingerprint), ("mode", mode)],
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            self.connection.close()
+            raise
+
+    def done(self, input_name: str) -> int:
+        row = self.connection.execute("SELECT documents FROM progress WHERE input = ?", (input_name,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def stored(self, sentences: Sequence[str]) -> Set[str]:
+        found = set()
+        for start in range(0, len(sentences), 500):
+            chunk = sentences[start:start + 500]
+            query = f"SELECT text FROM sentences WHERE text IN ({','.join('?' * len(chunk))})"
+            found.update(row[0] for row in self.connection.execute(query, chunk))
+        return found
+
+    def write(self, input_name: str, documents: int, sentences: Sequence[Tuple[str, str, str]]) -> None:
+        counts = count_resolutions(sentences)
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sentences VALUES (?, ?)",
+                [(bengali, corrected) for bengali, _, corrected in sentences],
+            )
+            self.connection.executemany(
+                "INSERT INTO words VALUES (?, ?, ?) ON CONFLICT (word, spelling) DO UPDATE SET count = count + excluded.count",
+                [(word, spelling, count) for word, spellings in counts.items() for spelling, count in spellings.items()],
+            )
+            self.connection.execute("INSERT OR REPLACE INTO progress VALUES (?, ?)", (input_name, documents))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        self.connection.close()
+
+def _correct_shard(bengali: List[str], partial_trans: List[str], batch_size: int) -> List[str]:
+    return _model_corrections(bengali, partial_trans, batch_size) if bengali else []
+
+def precompute(path: str, documents: Iterable[str], input_name: str = "", workers: int = 1, shard_size: int = 256, batch_size: int = 8, restart: bool = False, corrector: Optional[Corrector] = None, progress: Optional[Callable[[Dict[str, float]], None]] = None) -> Dict[str, float]:
+    """
+    Corrects every ambiguous sentence of a corpus with the model and stores the
+    results in a precomputed store.
+
+    Documents are processed in shards of `shard_size`. The trie pass and the
+    pre-filter run here; sentences already in the store, or repeated within
+    the shard, are skipped, and the rest are corrected in batches of
+    `batch_size`, over `workers` processes. Each shard's sentences, word
+    spelling counts and the number of documents done for `input_name` are
+    committed together, so running again with the same `input_name` resumes
+    after the last committed shard.
+
+    Args:
+        path (str): Store file, created if missing.
+        documents (Iterable[str]): Bengali documents, in a stable order.
+        input_name (str): Identifies the corpus for resuming, e.g. `input_id(path)`.
+        workers (int): Number of worker processes for model corrections.
+        shard_size (int): Number of documents per shard.
+        batch_size (int): Maximum number of sentences per model call.
+        restart (bool): Empty the store first instead of resuming.
+        corrector (Optional[Corrector]): Batch corrector to use instead of the model.
+        progress (Optional[Callable[[Dict[str, float]], None]]): Called with the
+            running statistics after every shard.
+
+    Returns:
+        Dict[str, float]: Documents skipped (already done) and processed,
+        sentences, ambiguous sentences, sentences already stored and newly
+        corrected, elapsed seconds and corrected sentences per second.
+
+    Raises:
+        ValueError: If trie-only mode is on and no corrector is given, or the
+            store was built with a different model, correction mode or ScriptMap files.
+    """
+    global _corrector
+    if corrector is None and model.is_trie_only():
+        raise ValueError("precompute needs the model, but trie-only mode is enabled")
+    if workers < 1 or shard_size < 1 or batch_size < 1:
+        raise ValueError("workers, shard_size and batch_size must be positive")
+
+    writer = _Writer(path, default_fingerprint(), f"{model.get_decoding()}:{model.get_backend()}", restart)
+    start_time = time.perf_counter()
+    done = writer.done(input_name)
+    stats: Dict[str, float] = {
+        "skipped_documents": done, "documents": 0, "sentences": 0, "ambiguous": 0,
+        "already_stored": 0, "corrected": 0, "seconds": 0.0, "corrected_per_s": 0.0,
+    }
+    # Per shard in flight: (documents done after it, sentences, partial transliterations).
+    shards: Deque[Tuple[int, List[str], List[str]]] = deque()
+    in_flight: Set[str] = set()
+
+    def tasks() -> Iterator[Tuple[List[str], List[str], int]]:
+        position = done
+        iterator = islice(iter(documents), done, None)
+        while True:
+            shard = list(islice(iterator, shard_size))
+            if not shard:
+                return
+            position += len(shard)
+            stats["documents"] += len(shard)
+            stats["sentences"] += sum(len(segment_spans(document)) for document in shard)
+            candidates = dict(_ambiguous_sentences(shard))
+            stats["ambiguous"] += len(candidates)
+            # Sentences of earlier shards still being corrected count as stored.
+            for sentence in in_flight.intersection(candidates).union(writer.stored(list(candidates))):
+                del candidates[sentence]
+                stats["already_stored"] += 1
+            in_flight.update(candidates)
+            shards.append((position, list(candidates), list(candidates.values())))
+            yield list(candidates), list(candidates.values()), batch_size
+
+    if corrector is not None:
+        _corrector = corrector
+    try:
+        results = (_correct_shard(*task) for task in tasks()) if workers == 1 else map_ordered(_correct_shard, tasks(), workers, corrector is None)
+        for corrected in results:
+            position, bengali, partial = shards.popleft()
+            writer.write(input_name, position, list(zip(bengali, partial, corrected)))
+            in_flight.difference_update(bengali)
+            stats["corrected"] += len(corrected)
+            stats["seconds"] = time.perf_counter() - start_time
+            stats["corrected_per_s"] = stats["corrected"] / stats["seconds"] if stats["seconds"] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+    finally:
+        _corrector = None
+        writer.close()
+    stats["seconds"] = time.perf_counter() - start_time
+    return stats
+
+def coverage(store: PrecomputedStore, documents: Iterable[str]) -> Dict[str, float]:
+    """
+    Measures how much of a corpus a store answers without the model.
+
+    Every sentence of `documents` that would reach the model online is looked
+    up in the store whole, then word by word.
+
+    Args:
+        store (PrecomputedStore): The store to measure.
+        documents (Iterable[str]): Bengali documents, e.g. the corpus the store
+            was built from or a held-out one by the same authors.
+
+    Returns:
+        Dict[str, float]: Ambiguous sentences, those found whole, those resolved
+        from stored words, and the fraction covered by either.
+    """
+    ambiguous = sentence_hits = word_hits = 0
+    for sentence, partial in _ambiguous_sentences(documents):
+        ambiguous += 1
+        if store.sentence(sentence) is not None:
+            sentence_hits += 1
+        elif resolve_words(sentence, partial, (store,)) is not None:
+            word_hits += 1
+    stored = store.stats()
+    return {
+        "ambiguous": ambiguous,
+        "sentence_hits": sentence_hits,
+        "word_hits": word_hits,
+        "coverage": (sentence_hits + word_hits) / ambiguous if ambiguous else 1.0,
+        "stored_sentences": stored["sentences"],
+        "stored_words": stored["words"],
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m salidtranslit.precompute",
+        description="Correct every ambiguous sentence of a Bengali corpus with the mT5 model and store the results for read-only use by transliterate.",
+    )
+    parser.add_argument("corpus", help="CSV file (see --column) or text file with one document per line.")
+    parser.add_argument("-o", "--output", required=True, help="Precomputed store to create or resume.")
+    parser.add_argument("--column", default="bengali", help="CSV column with the Bengali text.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for model corrections.")
+    parser.add_argument("--shard-size", type=int, default=256, help="Documents per shard (and per commit).")
+    parser.add_argument("--batch-size", type=int, default=8, help="Sentences per mT5 call.")
+    parser.add_argument("--restart", action="store_true", help="Empty the store instead of resuming.")
+    parser.add_argument("--report-only", action="store_true", help="Only report the store's coverage of the corpus.")
+    args = parser.parse_args(argv)
+
+    try:
+        if not args.report_only:
+            def report_progress(stats: Dict[str, float]) -> None:
+                print(f"{stats['skipped_documents'] + stats['documents']} documents, {stats['corrected']} sentences corrected, {stats['corrected_per_s']:.1f}/s", flush=True)
+
+            stats = precompute(
+                args.output, read_documents(args.corpus, args.column), input_id(args.corpus),
+                args.workers, args.shard_size, args.batch_size, args.restart, progress=report_progress,
+            )
+            print(json.dumps({"run": stats}, indent=2))
+        store = PrecomputedStore(args.output)
+        print(json.dumps({"coverage": coverage(store, read_documents(args.corpus, args.column))}, indent=2))
+        store.close()
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+if __name__ == "__main__":
+    main()
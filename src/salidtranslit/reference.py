@@ -1,40 +1,100 @@
 import os
-import json
-from typing import Dict, List, Set
+import marshal
+import struct
+import zlib
+from typing import Dict, List, Optional, Set
 from . import trie
 
 # JSON mapping files contain: {str: List[str]}
-_devanagari: Dict[str, List[str]]
-_bengali: Dict[str, List[str]]
-_iast: Dict[str, List[str]]
-_itrans: Dict[str, List[str]]
-
 _script_dir = os.path.dirname(__file__)
-with open(f"{_script_dir}/ScriptMap/devanagari.json", encoding="utf-8") as _dev_json, \
-     open(f"{_script_dir}/ScriptMap/bengali.json", encoding="utf-8") as _ben_json, \
-     open(f"{_script_dir}/ScriptMap/iast.json", encoding="utf-8") as _iast_json, \
-     open(f"{_script_dir}/ScriptMap/itrans.json", encoding="utf-8") as _itrans_json:
-    _devanagari = json.load(_dev_json)
-    _bengali = json.load(_ben_json)
-    _iast = json.load(_iast_json)
-    _itrans = json.load(_itrans_json)
+_scripts = ("devanagari", "bengali", "iast", "itrans")
+_json_paths = [f"{_script_dir}/ScriptMap/{script}.json" for script in _scripts]
+
+# The tries compiled from the JSON files are also shipped as one binary
+# artifact: a header of magic, format version, marshal version and the CRC-32
+# of the JSON files it was built from, then the marshalled transition tables.
+# Loading it skips JSON parsing and trie construction. If the JSON files have
+# changed since it was built, the tries are compiled from JSON instead.
+artifact_path = f"{_script_dir}/scriptmap.bin"
+_magic = b"SALT"
+_format_version = 1
+_header = struct.Struct("<4sIII")
+
+def load_mappings() -> Dict[str, Dict[str, List[str]]]:
+    """
+    Parses the ScriptMap JSON files.
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: Mapping of each script name to its term mappings.
+    """
+    import json
+
+    mappings = {}
+    for script, path in zip(_scripts, _json_paths):
+        with open(path, encoding="utf-8") as f:
+            mappings[script] = json.load(f)
+    return mappings
+
+def _json_checksum() -> int:
+    checksum = 0
+    for path in _json_paths:
+        with open(path, "rb") as f:
+            checksum = zlib.crc32(f.read(), checksum)
+    return checksum
 
 # Build tries from mappings
-dev_trie: trie.Trie = trie.Trie()
-for _term, _mapping in _devanagari.items():
-    dev_trie.insert(_term, _mapping)
+def _compile(mappings: Dict[str, List[str]]) -> trie.CompiledTrie:
+    source = trie.Trie()
+    for term, mapping in mappings.items():
+        source.insert(term, mapping)
+    return trie.CompiledTrie(source)
 
-ben_trie: trie.Trie = trie.Trie()
-for _term, _mapping in _bengali.items():
-    ben_trie.insert(_term, _mapping)
+def build_artifact(path: str = artifact_path) -> None:
+    """
+    Compiles the ScriptMap JSON files and writes the binary artifact.
 
-iast_trie: trie.Trie = trie.Trie()
-for _term, _mapping in _iast.items():
-    iast_trie.insert(_term, _mapping)
+    Args:
+        path (str): Output file.
+    """
+    mappings = load_mappings()
+    tables = {script: _compile(mappings[script]).tables() for script in _scripts}
+    header = _header.pack(_magic, _format_version, marshal.version, _json_checksum())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + marshal.dumps(tables, marshal.version))
+    os.replace(tmp_path, path)
 
-itrans_trie: trie.Trie = trie.Trie()
-for _term, _mapping in _itrans.items():
-    itrans_trie.insert(_term, _mapping)
+def load_artifact(path: str = artifact_path) -> Optional[Dict[str, trie.CompiledTrie]]:
+    """
+    Loads the compiled tries from the binary artifact.
+
+    Returns:
+        Optional[Dict[str, trie.CompiledTrie]]: The tries by script name, or None if
+        the artifact is missing, unreadable or stale.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, marshal_version, checksum = _header.unpack_from(data)
+        if (magic, version, marshal_version) != (_magic, _format_version, marshal.version) or checksum != _json_checksum():
+            return None
+        tables = marshal.loads(data[_header.size:])
+        return {script: trie.CompiledTrie.from_tables(*tables[script]) for script in _scripts}
+    except (OSError, ValueError, EOFError, TypeError, KeyError, struct.error):
+        return None
+
+def _load_tries() -> Dict[str, trie.CompiledTrie]:
+    tries = load_artifact()
+    if tries is None:
+        mappings = load_mappings()
+        tries = {script: _compile(mappings[script]) for script in _scripts}
+    return tries
+
+_tries = _load_tries()
+dev_trie: trie.CompiledTrie = _tries["devanagari"]
+ben_trie: trie.CompiledTrie = _tries["bengali"]
+iast_trie: trie.CompiledTrie = _tries["iast"]
+itrans_trie: trie.CompiledTrie = _tries["itrans"]
 
 # Character sets
 end_of_term: Set[str] = {' ', '\n', '\t', '-', '.', ',', '?', '!', "'", '"', 'ঽ', 'ऽ', '(', ')', '[', ']', '{', '}'}
@@ -48,4 +108,16 @@ iast_vows: Set[str] = {'a', 'ā', 'i', 'ī', 'u', 'ū', 'ṛ', 'ṝ', 'ḷ', '
 iast_cons: Set[str] = {'k', 'g', 'ṅ', 'c', 'j', 'ñ', 'ṭ', 'ḍ', 'ṇ', 't', 'd', 'n', 'p', 'b', 'm', 'y', 'r', 'l', 'v', 'ś', 'ṣ', 's', 'h', 'l̤', 'ḻ', 'ṟ', 'ṉ', 'q', 'ġ', 'z', 'r̤', 'f', 'ẏ'}
 
 itrans_vows: Set[str] = {'a', 'A', 'i', 'I', 'u', 'U', 'R^', 'L^', 'e', 'o', '^e', '^o', '.N', 'M'}
-itrans_cons: Set[str] = {'k', 'g', '~N', 'c', 'C', 'j', '~n', 'T', 'D', 'N', 't', 'd', 'n', 'p', 'b', 'm', 'y', 'r', 'l', 'v', 's', 'S', 'h', 'L', 'z', 'R', '^n', 'q', 'K', 'G', '.D', 'f', 'Y'}
\ No newline at end of file
+itrans_cons: Set[str] = {'k', 'g', '~N', 'c', 'C', 'j', '~n', 'T', 'D', 'N', 't', 'd', 'n', 'p', 'b', 'm', 'y', 'r', 'l', 'v', 's', 'S', 'h', 'L', 'z', 'R', '^n', 'q', 'K', 'G', '.D', 'f', 'Y'}
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the compiled ScriptMap artifact from the JSON files.")
+    parser.add_argument("-o", "--output", default=artifact_path, help="Destination artifact file.")
+    args = parser.parse_args()
+    build_artifact(args.output)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+from .backends import user_cache_dir
+
+_script_dir = os.path.dirname(__file__)
+_scriptmap_dir = os.path.join(_script_dir, "ScriptMap")
+_default_model_path = os.path.join(_script_dir, "mt5_finetuned")
+
+# Evict down to this fraction of max_bytes. The size bound is only checked
+# after a process has stored the remaining fraction since its last check, so
+# eviction does not run on every put.
+_evict_to = 0.9
+# Hits record when an entry was last used in memory, and the times are written
+# in one transaction once this many are pending, so lookups never wait for
+# the write lock.
+_touch_batch = 256
+# Layout of the database. Files with another layout are emptied on open.
+_schema_version = "2"
+
+# Checkpoint files smaller than this are hashed every time. The digests of
+# larger ones (the weights) are kept in a sidecar file in the user cache
+# directory and only recomputed when their size or modification time changes.
+_sidecar_min_bytes = 1 << 20
+
+def _file_digest(path: str) -> str:
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+@lru_cache(maxsize=None)
+def _checkpoint_digest(model_path: str) -> bytes:
+    """
+    Hashes the name and content digest of every file in a checkpoint
+    directory, once per process and directory. The content of large files is
+    only read when the sidecar has no digest for their current size and
+    modification time, so the weights are hashed once per checkpoint rather
+    than in every process.
+    """
+    import hashlib
+    import json
+
+    digest = hashlib.sha256()
+    if not os.path.isdir(model_path):
+        return digest.digest()
+    key = hashlib.sha256(os.path.realpath(model_path).encode()).hexdigest()[:16]
+    sidecar = os.path.join(user_cache_dir("digests"), f"{key}.json")
+    try:
+        with open(sidecar, encoding="utf-8") as f:
+            known = json.load(f)
+    except (OSError, ValueError):
+        known = {}
+    recorded = {}
+    for name in sorted(os.listdir(model_path)):
+        path = os.path.join(model_path, name)
+        stat = os.stat(path)
+        if stat.st_size < _sidecar_min_bytes:
+            file_digest = _file_digest(path)
+        else:
+            entry = known.get(name)
+            if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                file_digest = entry[2]
+            else:
+                file_digest = _file_digest(path)
+            recorded[name] = [stat.st_size, stat.st_mtime_ns, file_digest]
+        digest.update(name.encode() + b"\0" + bytes.fromhex(file_digest))
+    if recorded and recorded != known:
+        try:
+            os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+            temporary = f"{sidecar}.{os.getpid()}"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(recorded, f)
+            os.replace(temporary, sidecar)
+        except OSError:
+            # A read-only cache directory only costs a rehash next time.
+            pass
+    return digest.digest()
+
+def default_fingerprint(model_path: str = _default_model_path) -> str:
+    """
+    Fingerprints everything a cached correction depends on besides its input:
+    the contents of the ScriptMap JSON files and the name and content of every
+    file in the model checkpoint directory. Only contents are hashed, so a
+    copied checkpoint, or a cache or store built with one, keeps its fingerprint.
+    The digests of large checkpoint files are cached on disk, keyed by size
+    and modification time, so only the first call for a checkpoint reads them.
+
+    Args:
+        model_path (str): Directory containing the fine-tuned checkpoint.
+
+    Returns:
+        str: A hex digest that changes when the mappings or the checkpoint change.
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(_scriptmap_dir)):
+        with open(os.path.join(_scriptmap_dir, name), "rb") as f:
+            digest.update(name.encode() + b"\0" + f.read())
+    digest.update(_checkpoint_digest(os.path.abspath(model_path)))
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    A persistent, size-bounded cache of sentence transliterations in SQLite.
+
+    Entries are keyed by (fingerprint, source, target, mode, text), where the
+    fingerprint identifies the ScriptMap files and model checkpoint and mode
+    names the decoding configuration that produced them. Processes with
+    different checkpoints can share one file without seeing each other's
+    entries; stale ones are never used again and age out. Several processes
+    can share one file: the database runs in WAL mode, each process opens its
+    own connection, and writers wait for each other up to `timeout`. When the
+    stored text exceeds `max_bytes`, the least recently used entries are
+    evicted. Lookups only read: the time of each hit is written later, in
+    batches.
+
+    Attributes:
+        path (str): The SQLite database file.
+        max_bytes (int): Bound on the UTF-8 size of the stored texts.
+        fingerprint (str): Fingerprint of the entries this instance reads and
+            writes. Defaults to `default_fingerprint()`, computed on first use.
+        hits (int): Lookups answered by this process.
+        misses (int): Lookups not found by this process.
+    """
+    def __init__(self, path: str, max_bytes: int = 256 << 20, fingerprint: Optional[str] = None, timeout: float = 30.0) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self._fingerprint: Optional[str] = fingerprint
+        self.timeout: float = timeout
+        self.hits: int = 0
+        self.misses: int = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._unchecked: int = 0
+        self._touched: Dict[Tuple[str, str, str, str], float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self) -> str:
+        # Computed on first use, so creating a cache reads no files.
+        if self._fingerprint is None:
+            self._fingerprint = default_fingerprint()
+        return self._fingerprint
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked children, so each process opens its own.
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != _schema_version:
+                connection.execute("DROP TABLE IF EXISTS results")
+                connection.execute("DELETE FROM meta")
+                connection.execute("INSERT INTO meta VALUES ('version', ?)", (_schema_version,))
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "fingerprint TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, mode TEXT NOT NULL, text TEXT NOT NULL, "
+                "value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL, "
+                "PRIMARY KEY (fingerprint, source, target, mode, text))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+        self._connection, self._pid = connection, os.getpid()
+        return connection
+
+    def get(self, source: str, target: str, mode: str, text: str) -> Optional[str]:
+        """
+        Returns the cached transliteration of `text`, or None.
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value FROM results WHERE fingerprint = ? AND source = ? AND target = ? AND mode = ? AND text = ?",
+                (self.fingerprint, source, target, mode, text),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[(source, target, mode, text)] = time.time()
+            if len(self._touched) >= _touch_batch:
+                self._flush_touched(connection)
+            return row[0]
+
+    def put(self, source: str, target: str, mode: str, text: str, value: str) -> None:
+        """
+        Stores the transliteration of `text`.
+        """
+        self.put_many(source, target, mode, [(text, value)])
+
+    def put_many(self, source: str, target: str, mode: str, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Stores many (text, transliteration) pairs in one transaction.
+        """
+        now = time.time()
+        rows = [
+            (self.fingerprint, source, target, mode, text, value, len(text.encode("utf-8")) + len(value.encode("utf-8")), now)
+            for text, value in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self._unchecked += sum(row[6] for row in rows)
+            if self._unchecked >= self.max_bytes * (1 - _evict_to):
+                self._unchecked = 0
+                self._evict(connection)
+
+    def _flush_touched(self, connection: sqlite3.Connection) -> None:
+        # Writes the pending hit times in one transaction.
+        touched = [(used, self.fingerprint, *key) for key, used in self._touched.items()]
+        self._touched.clear()
+        if not touched:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "UPDATE results SET used = MAX(used, ?) WHERE fingerprint = ? AND source = ? AND target = ? AND mode = ? AND text = ?",
+                touched,
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        self._flush_touched(connection)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - int(self.max_bytes * _evict_to)
+                connection.execute(
+                    "DELETE FROM results WHERE rowid IN (SELECT rowid FROM ("
+                    "SELECT rowid, size, SUM(size) OVER (ORDER BY used, rowid) AS freed FROM results"
+                    ") WHERE freed - size < ?)",
+                    (excess,),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the hit and miss counters.
+        """
+        with self._lock:
+            self._connect().execute("DELETE FROM results")
+            self._touched.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit and miss counts for this process, the hit rate, the number
+        of entries, the stored text size and the size of the database on disk.
+        """
+        with self._lock:
+            entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        disk = sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(self.path + suffix))
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "bytes_on_disk": disk,
+        }
+
+    def close(self) -> None:
+        """
+        Writes pending hit times and closes this process's connection. The
+        cache reconnects on next use.
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._flush_touched(self._connection)
+                self._connection.close()
+            self._connection = None
+
+# Created from SALIDTRANSLIT_RESULT_CACHE by the first `get_result_cache` call,
+# so importing the package opens no database.
+result_cache: Optional[ResultCache] = None
+_from_environment: bool = True
+_environment_lock = threading.Lock()
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Returns the persistent result cache, creating it from the environment on
+    first use unless `set_result_cache` was called.
+    """
+    global result_cache, _from_environment
+    if _from_environment:
+        with _environment_lock:
+            if _from_environment:
+                path = os.environ.get("SALIDTRANSLIT_RESULT_CACHE")
+                if path:
+                    result_cache = ResultCache(path, max_bytes=int(os.environ.get("SALIDTRANSLIT_RESULT_CACHE_BYTES", str(256 << 20))))
+                _from_environment = False
+    return result_cache
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """
+    Sets the persistent result cache used by Bengali to Devanagari transliteration.
+    The cache can also be enabled by setting SALIDTRANSLIT_RESULT_CACHE to a
+    database path (and SALIDTRANSLIT_RESULT_CACHE_BYTES to bound its size).
+
+    Args:
+        cache (Optional[ResultCache]): The cache, or None to disable it.
+    """
+    global result_cache, _from_environment
+    result_cache = cache
+    _from_environment = False
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Sentences end after a run of dandas or sentence punctuation, and at line
+# breaks. No Bengali ScriptMap key contains whitespace or spans one of these,
+# and the trie pass returns to its start state after them, so transliterating
+# segments one by one gives the same partial transliteration as the whole text.
+_boundary = re.compile(r"[।॥.?!;]+|\n")
+_space = re.compile(r"\s+")
+
+# Longest segment, in characters, sent to the corrector in one prompt. Longer
+# sentences are split at whitespace. 0 disables the limit.
+max_segment_chars: int = int(os.environ.get("SALIDTRANSLIT_MAX_SEGMENT_CHARS", "200"))
+
+def set_max_segment_chars(limit: int) -> None:
+    """
+    Sets the longest sentence, in characters, sent to the corrector in one
+    prompt. Longer sentences are split at whitespace. The default of 200 can
+    also be changed with the SALIDTRANSLIT_MAX_SEGMENT_CHARS environment variable.
+
+    Args:
+        limit (int): Maximum segment length, or 0 for no limit.
+
+    Raises:
+        ValueError: If `limit` is negative.
+    """
+    global max_segment_chars
+    if limit < 0:
+        raise ValueError("limit must not be negative")
+    max_segment_chars = limit
+
+def segment_spans(text: str, max_chars: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Splits text into sentences for the corrector.
+
+    Segments end after a danda, double danda, ".", "?", "!" or ";" (or a run of
+    them) and at line breaks, and never start or end with whitespace. A segment
+    longer than `max_chars` is split at the last whitespace within the limit,
+    or the first one after it if a single word is longer. Everything between
+    segments is whitespace.
+
+    Args:
+        text (str): Input string.
+        max_chars (Optional[int]): Maximum segment length, or 0 for no limit.
+            Defaults to `max_segment_chars`.
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) of every segment, in order.
+
+    Example:
+        >>> segment_spans("এক। দুই\\nতিন")
+        [(0, 3), (4, 7), (8, 11)]
+    """
+    limit = max_segment_chars if max_chars is None else max_chars
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for match in _boundary.finditer(text):
+        _add_span(text, start, match.end(), limit, spans)
+        start = match.end()
+    _add_span(text, start, len(text), limit, spans)
+    return spans
+
+def _add_span(text: str, start: int, end: int, limit: int, spans: List[Tuple[int, int]]) -> None:
+    """
+    Appends text[start:end] without surrounding whitespace, split to `limit`.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    while limit and end - start > limit:
+        cut = None
+        for match in _space.finditer(text, start + 1, end):
+            if cut is not None and match.start() > start + limit:
+                break
+            cut = match
+        if cut is None:
+            break
+        spans.append((start, cut.start()))
+        start = cut.end()
+    if start < end:
+        spans.append((start, end))
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from . import instrument as _instrument
+from . import pool as _pool
+from . import result_cache as _result_cache
+from . import store as _store
+from .core import ben_dev, ben_dev_segments, record_corrections
+from .model import Corrector, correct_transliterations, get_model
+from .transliterate import _resolve
+
+def model_corrector(bengali: Sequence[str], partial_trans: Sequence[str]) -> List[str]:
+    """
+    Corrects a batch with the corrector pool if one is set, and otherwise with
+    the shared mT5 model, loading it on first use.
+    """
+    if _pool.corrector_pool is not None:
+        return _pool.corrector_pool(bengali, partial_trans)
+    model, tokenizer = get_model()
+    return correct_transliterations(bengali, partial_trans, model, tokenizer, max(1, len(bengali)))
+
+_Request = Tuple[str, str, "asyncio.Future[str]"]
+class AsyncTransliterator:
+    """
+    Transliterates from asyncio code without blocking the event loop on the model.
+
+    Trie-only work, including the Bengali to Devanagari trie pass, pre-filter,
+    lexicon and word cache, runs inline. Lookups in the persistent result cache
+    and the precomputed store, which can block on SQLite, run on the loop's
+    default executor instead, and results are stored from the corrector's
+    executor. Each text is split into sentences, and the
+    sentences that still need the model are queued and corrected in
+    micro-batches on a dedicated executor: a batch is flushed once it holds
+    `max_batch_size` sentences or `max_wait` seconds after its first sentence
+    arrived, whichever comes first. While a batch runs, new
+    sentences collect for the next one.
+
+    At most `max_pending` sentences wait in the queue; further callers wait for
+    room (backpressure). With `timeout` set, a sentence that is not corrected
+    within `timeout` seconds of the call returns its partial transliteration,
+    like the model's own fallback.
+
+    Args:
+        max_batch_size (int): Maximum number of sentences per corrector call.
+        max_wait (float): Seconds a batch waits to fill before it is flushed.
+        max_pending (int): Maximum number of queued sentences.
+        timeout (Optional[float]): Latency bound in seconds for model corrections.
+        corrector (Optional[Corrector]): Batch corrector. Defaults to `model_corrector`;
+            pass a stub to run without the model.
+        executor (Optional[Executor]): Executor the corrector runs on. Defaults to a
+            dedicated single-thread executor that `aclose` shuts down.
+
+    Raises:
+        RuntimeError: From `transliterate`, if a text needs the model after `aclose`.
+
+    Example:
+        >>> async with AsyncTransliterator(max_wait=0.01) as service:
+        ...     await service.transliterate("bengali", "devanagari", "বিশ্ব")
+    """
+    def __init__(self, max_batch_size: int = 8, max_wait: float = 0.005, max_pending: int = 1024, timeout: Optional[float] = None, corrector: Optional[Corrector] = None, executor: Optional[Executor] = None) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+        if max_wait < 0:
+            raise ValueError("max_wait must not be negative")
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._corrector = corrector or model_corrector
+        # Results of a custom corrector stay out of the persistent result cache.
+        self._use_result_cache = corrector is None
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(1, thread_name_prefix="salidtranslit")
+        self._queue: Optional[asyncio.Queue[_Request]] = None
+        self._worker: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+    async def transliterate(self, source: str, target: str, text: str) -> str:
+        """
+        Transliterates `text` like `salidtranslit.transliterate`.
+
+        Raises:
+            ValueError: If the source or target script is not supported.
+        """
+        func = _resolve(source, target)
+        if func is not ben_dev:
+            return func(text)
+
+        if _store.get_precomputed_store() is not None or (self._use_result_cache and _result_cache.get_result_cache() is not None):
+            loop = asyncio.get_running_loop()
+            pieces = await loop.run_in_executor(None, functools.partial(ben_dev_segments, text, use_result_cache=self._use_result_cache))
+        else:
+            pieces = ben_dev_segments(text, use_result_cache=self._use_result_cache)
+        outputs = [output for _, output, _ in pieces]
+        pending = [index for index, (_, _, needs_model) in enumerate(pieces) if needs_model]
+        if pending:
+            corrected = await asyncio.gather(*(self._correct(*pieces[index][:2]) for index in pending))
+            for index, output in zip(pending, corrected):
+                outputs[index] = output
+        return "".join(outputs)
+
+    async def transliterate_batch(self, source: str, target: str, texts: Iterable[str]) -> List[str]:
+        """
+        Transliterates many strings concurrently, returning them in input order.
+
+        Raises:
+            ValueError: If the source or target script is not supported.
+        """
+        _resolve(source, target)
+        return list(await asyncio.gather(*(self.transliterate(source, target, text) for text in texts)))
+
+    async def aclose(self) -> None:
+        """
+        Stops the batching task and shuts down the executor if it was created here.
+        Sentences still queued get their partial transliteration, and texts
+        that need the model can no longer be transliterated.
+        """
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, partial, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result(partial)
+            self._queue = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> AsyncTransliterator:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def _correct(self, bengali: str, partial: str) -> str:
+        if self._closed:
+            raise RuntimeError("AsyncTransliterator is closed")
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._worker = loop.create_task(self._run(self._queue))
+        future: asyncio.Future[str] = loop.create_future()
+
+        if self.timeout is None:
+            await self._queue.put((bengali, partial, future))
+            return await future
+
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._queue.put((bengali, partial, future)), self.timeout)
+            return await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            # The batcher skips cancelled futures, so a late result is dropped.
+            future.cancel()
+            _instrument.count("deadline_fallbacks")
+            return partial
+
+    def _correct_batch(self, bengali: List[str], partial: List[str]) -> List[str]:
+        # Runs on the executor, so storing results in SQLite does not block the loop.
+        corrected = self._corrector(bengali, partial)
+        record_corrections(bengali, partial, corrected, use_result_cache=self._use_result_cache)
+        return corrected
+
+    async def _run(self, queue: asyncio.Queue[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        batch: List[_Request] = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                batch = [request for request in batch if not request[2].done()]
+                if not batch:
+                    continue
+                bengali = [request[0] for request in batch]
+                partial = [request[1] for request in batch]
+                try:
+                    corrected = await loop.run_in_executor(self._executor, self._correct_batch, bengali, partial)
+                except Exception as error:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                    continue
+                for (_, _, future), output in zip(batch, corrected):
+                    if not future.done():
+                        future.set_result(output)
+        except asyncio.CancelledError:
+            # Cancelled by `aclose`, possibly while the batch is still in the
+            # executor: its callers get their partial transliteration instead
+            # of waiting forever, and the late result is dropped.
+            for _, partial_trans, future in batch:
+                if not future.done():
+                    future.set_result(partial_trans)
+            raise
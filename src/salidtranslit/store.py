@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+from .model import get_backend, get_decoding
+from .result_cache import default_fingerprint
+
+# Tables of a precomputed store, written by `salidtranslit.precompute`:
+#   meta (key, value): format version, fingerprint, correction mode
+#   sentences (text, value): corrected transliteration of each ambiguous sentence
+#   words (word, spelling, count): how often the model spelled each ambiguous word each way
+#   progress (input, documents): documents of each input corpus already processed
+format_version = 1
+
+schema = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS sentences (text TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS words (word TEXT NOT NULL, spelling TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (word, spelling))",
+    "CREATE TABLE IF NOT EXISTS progress (input TEXT PRIMARY KEY, documents INTEGER NOT NULL)",
+)
+
+class PrecomputedStore:
+    """
+    A read-only store of Bengali to Devanagari model corrections computed offline.
+
+    The store is an SQLite file built by `python -m salidtranslit.precompute`
+    from a corpus. It holds the corrected transliteration of every ambiguous
+    sentence of the corpus and, for every ambiguous word, how often the model
+    chose each spelling. Sentences are looked up whole; words resolve other
+    sentences like the lexicon does. The file is opened read-only, so any
+    number of processes can share it. It must have been built with the same
+    ScriptMap files and checkpoint contents as `default_fingerprint` sees, and
+    with the current decoding:backend correction mode, unless `fingerprint`
+    or `mode` give other ones to expect.
+
+    Attributes:
+        path (str): The store file.
+        min_count (int): Minimum number of observations for a word to be used.
+        min_confidence (float): Minimum share of observations the winning spelling needs.
+        hits (int): Sentence lookups answered by this process.
+        misses (int): Sentence lookups not found by this process.
+
+    The file is opened and checked on first use, not when the store is
+    created.
+
+    Raises:
+        ValueError: On first use, if the file does not exist, is not a
+            precomputed store, or was built with different ScriptMap files, a
+            different model checkpoint or a different correction mode.
+    """
+    def __init__(self, path: str, min_count: int = 1, min_confidence: float = 0.9, fingerprint: Optional[str] = None, mode: Optional[str] = None) -> None:
+        self.path: str = path
+        self.min_count: int = min_count
+        self.min_confidence: float = min_confidence
+        self.hits: int = 0
+        self.misses: int = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = fingerprint
+        self._mode: Optional[str] = mode
+        self._checked: bool = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked children, so each process opens its own.
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        import sqlite3
+        from urllib.parse import quote
+
+        if not os.path.exists(self.path):
+            raise ValueError(f"{self.path} does not exist")
+        uri = f"file:{quote(os.path.abspath(self.path))}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        if not self._checked:
+            try:
+                self._check(connection)
+            except BaseException:
+                connection.close()
+                raise
+            self._checked = True
+        self._connection, self._pid = connection, os.getpid()
+        return connection
+
+    def _check(self, connection: sqlite3.Connection) -> None:
+        # Runs on first use rather than in __init__, so creating a store reads
+        # neither the file nor the checkpoint.
+        import sqlite3
+
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.DatabaseError:
+            meta = {}
+        if meta.get("version") != str(format_version):
+            raise ValueError(f"{self.path} is not a version {format_version} SALIDtranslit precomputed store")
+        if meta.get("fingerprint") != (self._fingerprint or default_fingerprint()):
+            raise ValueError(f"{self.path} was built with different ScriptMap files or model checkpoint")
+        if meta.get("mode") != (self._mode or f"{get_decoding()}:{get_backend()}"):
+            raise ValueError(f"{self.path} was built with correction mode {meta.get('mode')!r}")
+
+    def meta(self) -> Dict[str, str]:
+        """
+        Returns the metadata the store was built with.
+        """
+        import sqlite3
+
+        with self._lock:
+            try:
+                return dict(self._connect().execute("SELECT key, value FROM meta").fetchall())
+            except sqlite3.DatabaseError:
+                return {}
+
+    def sentence(self, text: str) -> Optional[str]:
+        """
+        Returns the precomputed transliteration of a Bengali sentence, or None.
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM sentences WHERE text = ?", (text,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def lookup(self, word: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Finds a Bengali word in the store.
+
+        Args:
+            word (str): A Bengali word.
+
+        Returns:
+            Optional[Tuple[str, int, int]]: The most frequent Devanagari spelling,
+            how often it was observed and how often the word was observed in
+            total, or None.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT spelling, count FROM words WHERE word = ? ORDER BY count DESC, spelling", (word,)
+            ).fetchall()
+        if not rows:
+            return None
+        spelling, count = rows[0]
+        return spelling, count, sum(row[1] for row in rows)
+
+    def get(self, word: str) -> Optional[str]:
+        """
+        Returns the resolved spelling of a word if it is confident enough.
+
+        Args:
+            word (str): A Bengali word.
+
+        Returns:
+            Optional[str]: The resolved Devanagari spelling, or None.
+        """
+        entry = self.lookup(word)
+        if entry is None:
+            return None
+        resolved, count, total = entry
+        if count < self.min_count or count < self.min_confidence * total:
+            return None
+        return resolved
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the number of sentences and distinct words stored, and the
+        sentence hits, misses and hit rate of this process.
+        """
+        with self._lock:
+            connection = self._connect()
+            sentences = connection.execute("SELECT COUNT(*) FROM sentences").fetchone()[0]
+            words = connection.execute("SELECT COUNT(DISTINCT word) FROM words").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "sentences": sentences,
+            "words": words,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Closes this process's connection. The store reconnects on next use.
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+# Opened from SALIDTRANSLIT_PRECOMPUTED by the first `get_precomputed_store`
+# call, so importing the package opens no database.
+precomputed_store: Optional[PrecomputedStore] = None
+_from_environment: bool = True
+_environment_lock = threading.Lock()
+
+def get_precomputed_store() -> Optional[PrecomputedStore]:
+    """
+    Returns the precomputed store, creating it from the environment on first
+    use unless `set_precomputed_store` was called.
+    """
+    global precomputed_store, _from_environment
+    if _from_environment:
+        with _environment_lock:
+            if _from_environment:
+                path = os.environ.get("SALIDTRANSLIT_PRECOMPUTED")
+                if path:
+                    precomputed_store = PrecomputedStore(path)
+                _from_environment = False
+    return precomputed_store
+
+def set_precomputed_store(store: Optional[PrecomputedStore]) -> None:
+    """
+    Sets the precomputed store used by Bengali to Devanagari transliteration.
+    A store can also be loaded by setting SALIDTRANSLIT_PRECOMPUTED to its path.
+
+    Args:
+        store (Optional[PrecomputedStore]): The store, or None to disable it.
+    """
+    global precomputed_store, _from_environment
+    precomputed_store = store
+    _from_environment = False
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, Iterable, Iterator, Pattern, TextIO
+
+from . import reference
+from .core import ben_dev, ben_dev_batch
+from .transliterate import _resolve
+
+default_chunk_size: int = 1 << 16
+
+# The longest prefix of a byte range ending in a line break, or in ASCII
+# whitespace. Both bytes only occur in UTF-8 as the characters themselves,
+# never inside a multi-byte sequence.
+_line_prefix = re.compile(rb"(?s).*\n")
+_space_prefix = re.compile(rb"(?s).*[ \t\r\f\v]")
+
+def _safe_cut(buffer: str) -> int:
+    """
+    Finds where a buffer can be split without changing the transliteration.
+
+    No ScriptMap key contains whitespace and every scanner returns to its start
+    state after a whitespace character, so the text after one is transliterated
+    the same whether or not it starts a new chunk. Line breaks are preferred so
+    sentences stay whole for the Bengali to Devanagari corrector.
+
+    Args:
+        buffer (str): Buffered input text.
+
+    Returns:
+        int: Length of the prefix to transliterate now, or 0 if there is no safe split.
+    """
+    cut = buffer.rfind("\n")
+    if cut >= 0:
+        return cut + 1
+    for i in range(len(buffer) - 1, -1, -1):
+        if buffer[i].isspace():
+            return i + 1
+    return 0
+
+@lru_cache(maxsize=None)
+def _mapped_chars(source: str) -> FrozenSet[str]:
+    """
+    Returns every character that can take part in a trie match or a
+    conjunct when transliterating from `source`: the characters of its
+    ScriptMap keys and of its vowel and consonant classes, and those of the
+    Devanagari keys, which composed directions pass through.
+
+    Every other character is unmapped. It matches no key, is copied through
+    unchanged and leaves every scanner in its start state, so text after it
+    is transliterated the same whether or not it starts a new chunk.
+    """
+    tries = {"devanagari": reference.dev_trie, "bengali": reference.ben_trie, "iast": reference.iast_trie, "itrans": reference.itrans_trie}
+    classes = {"iast": reference.iast_vows | reference.iast_cons, "itrans": reference.itrans_vows | reference.itrans_cons}
+    keys = [key for key, _ in tries[source].items()] + [key for key, _ in reference.dev_trie.items()]
+    return frozenset("".join(keys) + "".join(classes.get(source, ())))
+
+def _unmapped_cut(buffer: str, limit: int, mapped: FrozenSet[str]) -> int:
+    """
+    Returns the length of the longest prefix of `buffer[:limit]` that ends in
+    an unmapped character, or 0 if there is none.
+    """
+    for i in range(min(limit, len(buffer)) - 1, -1, -1):
+        if buffer[i] not in mapped:
+            return i + 1
+    return 0
+
+@lru_cache(maxsize=None)
+def _unmapped_bytes(source: str) -> Pattern[bytes]:
+    # ASCII bytes only occur in UTF-8 as the characters themselves, so a byte
+    # class of the unmapped ASCII characters finds safe cuts without decoding.
+    mapped = _mapped_chars(source)
+    unmapped = bytes(c for c in range(128) if chr(c) not in mapped)
+    return re.compile(b"[" + re.escape(unmapped) + b"]")
+
+def _chunk_transliterator(source: str, target: str, batch_size: int) -> Callable[[str], str]:
+    """
+    Returns the function applied to each chunk.
+
+    Bengali to Devanagari chunks are split into lines so the corrector sees one
+    sentence per prompt and ambiguous lines are batched together.
+    """
+    func = _resolve(source, target)
+    if func is not ben_dev:
+        return func
+
+    def ben_dev_lines(chunk: str) -> str:
+        lines = chunk.split("\n")
+        return "\n".join(ben_dev_batch(lines, batch_size))
+    return ben_dev_lines
+
+def transliterate_stream(source: str, target: str, chunks: Iterable[str], chunk_size: int = default_chunk_size, max_buffer: int = 0, batch_size: int = 8) -> Iterator[str]:
+    """
+    Transliterates a stream of text pieces and yields the output incrementally.
+
+    Input is buffered until roughly `chunk_size` characters are available and
+    then split after the last line break (or other whitespace), so no trie match,
+    conjunct or inherent-vowel state spans two chunks. Input without whitespace
+    is split after the last unmapped character (e.g. a digit or punctuation
+    mark outside the ScriptMap keys) once `max_buffer` characters are
+    buffered, and buffered further if it has none. The concatenated output is
+    the same as transliterating the whole text at once, except that Bengali to
+    Devanagari corrects each line on its own.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        chunks (Iterable[str]): Pieces of the input text, of any size.
+        chunk_size (int): Target number of characters per transliterated chunk.
+        max_buffer (int): Buffered characters after which input without
+            whitespace is split at an unmapped character. Defaults to 16 * chunk_size.
+        batch_size (int): Maximum number of sentences per model call.
+
+    Yields:
+        str: Transliterated output, in order.
+
+    Raises:
+        ValueError: If the source or target script is not supported.
+    """
+    func = _chunk_transliterator(source, target, batch_size)
+    return _stream(func, chunks, chunk_size, max_buffer or 16 * chunk_size, _mapped_chars(source.lower().strip()))
+
+def _stream(func: Callable[[str], str], chunks: Iterable[str], chunk_size: int, max_buffer: int, mapped: FrozenSet[str]) -> Iterator[str]:
+    buffer = ""
+    for piece in chunks:
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            cut = _safe_cut(buffer)
+            if cut == 0 and len(buffer) >= max_buffer:
+                cut = _unmapped_cut(buffer, max_buffer, mapped)
+            if cut == 0:
+                break
+            yield func(buffer[:cut])
+            buffer = buffer[cut:]
+    if buffer:
+        yield func(buffer)
+
+def transliterate_file(source: str, target: str, infile: TextIO, outfile: TextIO, chunk_size: int = default_chunk_size, batch_size: int = 8) -> None:
+    """
+    Transliterates a text file to another in constant memory.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        infile (TextIO): Input file opened in text mode.
+        outfile (TextIO): Output file opened in text mode.
+        chunk_size (int): Number of characters read at a time.
+        batch_size (int): Maximum number of sentences per model call.
+
+    Raises:
+        ValueError: If the source or target script is not supported.
+    """
+    reads = iter(lambda: infile.read(chunk_size), "")
+    for output in transliterate_stream(source, target, reads, chunk_size, batch_size=batch_size):
+        outfile.write(output)
+
+def _safe_byte_cut(view: Any, start: int, end: int, limit: int, unmapped: Pattern[bytes]) -> int:
+    """
+    Byte form of `_safe_cut` for `view[start:]`: splits after the last line
+    break (or other whitespace) before `end`, then before `limit` as
+    `_stream` does once its buffer fills. Failing that, splits after the last
+    unmapped ASCII character before `limit`, or else after the first one past
+    it, or at the end of the view.
+    """
+    for stop in (end, limit):
+        for pattern in (_line_prefix, _space_prefix):
+            match = pattern.match(view, start, stop)
+            if match is not None:
+                return match.end()
+    cut = 0
+    for match in unmapped.finditer(view, start, limit):
+        cut = match.end()
+    if cut:
+        return cut
+    match = unmapped.search(view, limit)
+    return len(view) if match is None else match.end()
+
+def transliterate_buffer(source: str, target: str, data: Any, out: bytearray, chunk_size: int = default_chunk_size, batch_size: int = 8) -> int:
+    """
+    Transliterates UTF-8 text held in a buffer into a bytearray.
+
+    `data` may be any object supporting the buffer protocol, such as bytes, a
+    memoryview of a network buffer or an mmap of a file. It is split into
+    chunks of about `chunk_size` bytes at line breaks (or other whitespace) as
+    in `transliterate_stream`, and each chunk is decoded straight from the
+    buffer, transliterated as a whole and written into `out` from the start,
+    in place while `out` is long enough and growing it otherwise. No bytes
+    copy of the input or string per line is made, and a buffer sized once can
+    be reused across calls.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        data (Any): UTF-8 encoded input text.
+        out (bytearray): Output buffer. Bytes past the returned length are left as they were.
+        chunk_size (int): Target number of bytes per transliterated chunk.
+        batch_size (int): Maximum number of sentences per model call.
+
+    Returns:
+        int: Number of UTF-8 bytes written to `out`.
+
+    Raises:
+        ValueError: If the source or target script is not supported.
+        UnicodeDecodeError: If `data` is not valid UTF-8.
+
+    Example:
+        >>> out = bytearray(64)
+        >>> n = transliterate_buffer("iast", "bengali", "viśva".encode(), out)
+        >>> out[:n].decode()
+        'বিশ্ব'
+    """
+    func = _chunk_transliterator(source, target, batch_size)
+    unmapped = _unmapped_bytes(source.lower().strip())
+    start = written = 0
+    # Views are released on exit so that an mmap can be closed afterwards.
+    with memoryview(data) as raw, raw.cast("B") as view:
+        size = len(view)
+        while start < size:
+            end = size
+            if size - start > chunk_size:
+                end = _safe_byte_cut(view, start, start + chunk_size, min(start + 16 * chunk_size, size), unmapped)
+            output = func(str(view[start:end], "utf-8")).encode("utf-8")
+            out[written:written + len(output)] = output
+            written += len(output)
+            start = end
+    return written
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .trie import CompiledTrie
+
+# Keys starting with a nukta are never matched by the trie scanners.
+_nuktas = ("़", "়")
+
+class Step(NamedTuple):
+    """
+    What a transducer does on one input class in one state.
+
+    Attributes:
+        next (str): The state after this step.
+        before (str): Text emitted before the token, matched or not.
+        joiner (str): Text emitted between `before` and a matched token's output.
+        part (Optional[int]): Element of the token's representation to emit, or
+            None for the whole representation.
+        literal (Optional[str]): Emit this and consume one character without a
+            trie search.
+        drop (bool): Emit nothing for an unmatched character instead of the character.
+    """
+    next: str
+    before: str = ""
+    joiner: str = ""
+    part: Optional[int] = None
+    literal: Optional[str] = None
+    drop: bool = False
+
+# Built as a list indexed by state, of lists indexed by class.
+_Entry = Tuple[int, str, str, Optional[int], Optional[str], bool]
+
+class Transducer:
+    """
+    A table-driven finite-state transducer over longest trie matches.
+
+    Each input character (or two-character sequence, if `pairs` is set) is mapped
+    to an input class with one dict lookup. The (state, class) table then gives
+    the next state and how to emit the token, and the trie gives the token's
+    representation. The table is built once from a rule function, so a script
+    pair is described by its character classes, states and rules rather than
+    by its own scanning loop.
+
+    Args:
+        trie (CompiledTrie): Trie of the source script.
+        index (int): Element of each representation list the target uses.
+        classes (Sequence[Tuple[str, Iterable[str]]]): Input classes and their
+            characters, in priority order. Unlisted characters are "other".
+        states (Sequence[str]): State names; the first is the start state.
+        rule (Callable[[str, str], Step]): Maps (state, class) to a Step.
+        final (Dict[str, str]): Text emitted at the end of input per final state.
+        pairs (bool): Also classify two-character sequences listed in `classes`.
+            A sequence's class is the higher priority of its own and its first
+            character's.
+    """
+    def __init__(self, trie: CompiledTrie, index: int, classes: Sequence[Tuple[str, Iterable[str]]], states: Sequence[str], rule: Callable[[str, str], Step], final: Dict[str, str], pairs: bool = False) -> None:
+        names = [name for name, _ in classes] + ["other"]
+        other = len(names) - 1
+        self._classes: Dict[str, int] = {}
+        multi: Dict[str, int] = {}
+        for cls, (_, chars) in enumerate(classes):
+            for char in chars:
+                target = self._classes if len(char) == 1 else multi
+                target.setdefault(char, cls)
+        self._pairs: Optional[Dict[str, int]] = None
+        self._pair_starts: FrozenSet[str] = frozenset()
+        if pairs:
+            self._pairs = {
+                pair: min(cls, self._classes.get(pair[0], other))
+                for pair, cls in multi.items() if len(pair) == 2
+            }
+            self._pair_starts = frozenset(pair[0] for pair in self._pairs)
+
+        self._table: List[List[_Entry]] = []
+        for state in states:
+            row = []
+            for name in names:
+                step = rule(state, name)
+                row.append((states.index(step.next), step.before, step.joiner, step.part, step.literal, step.drop))
+            self._table.append(row)
+        self._final = [final.get(state, "") for state in states]
+        self._other = other
+        self._transitions, self._terminals = trie.tables()
+        self._root = {char: node for char, node in self._transitions[0].items() if char not in _nuktas}
+        self._index = index
+
+    @property
+    def token_local(self) -> bool:
+        """
+        Whether every token is one character and classes never look ahead, so
+        that running the transducer over consecutive pieces of a text, carrying
+        the state, gives the same output as running it over the whole text.
+        """
+        return self._pairs is None and all(not transitions for transitions in self._transitions[1:])
+
+    def __call__(self, text: str) -> str:
+        output: List[str] = []
+        state = self.run(text, 0, output.append)
+        output.append(self._final[state])
+        return "".join(output)
+
+    def run(self, text: str, state: int, emit: Callable[[str], None]) -> int:
+        """
+        Transduces `text` starting in `state`, passing each output piece to `emit`.
+        The final output is not emitted.
+
+        Returns:
+            int: The state after the last character.
+        """
+        append = emit
+        table, classes, pairs = self._table, self._classes, self._pairs
+        pair_starts = self._pair_starts
+        other, index = self._other, self._index
+        # The trie walk is inlined: this loop runs once per token.
+        transitions, terminals = self._transitions, self._terminals
+        root = self._root
+        i, n = 0, len(text)
+        while i < n:
+            char = text[i]
+            cls = classes.get(char, other)
+            if pairs is not None and char in pair_starts:
+                cls = pairs.get(text[i:i + 2], cls)
+            state, before, joiner, part, literal, drop = table[state][cls]
+            if literal is not None:
+                append(before + literal)
+                i += 1
+                continue
+
+            rep = None
+            node = root.get(char)
+            if node is not None:
+                rep = terminals[node]
+                end = j = i + 1
+                while j < n:
+                    node = transitions[node].get(text[j])
+                    if node is None:
+                        break
+                    j += 1
+                    if terminals[node] is not None:
+                        rep, end = terminals[node], j
+            if rep is None:
+                append(before if drop else before + char)
+                i += 1
+            else:
+                rep = rep[index]
+                append(before + joiner + (rep if part is None else rep[part]))
+                i = end
+        return state
+
+    def final(self, state: int) -> str:
+        """
+        Returns the text emitted at the end of input in `state`.
+        """
+        return self._final[state]
+
+class Composed:
+    """
+    Two transducers precomposed into one pass over the input.
+
+    The composed machine's state is the pair of both states. For each trie key
+    of the first transducer and each (first state, input class, second state),
+    the second transducer's output on the first's output piece, and its next
+    state, are computed once, the first time that key is seen. After that a
+    token costs the same as in the first transducer alone, and the
+    intermediate text is never built. Because the second transducer is
+    token-local, the output is the same as `second(first(text))`.
+
+    Args:
+        first (Transducer): Source to pivot.
+        second (Transducer): Pivot to target. Must be `token_local`.
+
+    Raises:
+        ValueError: If `second` is not token-local.
+    """
+    def __init__(self, first: Transducer, second: Transducer) -> None:
+        if not second.token_local:
+            raise ValueError("The second transducer must be token-local")
+        self._first = first
+        self._second = second
+        self._n_classes = first._other + 1
+        self._n_second = len(second._final)
+        n_combos = len(first._table) * self._n_classes * self._n_second
+        # Per trie state of the first transducer, the (output, next second state)
+        # of every combination, or None until the key is first matched.
+        self._keys: List[Optional[List[Tuple[str, int]]]] = [None] * len(first._terminals)
+        self._unmatched: Dict[Tuple[int, str], Tuple[str, int]] = {}
+        self._literals: List[Optional[Tuple[str, int]]] = [None] * n_combos
+        self._ends: Dict[Tuple[int, int], str] = {}
+
+    def _combos(self):
+        for s1, row in enumerate(self._first._table):
+            for cls, entry in enumerate(row):
+                for s2 in range(self._n_second):
+                    yield s1, cls, entry, s2
+
+    def _second_step(self, piece: str, state: int) -> Tuple[str, int]:
+        pieces: List[str] = []
+        state = self._second.run(piece, state, pieces.append)
+        return "".join(pieces), state
+
+    def _key_row(self, key_state: int) -> List[Tuple[str, int]]:
+        rep = self._first._terminals[key_state][self._first._index]
+        row = []
+        for _, _, (_, before, joiner, part, _, _), s2 in self._combos():
+            row.append(self._second_step(before + joiner + (rep if part is None else rep[part]), s2))
+        self._keys[key_state] = row
+        return row
+
+    def __call__(self, text: str) -> str:
+        first = self._first
+        output: List[str] = []
+        append = output.append
+        table, classes, pairs = first._table, first._classes, first._pairs
+        pair_starts = first._pair_starts
+        transitions, terminals, root = first._transitions, first._terminals, first._root
+        other, n_classes, n_second = first._other, self._n_classes, self._n_second
+        keys, literals, unmatched = self._keys, self._literals, self._unmatched
+        s1 = s2 = 0
+        i, n = 0, len(text)
+        while i < n:
+            char = text[i]
+            cls = classes.get(char, other)
+            if pairs is not None and char in pair_starts:
+                cls = pairs.get(text[i:i + 2], cls)
+            combo = (s1 * n_classes + cls) * n_second + s2
+            s1, before, joiner, part, literal, drop = table[s1][cls]
+            if literal is not None:
+                step = literals[combo]
+                if step is None:
+                    step = literals[combo] = self._second_step(before + literal, s2)
+                append(step[0])
+                s2 = step[1]
+                i += 1
+                continue
+
+            key_state = None
+            node = root.get(char)
+            if node is not None:
+                if terminals[node] is not None:
+                    key_state = node
+                end = j = i + 1
+                while j < n:
+                    node = transitions[node].get(text[j])
+                    if node is None:
+                        break
+                    j += 1
+                    if terminals[node] is not None:
+                        key_state, end = node, j
+            if key_state is None:
+                step = unmatched.get((combo, char))
+                if step is None:
+                    step = unmatched[(combo, char)] = self._second_step(before if drop else before + char, s2)
+                i += 1
+            else:
+                row = keys[key_state] or self._key_row(key_state)
+                step = row[combo]
+                i = end
+            append(step[0])
+            s2 = step[1]
+
+        tail = self._ends.get((s1, s2))
+        if tail is None:
+            out, state = self._second_step(first.final(s1), s2)
+            tail = self._ends[(s1, s2)] = out + self._second.final(state)
+        append(tail)
+        return "".join(output)
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+from functools import lru_cache, partial
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .backends import available_backends
+from .cache import WordCache
 from .core import (
     ben_dev, ben_iast, ben_itrans,
     dev_ben, dev_iast, dev_itrans,
-    iast_dev, iast_ben,
-    itrans_dev, itrans_ben
+    iast_dev, iast_ben, iast_itrans,
+    itrans_dev, itrans_ben, itrans_iast,
+    ben_dev_segments, _correct_pieces
 )
+from .model import Corrector, correct_transliterations, get_decoding, get_model
 
 def transliterate(source: str, target: str, text: str) -> str:
     """
@@ -32,36 +39,181 @@ def transliterate(source: str, target: str, text: str) -> str:
         >>> transliterate("iast", "bengali", "viśva")
         'বিশ্ব'
     """
-    source, target = source.lower().strip(), target.lower().strip()
+    return _default_transliterator(source, target)(text)
+
+def transliterate_batch(source: str, target: str, texts: Iterable[str], batch_size: int = 8) -> List[str]:
+    """
+    Transliterates many strings from the `source` script to the `target` script.
+
+    For Bengali to Devanagari, the trie pass runs over every input first and only
+    the ambiguous sentences are sent to the mT5 model, in padded batches sorted by
+    length. Each output is identical to what `transliterate` returns for that input.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        texts (Iterable[str]): The input texts to transliterate.
+        batch_size (int): Maximum number of sentences per model call.
+
+    Returns:
+        List[str]: The transliterated strings, in input order.
+
+    Raises:
+        ValueError: If the source or target script is not supported.
+
+    Example:
+        >>> transliterate_batch("iast", "bengali", ["viśva", "bhakti"])
+        ['বিশ্ব', 'ভক্তি']
+    """
+    return Transliterator(source, target, batch_size=batch_size).batch(texts)
+
+class Transliterator:
+    """
+    Transliterates from one script to another with options fixed per instance.
+
+    The script pair is validated and its transliteration function looked up
+    once, so a call costs little more than the transliteration itself, which
+    matters for many short texts. The options only affect Bengali to
+    Devanagari. An instance keeps no per-call state and can be shared across
+    threads: its word cache is locked, and models are loaded once under a lock.
+
+    Args:
+        source (str): The source script name (e.g. "devanagari", "iast").
+        target (str): The target script name (e.g. "bengali", "itrans").
+        trie_only (Optional[bool]): Whether to skip the mT5 corrector. Defaults
+            to the global setting of `set_trie_only`, which also keeps the model
+            from loading at all.
+        batch_size (int): Maximum number of sentences per model call.
+        word_cache_size (Optional[int]): Size of a word cache of this instance's
+            own, 0 for none. Defaults to the shared word cache.
+        backend (Optional[str]): Backend of the model used for corrections.
+            Defaults to the one chosen with `set_backend`.
+        corrector (Optional[Corrector]): Batch corrector to use instead of the model.
 
-    accepted = {"bengali", "devanagari", "iast", "itrans"}
-    roman = {"iast", "itrans"}
+    Raises:
+        ValueError: If the source or target script is not supported, the
+            backend is not registered or `batch_size` is not positive.
+
+    Example:
+        >>> to_bengali = Transliterator("iast", "bengali")
+        >>> to_bengali("viśva")
+        'বিশ্ব'
+        >>> list(to_bengali.map(["viśva", "bhakti"]))
+        ['বিশ্ব', 'ভক্তি']
+    """
+    def __init__(self, source: str, target: str, trie_only: Optional[bool] = None, batch_size: int = 8, word_cache_size: Optional[int] = None, backend: Optional[str] = None, corrector: Optional[Corrector] = None) -> None:
+        func = _resolve(source, target)
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        if backend is not None and backend not in available_backends():
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {available_backends()}")
+        self.source: str = source.lower().strip()
+        self.target: str = target.lower().strip()
+        self.trie_only: Optional[bool] = trie_only
+        self.batch_size: int = batch_size
+        self.word_cache: Optional[WordCache] = None if word_cache_size is None else WordCache(word_cache_size)
+        self.backend: Optional[str] = backend
+        # Results of a custom corrector are not the model's, so they stay out of
+        # the persistent result cache that other processes read.
+        self._use_result_cache = corrector is None
+        if corrector is None and backend is not None:
+            corrector = partial(_backend_corrector, backend, batch_size)
+        self._corrector = corrector
+        self._ben_dev = func is ben_dev
+        self._func: Callable[[str], str] = self._transliterate_ben_dev if self._ben_dev else func
+
+    def __call__(self, text: str) -> str:
+        """
+        Transliterates one string.
+        """
+        return self._func(text)
+
+    def map(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        Transliterates strings lazily, yielding the outputs in order. Bengali to
+        Devanagari inputs are read and corrected `batch_size` at a time.
+        """
+        if not self._ben_dev:
+            return map(self._func, texts)
+        return self._map_batches(iter(texts))
+
+    def batch(self, texts: Iterable[str]) -> List[str]:
+        """
+        Transliterates many strings like `transliterate_batch`.
+        """
+        if not self._ben_dev:
+            return list(map(self._func, texts))
+        mode = self._mode()
+        return self._correct([ben_dev_segments(text, self.trie_only, self.word_cache, mode, self._use_result_cache) for text in texts], mode)
+
+    def _map_batches(self, texts: Iterator[str]) -> Iterator[str]:
+        while True:
+            chunk = list(islice(texts, self.batch_size))
+            if not chunk:
+                return
+            yield from self.batch(chunk)
+
+    def _transliterate_ben_dev(self, text: str) -> str:
+        mode = self._mode()
+        return self._correct([ben_dev_segments(text, self.trie_only, self.word_cache, mode, self._use_result_cache)], mode)[0]
+
+    def _mode(self) -> Optional[str]:
+        """
+        Names the corrector configuration of this instance's results, or None
+        for that of the shared model.
+        """
+        return None if self.backend is None else f"{get_decoding()}:{self.backend}"
+
+    def _correct(self, documents: List[List[Tuple[str, str, bool]]], mode: Optional[str]) -> List[str]:
+        return _correct_pieces(documents, self.batch_size, self._corrector, self.word_cache, mode, self._use_result_cache)
+
+def _backend_corrector(backend: str, batch_size: int, bengali: Sequence[str], partial_trans: Sequence[str]) -> List[str]:
+    """
+    Corrects a batch with the model loaded with `backend`.
+    """
+    model, tokenizer = get_model(backend)
+    return correct_transliterations(bengali, partial_trans, model, tokenizer, batch_size)
+
+@lru_cache(maxsize=64)
+def _default_transliterator(source: str, target: str) -> Transliterator:
+    """
+    Returns the Transliterator with default options for a script pair, keyed
+    on the names as given so that repeated calls skip normalizing them.
+    """
+    return Transliterator(source, target)
+
+_directions: Dict[str, Dict[str, Callable[[str], str]]] = {
+    "bengali": {
+        "devanagari": ben_dev,
+        "iast": ben_iast,
+        "itrans": ben_itrans,
+    },
+    "devanagari": {
+        "bengali": dev_ben,
+        "iast": dev_iast,
+        "itrans": dev_itrans,
+    },
+    "iast": {
+        "devanagari": iast_dev,
+        "bengali": iast_ben,
+        "itrans": iast_itrans,
+    },
+    "itrans": {
+        "devanagari": itrans_dev,
+        "bengali": itrans_ben,
+        "iast": itrans_iast,
+    },
+}
+
+def _resolve(source: str, target: str) -> Callable[[str], str]:
+    """
+    Validates a script pair and returns the function that transliterates it.
+    """
+    source, target = source.lower().strip(), target.lower().strip()
 
-    if source not in accepted or target not in accepted:
+    if source not in _directions or target not in _directions:
         raise ValueError("Unrecognized input")
-    elif source == target or (source in roman and target in roman):
+    elif source == target:
         raise ValueError("Invalid input combination")
 
-    if source == "bengali":
-        return {
-            "devanagari": ben_dev,
-            "iast": ben_iast,
-            "itrans": ben_itrans,
-        }[target](text)
-    if source == "devanagari":
-        return {
-            "bengali": dev_ben,
-            "iast": dev_iast,
-            "itrans": dev_itrans,
-        }[target](text)
-    if source == "iast":
-        return {
-            "devanagari": iast_dev,
-            "bengali": iast_ben,
-        }[target](text)
-    if source == "itrans":
-        return {
-            "devanagari": itrans_dev,
-            "bengali": itrans_ben,
-        }[target](text)
-    return text
\ No newline at end of file
+    return _directions[source][target]
@@ -9,6 +9,8 @@ class TrieNode:
         end_of_term (bool): Flag indicating whether this node terminates a valid key.
         rep (List[str]): Representation list associated with the key.
     """
+    __slots__ = ("children", "end_of_term", "rep")
+
     def __init__(self) -> None:
         self.children: Dict[str, TrieNode] = {}
         self.end_of_term: bool = False
@@ -22,8 +24,8 @@ class Trie:
         insert(key: str, rep_list: List[str]) -> None:
             Inserts a key with its representation list into the trie.
 
-        searchLongestMatch(key: str) -> Tuple[Optional[TrieNode], int]:
-            Searches for the longest matching prefix in the trie.
+        searchLongestMatch(key: str, start: int = 0) -> Tuple[Optional[TrieNode], int]:
+            Searches for the longest matching prefix of key[start:] in the trie.
     """
     def __init__(self) -> None:
         self.root: TrieNode = TrieNode()
@@ -44,12 +46,13 @@ class Trie:
         curr.end_of_term = True
         curr.rep = rep_list
 
-    def searchLongestMatch(self, key: str) -> Tuple[Optional[TrieNode], int]:
+    def searchLongestMatch(self, key: str, start: int = 0) -> Tuple[Optional[TrieNode], int]:
         """
         Search for the longest matching prefix in the Trie.
 
         Args:
             key (str): The input string to match.
+            start (int): Offset into `key` where the match begins.
 
         Returns:
             Tuple[Optional[TrieNode], int]: The TrieNode of the longest match and its length.
@@ -58,15 +61,123 @@ class Trie:
         longest_match: Optional[TrieNode] = None
         match_len: int = 0
 
-        if key and key[0] in ("়", "़"):  # Nukta handling
+        if start < len(key) and key[start] in ("়", "़"):  # Nukta handling
             return longest_match, match_len
 
-        for i, c in enumerate(key):
+        for i in range(start, len(key)):
+            c = key[i]
             if c not in curr.children:
                 break
             curr = curr.children[c]
             if curr.end_of_term:
                 longest_match = curr
-                match_len = i + 1
+                match_len = i - start + 1
+
+        return longest_match, match_len
+
+class CompiledTrie:
+    """
+    A read-only Trie compiled into flat transition tables.
+
+    States are numbered from 0 (the root). `_transitions[state]` maps a character
+    to the next state and `_terminals[state]` holds the TrieNode of a complete key
+    (or None), so a search step is a list index and one small dict lookup instead
+    of walking TrieNode objects.
+
+    Methods:
+        searchLongestMatch(key: str, start: int = 0) -> Tuple[Optional[TrieNode], int]:
+            Searches for the longest matching prefix, with the same results as Trie.
+    """
+    def __init__(self, source: Trie) -> None:
+        self._transitions: List[Dict[str, int]] = []
+        self._terminals: List[Optional[TrieNode]] = []
+
+        stack = [(source.root, self._add_state(source.root))]
+        while stack:
+            node, state = stack.pop()
+            for c, child in node.children.items():
+                child_state = self._add_state(child)
+                self._transitions[state][c] = child_state
+                stack.append((child, child_state))
+        self._root: Dict[str, int] = self._transitions[0]
+
+    def _add_state(self, node: TrieNode) -> int:
+        self._transitions.append({})
+        self._terminals.append(node if node.end_of_term else None)
+        return len(self._terminals) - 1
+
+    def tables(self) -> Tuple[List[Dict[str, int]], List[Optional[List[str]]]]:
+        """
+        Returns the transition table and the representation list of each
+        terminal state (None for other states), for serialization.
+        """
+        return self._transitions, [None if node is None else node.rep for node in self._terminals]
+
+    def items(self) -> List[Tuple[str, List[str]]]:
+        """
+        Returns every (key, representation list) pair stored in the trie.
+        """
+        pairs = []
+        stack = [("", 0)]
+        while stack:
+            prefix, state = stack.pop()
+            node = self._terminals[state]
+            if node is not None:
+                pairs.append((prefix, node.rep))
+            for c, child_state in self._transitions[state].items():
+                stack.append((prefix + c, child_state))
+        return pairs
+
+    @classmethod
+    def from_tables(cls, transitions: List[Dict[str, int]], reps: List[Optional[List[str]]]) -> "CompiledTrie":
+        """
+        Rebuilds a CompiledTrie from the output of `tables` without a source Trie.
+        """
+        compiled = cls.__new__(cls)
+        compiled._transitions = transitions
+        compiled._terminals = []
+        for rep in reps:
+            node = None
+            if rep is not None:
+                node = TrieNode()
+                node.end_of_term = True
+                node.rep = rep
+            compiled._terminals.append(node)
+        compiled._root = transitions[0]
+        return compiled
+
+    def searchLongestMatch(self, key: str, start: int = 0) -> Tuple[Optional[TrieNode], int]:
+        """
+        Search for the longest matching prefix in the compiled Trie.
+
+        Args:
+            key (str): The input string to match.
+            start (int): Offset into `key` where the match begins.
+
+        Returns:
+            Tuple[Optional[TrieNode], int]: The TrieNode of the longest match and its length.
+        """
+        n = len(key)
+        if start >= n or key[start] in ("়", "़"):  # Nukta handling
+            return None, 0
+
+        state = self._root.get(key[start])
+        if state is None:
+            return None, 0
+
+        transitions = self._transitions
+        terminals = self._terminals
+        longest_match = terminals[state]
+        match_len = 0 if longest_match is None else 1
+        i = start + 1
+        while i < n:
+            state = transitions[state].get(key[i])
+            if state is None:
+                break
+            i += 1
+            node = terminals[state]
+            if node is not None:
+                longest_match = node
+                match_len = i - start
 
-        return longest_match, match_len
\ No newline at end of file
+        return longest_match, match_len
@@ -31,6 +31,8 @@ def test_dev_trans(devanagari_text: str, bengali_text: str, iast_text: str, itra
     assert salidtranslit.transliterate("Devanagari", "ITRANS", devanagari_text) == itrans_text
     assert salidtranslit.transliterate("IAST", "Devanagari", iast_text) == devanagari_text
     assert salidtranslit.transliterate("ITRANS", "Devanagari", itrans_text) == devanagari_text
+    assert salidtranslit.transliterate("IAST", "ITRANS", iast_text) == itrans_text
+    assert salidtranslit.transliterate("ITRANS", "IAST", itrans_text) == iast_text
 
 @pytest.mark.parametrize(
     "bengali_text, devanagari_text, iast_text, itrans_text",
@@ -60,4 +62,838 @@ def test_ben_trans(bengali_text: str, devanagari_text: str, iast_text: str, itra
     assert salidtranslit.transliterate("Bengali", "IAST", bengali_text) == iast_text
     assert salidtranslit.transliterate("Bengali", "ITRANS", bengali_text) == itrans_text
     assert salidtranslit.transliterate("IAST", "Bengali", iast_text) == bengali_text
-    assert salidtranslit.transliterate("ITRANS", "Bengali", itrans_text) == bengali_text
\ No newline at end of file
+    assert salidtranslit.transliterate("ITRANS", "Bengali", itrans_text) == bengali_text
+
+def test_import_is_lazy(tmp_path) -> None:
+    """
+    Tests that importing the package does not import torch or transformers,
+    and opens the result cache and precomputed store only on first use.
+    """
+    import os
+    import subprocess
+    import sys
+
+    probe = "import sys, salidtranslit; print(any(m in sys.modules for m in ('torch', 'transformers')))"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+    path = tmp_path / "results.sqlite"
+    env = dict(os.environ, SALIDTRANSLIT_RESULT_CACHE=str(path), SALIDTRANSLIT_PRECOMPUTED=str(tmp_path / "missing.sqlite"))
+    probe = "import os, salidtranslit; from salidtranslit import result_cache; print(os.path.exists(os.environ['SALIDTRANSLIT_RESULT_CACHE']), result_cache.get_result_cache() is not None)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, env=env)
+    assert result.stdout.split() == ["False", "True"]
+
+def test_trie_only() -> None:
+    """
+    Tests that trie-only mode returns the partial transliteration without loading the model.
+    """
+    from salidtranslit import model
+
+    previous = model.is_trie_only()
+    salidtranslit.set_trie_only(True)
+    try:
+        assert salidtranslit.transliterate("Bengali", "Devanagari", "বারো ধ্বনি") == "बारो ध्वनि"
+        assert not model.is_model_loaded()
+    finally:
+        salidtranslit.set_trie_only(previous)
+
+def test_transliterate_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that batched transliteration sends only ambiguous sentences to the
+    corrector and returns the same outputs as the per-sentence path, in order.
+    """
+    from salidtranslit import cache, core, lexicon
+
+    sent = []
+    def fake_correct(bengali, partial, model, tokenizer):
+        return partial.replace("ब", "व", 1)
+    def fake_correct_batch(bengali, partial, model, tokenizer, batch_size=8):
+        sent.extend(bengali)
+        return [fake_correct(b, p, model, tokenizer) for b, p in zip(bengali, partial)]
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "get_model", lambda: (None, None))
+    monkeypatch.setattr(core, "correct_transliteration", fake_correct)
+    monkeypatch.setattr(core, "correct_transliterations", fake_correct_batch)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    texts = ["বিশ্ব", "ভক্তি", "বারো", "চরণধ্বনি", "বসন্ত"]
+    expected = [salidtranslit.transliterate("Bengali", "Devanagari", t) for t in texts]
+    assert salidtranslit.transliterate_batch("Bengali", "Devanagari", texts, batch_size=2) == expected
+    assert sent == ["বিশ্ব", "বারো", "বসন্ত"]
+    assert salidtranslit.transliterate_batch("IAST", "Bengali", ["viśva", "bhakti"]) == ["বিশ্ব", "ভক্তি"]
+
+def test_transliterator(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that a Transliterator matches `transliterate`, keeps its options to
+    itself and can be shared across threads.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from salidtranslit import cache, core, lexicon
+
+    to_iast = salidtranslit.Transliterator(" Devanagari", "IAST ")
+    texts = ["विश्व", "चरणध्वनि", "भक्ति विश्व"] * 50
+    expected = [salidtranslit.transliterate("Devanagari", "IAST", text) for text in texts]
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(to_iast, texts)) == expected
+    assert list(to_iast.map(iter(texts))) == to_iast.batch(texts) == expected
+    with pytest.raises(ValueError):
+        salidtranslit.Transliterator("IAST", "IAST")
+    with pytest.raises(ValueError):
+        salidtranslit.Transliterator("Bengali", "Devanagari", backend="missing")
+
+    batches = []
+    def fake_corrector(bengali, partial):
+        batches.append(list(bengali))
+        return [p.replace("बि", "वि") for p in partial]
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+    to_dev = salidtranslit.Transliterator("Bengali", "Devanagari", batch_size=2, word_cache_size=10, corrector=fake_corrector)
+    assert to_dev("বিশ্ব বারো") == "विश्व बारो"
+    assert list(to_dev.map(["বারো বিশ্ব।", "ভক্তি", "বিকাশ"])) == ["बारो विश्व।", "भक्ति", "विकाश"]
+    assert batches == [["বিশ্ব বারো"], ["বিকাশ"]]
+    assert to_dev.word_cache.stats()["hits"] == 2 and len(cache.word_cache) == 0
+    assert salidtranslit.Transliterator("Bengali", "Devanagari", trie_only=True)("বিশ্ব") == "बिश्व"
+
+def test_segmentation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that long inputs are split into bounded sentences, that only the
+    ambiguous ones reach the corrector, in one batch, and that the output is
+    stitched back together around the original whitespace.
+    """
+    from salidtranslit import cache, core, lexicon, segment
+
+    assert segment.segment_spans("এক। দুই\nতিন") == [(0, 3), (4, 7), (8, 11)]
+    words = " ".join(["বিশ্ব"] * 30)
+    spans = segment.segment_spans(words, 20)
+    assert max(end - start for start, end in spans) <= 20
+    assert " ".join(words[start:end] for start, end in spans) == words
+
+    batches = []
+    def fake_correct_batch(bengali, partial, model, tokenizer, batch_size=8):
+        batches.append(list(bengali))
+        return [p.replace("ब", "व", 1) for p in partial]
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "get_model", lambda: (None, None))
+    monkeypatch.setattr(core, "correct_transliterations", fake_correct_batch)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    text = "বিশ্ব বারো।\n  কুসুম\nবসন্ত হসিত। "
+    assert salidtranslit.transliterate("Bengali", "Devanagari", text) == "विश्व बारो।\n  कुसुम\nवसन्त हसित। "
+    assert batches == [["বিশ্ব বারো।", "বসন্ত হসিত।"]]
+
+def test_word_cache(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """
+    Tests that the word cache learns from model corrections, resolves later
+    sentences without the model, evicts least recently used words and persists.
+    """
+    from salidtranslit import cache, core, lexicon
+
+    calls = []
+    def fake_correct(bengali, partial, model, tokenizer):
+        calls.append(bengali)
+        return partial.replace("बि", "वि")
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "get_model", lambda: (None, None))
+    monkeypatch.setattr(core, "correct_transliteration", fake_correct)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=2))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব বারো") == "विश्व बारो"
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বারো, বিশ্ব।") == "बारो, विश्व।"
+    assert calls == ["বিশ্ব বারো"]
+    assert cache.word_cache.stats()["hits"] == 2
+
+    cache.word_cache.put("বসন্ত", "वसन्त")
+    assert cache.word_cache.stats()["evictions"] == 1
+    assert cache.word_cache.get("বারো") is None
+
+    path = str(tmp_path / "words.json")
+    cache.word_cache.save(path)
+    assert cache.WordCache(path=path).get("বসন্ত") == "वसन्त"
+
+def test_lexicon(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """
+    Tests that the lexicon is built from aligned CSV columns and resolves
+    ambiguous words before the model is called.
+    """
+    from salidtranslit import cache, core, lexicon
+
+    csv_path = tmp_path / "corpus.csv"
+    csv_path.write_text(
+        "bengali,partial_trans,correct_trans\n"
+        "বিশ্ব বারো,बिश्व बारो,विश्व बारो\n"
+        "বিশ্ব,बिश्व,विश्व\n"
+        "বিশ্ব,बिश्व,बिश्व\n"
+        "বসন্ত বিশ্ব,बसन्त बिश्व,वसन्त विश्व\n",
+        encoding="utf-8",
+    )
+    # The last row is in the held-out split, so only "all" counts it.
+    assert lexicon.is_held_out("বসন্ত বিশ্ব")
+    assert lexicon.build_lexicon(str(csv_path), str(tmp_path / "all.bin"), split="all") == 3
+    path = str(tmp_path / "lexicon.bin")
+    assert lexicon.build_lexicon(str(csv_path), path) == 2
+
+    lex = lexicon.Lexicon(path, min_confidence=0.6)
+    assert lex.lookup("বিশ্ব") == ("विश्व", 2, 3)
+    assert lex.get("বারো") == "बारो"
+    assert lex.lookup("বসন্ত") is None
+    assert lexicon.Lexicon(path, min_confidence=0.9).get("বিশ্ব") is None
+
+    def fail_correct(bengali, partial, model, tokenizer):
+        raise AssertionError("model should not be called")
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "correct_transliteration", fail_correct)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", lex)
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বারো বিশ্ব।") == "बारो विश्व।"
+
+def test_compiled_trie() -> None:
+    """
+    Tests that the compiled trie returns the same matches as the dict-based Trie,
+    including the nukta early return, and that searching from an offset matches
+    searching a slice.
+    """
+    from salidtranslit import reference, trie
+
+    text = "বিশ্ব ভক্তি ড়़় विश्व क़ ऽ viśva l̤ vishva .Dambana R^ ~N"
+    for mappings in reference.load_mappings().values():
+        source = trie.Trie()
+        for term, mapping in mappings.items():
+            source.insert(term, mapping)
+        compiled = trie.CompiledTrie(source)
+        for i in range(len(text) + 1):
+            expected = source.searchLongestMatch(text[i:])
+            assert compiled.searchLongestMatch(text[i:]) == expected
+            assert compiled.searchLongestMatch(text, i) == expected
+            assert source.searchLongestMatch(text, i) == expected
+
+def test_transliterate_stream() -> None:
+    """
+    Tests that streamed output matches whole-text output for every chunking.
+    """
+    from salidtranslit.stream import transliterate_stream
+
+    text = "चारि दिके मोर वसन्त हसित,\nयौवनकुसुम प्राणे विकशित, क्\nभक्ति विश्व\n"
+    expected = salidtranslit.transliterate("Devanagari", "IAST", text)
+    for size in (1, 3, 7, 50):
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        for chunk_size in (1, 5, 16, 1000):
+            assert "".join(transliterate_stream("Devanagari", "IAST", pieces, chunk_size)) == expected
+    iast = expected
+    assert "".join(transliterate_stream("IAST", "Bengali", [iast], 8)) == salidtranslit.transliterate("IAST", "Bengali", iast)
+    pieces = [iast[i:i + 3] for i in range(0, len(iast), 3)]
+    assert "".join(transliterate_stream("IAST", "ITRANS", pieces, 5)) == salidtranslit.transliterate("IAST", "ITRANS", iast)
+    with pytest.raises(ValueError):
+        transliterate_stream("IAST", "IAST", [iast])
+
+    # Input without whitespace is only split after an unmapped character.
+    import random
+    from salidtranslit import reference
+    from salidtranslit.stream import transliterate_buffer
+
+    rng = random.Random(0)
+    for source, target in (("ITRANS", "Devanagari"), ("Devanagari", "IAST")):
+        keys = sorted(reference.load_mappings()[source.lower()]) + ["1", ",", "x"]
+        for _ in range(100):
+            text = "".join(rng.choice(keys) for _ in range(rng.randint(0, 100)))
+            expected = salidtranslit.transliterate(source, target, text)
+            pieces = [text[i:i + 5] for i in range(0, len(text), 5)]
+            assert "".join(transliterate_stream(source, target, pieces, 3)) == expected
+            out = bytearray()
+            assert out[:transliterate_buffer(source, target, text.encode(), out, 3)].decode() == expected
+
+def test_transliterate_buffer() -> None:
+    """
+    Tests that UTF-8 buffers are transliterated into a bytearray, reusing it in
+    place when it is long enough, with the same output as whole-text transliteration.
+    """
+    from salidtranslit.stream import transliterate_buffer
+
+    text = "चारि दिके मोर वसन्त हसित,\nयौवनकुसुम प्राणे विकशित, क्\nभक्ति विश्व\n"
+    expected = salidtranslit.transliterate("Devanagari", "IAST", text).encode()
+    for chunk_size in (16, 64, 1000):
+        out = bytearray(b"x" * 200)
+        n = transliterate_buffer("Devanagari", "IAST", memoryview(text.encode()), out, chunk_size)
+        assert (out[:n], len(out), out[n:]) == (expected, 200, b"x" * (200 - n))
+    out = bytearray()
+    assert transliterate_buffer("Devanagari", "Bengali", bytearray(text.encode()), out, 16) == len(out)
+    assert out.decode() == salidtranslit.transliterate("Devanagari", "Bengali", text)
+
+def test_cli(tmp_path) -> None:
+    """
+    Tests the command-line entry point with files.
+    """
+    from salidtranslit.cli import main
+
+    infile, outfile = tmp_path / "in.txt", tmp_path / "out.txt"
+    infile.write_text("विश्व\nभक्ति", encoding="utf-8")
+    assert main(["devanagari", "itrans", "-i", str(infile), "-o", str(outfile), "--chunk-size", "4"]) == 0
+    assert outfile.read_text(encoding="utf-8") == "vishva\nbhakti"
+
+def test_transliterate_corpus() -> None:
+    """
+    Tests that multi-process corpus transliteration keeps input order and line endings.
+    """
+    from salidtranslit.corpus import transliterate_corpus
+
+    lines = ["विश्व\n", "भक्ति\r\n", "चरणध्वनि\n", "अंग"] * 5
+    expected = [salidtranslit.transliterate("Devanagari", "Bengali", line) for line in lines]
+    assert list(transliterate_corpus("Devanagari", "Bengali", lines, workers=2, shard_size=3)) == expected
+    assert list(transliterate_corpus("Devanagari", "Bengali", lines)) == expected
+
+    # The parent is only frozen while the workers are forked.
+    import gc
+
+    outputs = transliterate_corpus("Devanagari", "Bengali", lines, workers=2, shard_size=3)
+    assert next(outputs) == expected[0]
+    assert gc.get_freeze_count() == 0
+    outputs.close()
+
+def test_corpus_context(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that worker pools are not forked once torch is imported, and that
+    corpus transliteration still works over freshly started workers.
+    """
+    import sys
+    import types
+
+    from salidtranslit import corpus
+
+    monkeypatch.setitem(sys.modules, "torch", types.ModuleType("torch"))
+    assert corpus._context().get_start_method() != "fork"
+    lines = ["विश्व\n", "भक्ति\n", "अंग"] * 3
+    expected = [salidtranslit.transliterate("Devanagari", "Bengali", line) for line in lines]
+    assert list(corpus.transliterate_corpus("Devanagari", "Bengali", lines, workers=2, shard_size=2)) == expected
+
+def test_prefilter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that sentences whose every ब is certain from context skip the model,
+    and that skips are counted.
+    """
+    from salidtranslit import ambiguity, core
+
+    def fail_correct(bengali, partial, model, tokenizer):
+        raise AssertionError("model should not be called")
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "correct_transliteration", fail_correct)
+    monkeypatch.setattr(core, "prefilter_stats", ambiguity.PrefilterStats())
+
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বুকে বলে কদম্ব") == "बुके बले कदम्ब"
+    assert core.prefilter_stats.as_dict() == {"ambiguous": 1, "skipped": 1, "skip_rate": 1.0}
+    assert ambiguity.uncertain_positions("बुके बिश्व अबल") == [5, 12]
+    # ড় and য় come out of the trie as the single code points ड़ and य़.
+    assert ambiguity.uncertain_positions(core.ben_dev_partial("বড়ো বয়স বসন্ত")[0]) == [8]
+
+def test_constrained_variants() -> None:
+    """
+    Tests that constrained decoding only considers ब/व swaps at uncertain positions.
+    """
+    from salidtranslit.model import word_variants
+
+    assert word_variants("बिश्व बाबा बुके, कदम्ब") == [(0, 5, ["विश्व"]), (6, 10, ["वाबा", "बावा", "वावा"])]
+
+def test_constrained_scoring() -> None:
+    """
+    Tests that constrained decoding keeps the highest-scoring ब/व variant of each word.
+    """
+    import types
+
+    torch = pytest.importorskip("torch")
+    from salidtranslit import model
+
+    preferred = "विश्व बावा"
+
+    def token(char: str) -> int:
+        return ord(char) % 1000 + 1
+
+    class Encoding(dict):
+        def __getattr__(self, name: str):
+            try:
+                return self[name]
+            except KeyError:
+                raise AttributeError(name) from None
+
+        def to(self, device: str) -> "Encoding":
+            return self
+
+    class StubTokenizer:
+        pad_token_id = 0
+
+        def __call__(self, texts=None, text_target=None, return_tensors=None, padding=False) -> Encoding:
+            texts = texts if text_target is None else text_target
+            width = max(map(len, texts))
+            ids = torch.tensor([[token(c) for c in text] + [0] * (width - len(text)) for text in texts])
+            return Encoding(input_ids=ids, attention_mask=(ids != 0).long())
+
+    class StubModel:
+        device = "cpu"
+
+        def get_encoder(self):
+            return lambda input_ids, attention_mask: types.SimpleNamespace(last_hidden_state=input_ids.unsqueeze(-1).float())
+
+        def __call__(self, encoder_outputs, attention_mask, labels):
+            # Favours the characters of `preferred`, position by position.
+            logits = torch.zeros(labels.shape[0], labels.shape[1], 1001)
+            for position, char in enumerate(preferred):
+                logits[:, position, token(char)] = 5.0
+            return types.SimpleNamespace(logits=logits)
+
+    stub, tokenizer = StubModel(), StubTokenizer()
+    scores = model._score_targets(stub, tokenizer, ["prompt"], [["बिश्व बाबा", preferred, "विश्व वावा"]])
+    assert scores[0].index(max(scores[0])) == 1
+    bengali, partial = ["বিশ্ব বাবা", "বুকে"], ["बिश्व बाबा", "बुके"]
+    assert model.correct_transliterations_constrained(bengali, partial, stub, tokenizer, batch_size=1) == [preferred, "बुके"]
+    assert model.correct_transliterations(bengali, partial, stub, tokenizer, decoding="constrained") == [preferred, "बुके"]
+
+def test_backend_registry(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that corrector backends can be registered and selected.
+    """
+    from salidtranslit import backends, model
+
+    monkeypatch.setattr(backends, "_backends", dict(backends._backends))
+    backends.register_backend("stub", lambda path: (f"model:{path}", "tokenizer"))
+    assert {"torch", "int8", "onnx", "stub"} <= set(backends.available_backends())
+    assert model.load_finetuned_mt5("ckpt", backend="stub") == ("model:ckpt", "tokenizer")
+
+    monkeypatch.setattr(model, "_backend", model._backend)
+    model.set_backend("stub")
+    assert model.load_finetuned_mt5("ckpt") == ("model:ckpt", "tokenizer")
+    with pytest.raises(ValueError):
+        model.set_backend("missing")
+
+    monkeypatch.setenv("SALIDTRANSLIT_BACKEND", "tourch")
+    with pytest.raises(ValueError, match="SALIDTRANSLIT_BACKEND"):
+        model._env_choice("SALIDTRANSLIT_BACKEND", "torch", backends.available_backends())
+
+def test_onnx_export_path(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """
+    Tests that ONNX exports go to the user cache directory or SALIDTRANSLIT_ONNX_DIR,
+    one directory per checkpoint, and never into the checkpoint itself.
+    """
+    from salidtranslit.backends import onnx_export_path
+
+    first, second = tmp_path / "first", tmp_path / "second"
+    for checkpoint in (first, second):
+        checkpoint.mkdir()
+        (checkpoint / "config.json").write_text("{}")
+    monkeypatch.delenv("SALIDTRANSLIT_ONNX_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = onnx_export_path(str(first))
+    assert path.startswith(str(tmp_path / "cache" / "salidtranslit" / "onnx"))
+    assert path == onnx_export_path(str(first)) != onnx_export_path(str(second))
+    monkeypatch.setenv("SALIDTRANSLIT_ONNX_DIR", str(tmp_path / "exports"))
+    assert onnx_export_path(str(first)).startswith(str(tmp_path / "exports"))
+
+def test_instrumentation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that enabled instrumentation records stage timers and counters and
+    calls hooks, and that nothing is recorded while it is disabled.
+    """
+    from salidtranslit import cache, core, instrument, lexicon
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "get_model", lambda: (None, None))
+    monkeypatch.setattr(core, "correct_transliteration", lambda bengali, partial, model, tokenizer: partial)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    instrument.reset()
+    salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব")
+    assert instrument.snapshot() == {"counters": {}, "timers": {}}
+
+    events = []
+    instrument.add_hook(lambda name, value: events.append(name))
+    instrument.enable()
+    try:
+        salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব")
+        salidtranslit.transliterate("Bengali", "Devanagari", "বুকে")
+        salidtranslit.transliterate("Devanagari", "IAST", "विश्व")
+    finally:
+        instrument.disable()
+        instrument._hooks.clear()
+    metrics = instrument.snapshot()
+    instrument.reset()
+
+    assert metrics["counters"] == {"ambiguous_sentences": 2, "prefilter_skips": 1}
+    assert metrics["timers"]["trie_scan"]["count"] == 3
+    assert metrics["timers"]["word_resolution"]["count"] == 1
+    assert events.count("trie_scan") == 3
+
+def test_corrector_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that a corrector pool batches sentences from concurrent callers,
+    loads the shared model once and refuses work once closed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from salidtranslit import cache, core, lexicon, model, pool
+
+    loads = []
+    batches = []
+    def fake_correct_batch(bengali, partial, model, tokenizer, batch_size=8):
+        batches.append(len(bengali))
+        return [p.replace("ब", "व", 1) for p in partial]
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(model, "correct_transliterations", fake_correct_batch)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    corrector = salidtranslit.CorrectorPool(workers=2, threads_per_worker=1, max_batch_size=4, max_wait=0.2, loader=lambda: loads.append(1) or (None, None))
+    monkeypatch.setattr(pool, "corrector_pool", corrector)
+    texts = [f"বিশ্ব {i}" for i in range(8)]
+    with ThreadPoolExecutor(8) as executor:
+        outputs = list(executor.map(lambda text: salidtranslit.transliterate("Bengali", "Devanagari", text), texts))
+    assert outputs == [f"विश्व {i}" for i in range(8)]
+    assert sum(batches) == 8 and len(batches) < 8 and max(batches) <= 4
+    assert corrector.stats()["sentences"] == 8 and loads == [1]
+
+    corrector.close()
+    with pytest.raises(RuntimeError):
+        corrector.submit("বিশ্ব", "बिश्व")
+
+def test_async_transliterator(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that the async service micro-batches model corrections, runs trie-only
+    directions inline, keeps store lookups off the event loop, falls back to
+    the partial transliteration on timeout or when closed and refuses work
+    after closing.
+    """
+    import asyncio
+    import threading
+    import time
+    from salidtranslit import cache, core, lexicon, store
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    batches = []
+    def stub_corrector(bengali, partial):
+        batches.append(len(bengali))
+        return [p.replace("बि", "वि") for p in partial]
+
+    def slow_corrector(bengali, partial):
+        time.sleep(0.2)
+        return stub_corrector(bengali, partial)
+
+    async def run():
+        async with salidtranslit.AsyncTransliterator(max_batch_size=4, max_wait=0.05, corrector=stub_corrector) as service:
+            outputs = await service.transliterate_batch("Bengali", "Devanagari", ["বিশ্ব"] * 6 + ["বুকে"])
+            inline = await service.transliterate("Devanagari", "IAST", "विश्व")
+        async with salidtranslit.AsyncTransliterator(timeout=0.05, corrector=slow_corrector) as service:
+            fallback = await service.transliterate("Bengali", "Devanagari", "বিশ্ব")
+        # Closing while a batch is in the executor resolves it without a timeout.
+        service = salidtranslit.AsyncTransliterator(max_wait=0, corrector=slow_corrector)
+        in_flight = asyncio.ensure_future(service.transliterate("Bengali", "Devanagari", "বিশ্ব"))
+        await asyncio.sleep(0.05)
+        await service.aclose()
+        closed = await asyncio.wait_for(in_flight, 0.1)
+        with pytest.raises(RuntimeError):
+            await service.transliterate("Bengali", "Devanagari", "বিশ্ব")
+        # Store lookups run off the event loop.
+        monkeypatch.setattr(store, "precomputed_store", ThreadRecordingStore())
+        async with salidtranslit.AsyncTransliterator(corrector=stub_corrector) as service:
+            stored = await service.transliterate("Bengali", "Devanagari", "বিশ্ব")
+        return outputs, inline, fallback, closed, stored
+
+    class ThreadRecordingStore:
+        def __init__(self) -> None:
+            self.threads = set()
+
+        def sentence(self, text):
+            self.threads.add(threading.get_ident())
+
+        def get(self, word):
+            self.threads.add(threading.get_ident())
+
+    outputs, inline, fallback, closed, stored = asyncio.run(run())
+    assert outputs == ["विश्व"] * 6 + ["बुके"]
+    assert batches[:2] == [4, 2]
+    assert inline == "viśva"
+    assert fallback == "बिश्व"
+    assert closed == "बिश्व"
+    assert stored == "विश्व"
+    assert store.precomputed_store.threads and threading.get_ident() not in store.precomputed_store.threads
+
+def test_result_cache(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """
+    Tests that model corrections persist across cache instances, that entries
+    are kept apart by fingerprint and that the cache stays within its size bound.
+    """
+    from salidtranslit import cache, core, lexicon, result_cache
+
+    path = str(tmp_path / "results.sqlite")
+    calls = []
+    def fake_correct(bengali, partial, model, tokenizer):
+        calls.append(bengali)
+        return partial.replace("बि", "वि")
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "get_model", lambda: (None, None))
+    monkeypatch.setattr(core, "correct_transliteration", fake_correct)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+
+    monkeypatch.setattr(result_cache, "result_cache", salidtranslit.ResultCache(path, fingerprint="a"))
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব") == "विश्व"
+    monkeypatch.setattr(result_cache, "result_cache", salidtranslit.ResultCache(path, fingerprint="a"))
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব") == "विश्व"
+    assert calls == ["বিশ্ব"]
+    stats = result_cache.result_cache.stats()
+    assert (stats["hits"], stats["entries"], stats["hit_rate"]) == (1, 1, 1.0)
+    assert stats["bytes_on_disk"] > 0
+
+    # Results are looked up under the corrector configuration of the caller,
+    # and a custom corrector neither reads nor writes the shared cache.
+    assert core.ben_dev_prepare("বিশ্ব") == ("विश्व", False)
+    assert core.ben_dev_prepare("বিশ্ব", mode="greedy:onnx") == ("बिश्व", True)
+    stub = salidtranslit.Transliterator("Bengali", "Devanagari", corrector=lambda bengali, partial: list(partial))
+    assert stub("বিশ্ব") == "बिश्व"
+    assert stub("বিশ্ব বারো।") == "बिश्व बारो।"
+    assert result_cache.result_cache.stats()["entries"] == 1
+
+    # Another checkpoint does not see the entries, and does not delete them.
+    stale = salidtranslit.ResultCache(path, fingerprint="b")
+    assert stale.get("bengali", "devanagari", "beam:torch", "বিশ্ব") is None
+    assert stale.stats()["entries"] == 1
+    assert salidtranslit.ResultCache(path, fingerprint="a").get("bengali", "devanagari", "beam:torch", "বিশ্ব") == "विश्व"
+
+    bounded = salidtranslit.ResultCache(str(tmp_path / "bounded.sqlite"), max_bytes=1000, fingerprint="a")
+    for i in range(100):
+        bounded.put("bengali", "devanagari", "beam:torch", f"বাক্য {i}", f"वाक्य {i}")
+    assert bounded.stats()["bytes"] <= 1000
+    assert bounded.get("bengali", "devanagari", "beam:torch", "বাক্য 99") == "वाक्य 99"
+
+    # Hits are written back in batches, and recently hit entries survive eviction.
+    monkeypatch.setattr(result_cache, "_touch_batch", 2)
+    lru = salidtranslit.ResultCache(str(tmp_path / "lru.sqlite"), max_bytes=400, fingerprint="a")
+    lru.put_many("bengali", "devanagari", "beam:torch", [(f"বাক্য {i}", f"वाक्य {i}") for i in range(10)])
+    assert lru.get("bengali", "devanagari", "beam:torch", "বাক্য 0") == "वाक्य 0"
+    assert lru.get("bengali", "devanagari", "beam:torch", "বাক্য 1") == "वाक्य 1"
+    lru.put_many("bengali", "devanagari", "beam:torch", [(f"বাক্য {i}", f"वाक्य {i}") for i in range(10, 13)])
+    assert lru.get("bengali", "devanagari", "beam:torch", "বাক্য 0") == "वाक्य 0"
+    assert lru.get("bengali", "devanagari", "beam:torch", "বাক্য 2") is None
+
+def test_precompute(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """
+    Tests that a precompute job corrects each ambiguous sentence once, resumes
+    where it stopped, that the store answers transliteration without the model,
+    and that it is only opened with the checkpoint contents and mode it was built with.
+    """
+    from salidtranslit import cache, core, lexicon, precompute, store
+
+    calls = []
+    def fake_corrector(bengali, partial):
+        calls.extend(bengali)
+        return [p.replace("बि", "वि") for p in partial]
+
+    path = str(tmp_path / "store.sqlite")
+    documents = ["বিশ্ব বারো।", "বিশ্ব বারো।", "বিশ্ব।"]
+    stats = precompute.precompute(path, documents[:2], "corpus", shard_size=1, corrector=fake_corrector)
+    assert calls == ["বিশ্ব বারো।"]
+    assert (stats["documents"], stats["ambiguous"], stats["already_stored"], stats["corrected"]) == (2, 2, 1, 1)
+    stats = precompute.precompute(path, documents, "corpus", shard_size=1, corrector=fake_corrector)
+    assert calls == ["বিশ্ব বারো।", "বিশ্ব।"]
+    assert (stats["skipped_documents"], stats["documents"]) == (2, 1)
+
+    built = salidtranslit.PrecomputedStore(path)
+    assert built.lookup("বিশ্ব") == ("विश्व", 2, 2)
+    assert precompute.coverage(built, ["বিশ্ব বারো।", "বারো বিশ্ব।", "বিকাশ।"])["coverage"] == pytest.approx(2 / 3)
+    # Stores are checked on first use.
+    with pytest.raises(ValueError):
+        salidtranslit.PrecomputedStore(path, fingerprint="other").stats()
+    with pytest.raises(ValueError):
+        salidtranslit.PrecomputedStore(path, mode="constrained:onnx").sentence("বিশ্ব")
+
+    # The checkpoint is fingerprinted by content, so a copy keeps its fingerprint.
+    import os
+    import shutil
+    from salidtranslit.result_cache import default_fingerprint
+
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.mkdir()
+    (checkpoint / "model.safetensors").write_bytes(b"weights")
+    shutil.copytree(checkpoint, tmp_path / "copy")
+    os.utime(tmp_path / "copy" / "model.safetensors", ns=(0, 0))
+    (tmp_path / "changed").mkdir()
+    (tmp_path / "changed" / "model.safetensors").write_bytes(b"weightz")
+    assert default_fingerprint(str(checkpoint)) == default_fingerprint(str(tmp_path / "copy"))
+    assert default_fingerprint(str(checkpoint)) != default_fingerprint(str(tmp_path / "changed"))
+
+    # Digests of large files are reused while their size and modification time match.
+    from salidtranslit import result_cache
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(result_cache, "_sidecar_min_bytes", 0)
+    weights = tmp_path / "changed" / "model.safetensors"
+    result_cache._checkpoint_digest.cache_clear()
+    first = default_fingerprint(str(tmp_path / "changed"))
+    stat = weights.stat()
+    weights.write_bytes(b"weighty")
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    result_cache._checkpoint_digest.cache_clear()
+    assert default_fingerprint(str(tmp_path / "changed")) == first
+    os.utime(weights, ns=(0, 0))
+    result_cache._checkpoint_digest.cache_clear()
+    assert default_fingerprint(str(tmp_path / "changed")) != first
+
+    def fail_correct(bengali, partial, model, tokenizer):
+        raise AssertionError("model should not be called")
+
+    monkeypatch.setattr(core, "is_trie_only", lambda: False)
+    monkeypatch.setattr(core, "correct_transliteration", fail_correct)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+    monkeypatch.setattr(lexicon, "lexicon", None)
+    monkeypatch.setattr(store, "precomputed_store", built)
+    hits = built.stats()["hits"]
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বারো বিশ্ব।") == "बारो विश्व।"
+    assert built.stats()["hits"] == hits
+    assert salidtranslit.transliterate("Bengali", "Devanagari", "বিশ্ব বারো।") == "विश्व बारो।"
+    assert built.stats()["hits"] == hits + 1
+
+def test_scriptmap_artifact(tmp_path) -> None:
+    """
+    Tests that the compiled ScriptMap artifact loads the same tries as the JSON
+    files and is ignored when the JSON files no longer match it.
+    """
+    from salidtranslit import reference
+
+    path = str(tmp_path / "scriptmap.bin")
+    reference.build_artifact(path)
+    tries = reference.load_artifact(path)
+    mappings = reference.load_mappings()
+    for script, compiled in tries.items():
+        assert compiled.tables() == reference._compile(mappings[script]).tables()
+    assert reference.load_artifact(reference.artifact_path) is not None
+
+    with open(path, "r+b") as f:
+        f.seek(12)
+        f.write(b"\0\0\0\0")
+    assert reference.load_artifact(path) is None
+    assert reference.load_artifact(str(tmp_path / "missing.bin")) is None
+
+def test_dev_fast_path() -> None:
+    """
+    Tests that the whole-text Devanagari fast path matches the original
+    scanners on random strings of keys, term boundaries, nuktas and unmapped
+    characters.
+    """
+    import random
+    scanners = pytest.importorskip("benchmarks._scanners")
+    from salidtranslit import core, reference
+
+    chars = [key for key, _ in reference.dev_trie.items()] + sorted(reference.end_of_term) + ["‌", "়", "x", "a"]
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice(chars) for _ in range(rng.randint(0, 12)))
+        assert core.dev_ben(text) == scanners.dev_ben(text)
+        assert core.dev_rom(text, 0) == scanners.dev_rom(text, 0)
+        assert core.dev_rom(text, 1) == scanners.dev_rom(text, 1)
+
+def test_original_scanners() -> None:
+    """
+    Tests that every direction of the engine matches the original scanners on
+    random strings of each script's keys, their characters, term boundaries
+    and unmapped characters.
+    """
+    import random
+    scanners = pytest.importorskip("benchmarks._scanners")
+    from salidtranslit import core, reference
+
+    directions = {
+        "devanagari": [
+            (core.dev_ben, scanners.dev_ben),
+            (core.dev_iast, lambda text: scanners.dev_rom(text, 0)),
+            (core.dev_itrans, lambda text: scanners.dev_rom(text, 1)),
+        ],
+        "bengali": [
+            (core.ben_dev_partial, scanners.ben_dev_partial),
+            (core.ben_iast, lambda text: scanners.ben_rom(text, 0)),
+            (core.ben_itrans, lambda text: scanners.ben_rom(text, 1)),
+        ],
+        "iast": [
+            (core.iast_dev, lambda text: scanners.iast_ind(text, 0)),
+            (core.iast_ben, lambda text: scanners.iast_ind(text, 1)),
+            (core.iast_itrans, lambda text: scanners.dev_rom(scanners.iast_ind(text, 0), 1)),
+        ],
+        "itrans": [
+            (core.itrans_dev, lambda text: scanners.itrans_ind(text, 0)),
+            (core.itrans_ben, lambda text: scanners.itrans_ind(text, 1)),
+            (core.itrans_iast, lambda text: scanners.dev_rom(scanners.itrans_ind(text, 0), 0)),
+        ],
+    }
+    rng = random.Random(0)
+    for script, mappings in reference.load_mappings().items():
+        chars = sorted(mappings) + sorted({char for key in mappings for char in key}) + sorted(reference.end_of_term) + ["‌", "়", "़", "x", "A", "क"]
+        for _ in range(500):
+            text = "".join(rng.choice(chars) for _ in range(rng.randint(0, 12)))
+            for optimized, original in directions[script]:
+                assert optimized(text) == original(text), (script, text)
+
+def test_differential_fuzz() -> None:
+    """
+    Tests that every optimized direction matches the reference scanners on
+    random strings and that well-formed words survive every round trip.
+    """
+    fuzz = pytest.importorskip("benchmarks.fuzz")
+
+    assert fuzz.differential(cases=300) == []
+    assert fuzz.differential(cases=100, valid=True) == []
+    assert fuzz.round_trip(cases=200) == []
+    # The original IAST scanner classifies "m̐" by its first code point, "m".
+    assert salidtranslit.transliterate("IAST", "Devanagari", "km̐") == fuzz.ref_iast_ind("km̐", 0) == "क्ँ्"
+
+def test_transducer() -> None:
+    """
+    Tests a transducer described only by classes, states and a rule.
+    """
+    from salidtranslit import trie
+    from salidtranslit.transducer import Composed, Step, Transducer
+
+    source = trie.Trie()
+    for key, rep in (("k", ["K"]), ("kh", ["X"]), ("a", ["A"])):
+        source.insert(key, rep)
+
+    def rule(state: str, cls: str) -> Step:
+        if cls == "bang":
+            return Step(next="s", literal="!")
+        return Step(next="c" if cls == "cons" else "s", before="-" if state == "c" and cls == "cons" else "")
+
+    double = Transducer(trie.CompiledTrie(source), 0, [("bang", "!"), ("cons", "k")], ("s", "c"), rule, {"c": "."})
+    assert double("kkha!k?k") == "K-XA!K?K."
+
+    with pytest.raises(ValueError):
+        Composed(double, double)
+
+def test_benchmark_suite(monkeypatch) -> None:
+    """
+    Tests that the benchmark suite runs Bengali to Devanagari without the model
+    and counts the sentences, not the calls, that reach the corrector.
+    """
+    suite = pytest.importorskip("benchmarks.suite")
+    from salidtranslit import cache, core
+
+    def fail_correct(*args, **kwargs):
+        raise AssertionError("the suite must not call the model without use_model")
+
+    monkeypatch.setattr(core, "correct_transliteration", fail_correct)
+    monkeypatch.setattr(core, "correct_transliterations", fail_correct)
+    monkeypatch.setattr(cache, "word_cache", cache.WordCache(maxsize=0))
+
+    result = suite.run_direction("bengali", "devanagari", limit=100)
+    assert result["sentences"] == 100
+    assert 0 < result["held_out_sentences"] < 100
+    assert 0 < result["model_fraction"] <= 1
+    assert 0 < result["bva_accuracy_no_lexicon"] <= result["bva_accuracy"] <= 1